@@ -0,0 +1,676 @@
+"""
+Checks Learnosity validation offline, so that broken items are found when they're generated instead of after upload.
+
+    issues = check_blob(json_blob)  # [] if the correct answer passes its validation and every blacklisted answer fails
+    equivalent(r"\\frac{x}{2}", r"0.5x", "equivSymbolic")  # True
+
+    python answer_check.py output/*.csv
+
+Printer(..., check_answers=True) runs check_blob on every problem as it's printed.
+
+The responses are parsed from the subset of LaTeX the generators write (numbers, letters, \\frac, \\sqrt, ^, \\cdot,
+\\left( \\right), \\sin, \\ln, ..., and \\frac{d}{dx}). equivSymbolic and equivValue compare the two expressions at a
+few random points with every variable in [0.5, 3]. Clear agreement or disagreement decides; anything in between (or
+points where neither side can be evaluated) is settled by sympy. equivLiteral compares the normalised LaTeX (where x^2
+and x^{2} are the same), with the ignoreOrder, ignoreCoefficientOne and ignoreTrailingZeros options. Equations are
+compared side by side.
+
+Results are cached on the method, the options and the normalised LaTeX of both sides, so a bank where the same
+answers come up again (as they do for most templates) is checked mostly from the cache.
+"""
+import argparse
+import csv
+import functools
+import json
+import math
+import random
+import re
+import sys
+from fractions import Fraction
+
+import instrumentation
+
+SYMBOLIC_METHODS = ("equivSymbolic", "equivValue")
+LITERAL_METHODS = ("equivLiteral", "stringMatch")
+
+_TOKEN = re.compile(r"\s*(?:(\\[a-zA-Z]+|\\.)|(\d+\.?\d*|\.\d+)|(\S))")
+_DROPPED = {"\\left", "\\right", "\\displaystyle", "\\,", "\\;", "\\:", "\\!", "\\ ", "\\quad", "\\qquad", "~"}
+_RENAMED = {"\\dfrac": "\\frac", "\\tfrac": "\\frac", "\\times": "\\cdot", "\\ast": "\\cdot", "*": "\\cdot",
+            "\\lbrace": "{", "\\rbrace": "}", "\\lbrack": "[", "\\rbrack": "]", "\\div": "/"}
+_UNWRAPPED = {"\\mathrm", "\\mathit", "\\mathbf", "\\mathtt"}  # the command is dropped and its argument kept
+# Also unwrapped, unless the options say to ignore text and the argument has letters (units, words). Learnosity's
+# keyboard writes operators as \mathtt{\text{+}}.
+_TEXT = {"\\text", "\\textrm", "\\mbox"}
+
+FUNCTIONS = {
+    "sin": math.sin, "cos": math.cos, "tan": math.tan,
+    "sec": lambda a: 1 / math.cos(a), "csc": lambda a: 1 / math.sin(a), "cot": lambda a: 1 / math.tan(a),
+    "arcsin": math.asin, "arccos": math.acos, "arctan": math.atan,
+    "sinh": math.sinh, "cosh": math.cosh, "tanh": math.tanh,
+    "ln": math.log, "log": math.log10, "exp": math.exp, "abs": abs,
+}
+_INVERSES = {"sin": "arcsin", "cos": "arccos", "tan": "arctan"}
+_CONSTANTS = {"\\pi": "pi", "e": "e"}
+
+SAMPLE_POINTS = 6
+SAMPLE_RANGE = (0.5, 3.0)
+CLEARLY_DIFFERENT = 1e-4  # relative difference above which the numbers decide "not equivalent" without sympy
+
+
+class LatexParseError(ValueError):
+    """Raised for LaTeX the checker can't read."""
+
+
+def _tokenize(latex, ignore_text=True):
+    tokens = [token for match in _TOKEN.finditer(latex) for token in match.groups() if token]
+
+    result = []
+    i = 0
+    while i < len(tokens):
+        token = _RENAMED.get(tokens[i], tokens[i])
+        if token in ("\\left", "\\right") and i + 1 < len(tokens) and tokens[i + 1] == ".":
+            i += 2
+            continue
+        if token in _DROPPED:
+            i += 1
+            continue
+        if token in _UNWRAPPED or token in _TEXT:
+            end = _skip_group(tokens, i + 1)
+            group = tokens[i + 2:end - 1] if tokens[i + 1:i + 2] == ["{"] else tokens[i + 1:end]
+            if token in _TEXT and ignore_text and any(t.isalpha() for t in group):
+                group = []
+            # Read the argument again in place of the command, e.g. \mathtt{\text{+}} is +
+            tokens[i:end] = group
+            continue
+        result.append(token)
+        i += 1
+    return result
+
+
+def _skip_group(tokens, i):
+    """The index after the group (a braced group or a single token) starting at i."""
+    if i >= len(tokens):
+        return i
+    if tokens[i] != "{":
+        return i + 1
+    depth = 0
+    for j in range(i, len(tokens)):
+        if tokens[j] == "{":
+            depth += 1
+        elif tokens[j] == "}":
+            depth -= 1
+            if depth == 0:
+                return j + 1
+    raise LatexParseError("unbalanced braces")
+
+
+def _join(tokens):
+    """Tokens back to LaTeX, with a space only where a command would otherwise run into the next letter."""
+    parts = []
+    for (i, token) in enumerate(tokens):
+        parts.append(token)
+        if token[0] == "\\" and token[1:].isalpha() and i + 1 < len(tokens) and tokens[i + 1][0].isalpha():
+            parts.append(" ")
+    return "".join(parts)
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def normalize(latex, ignore_text=True):
+    """
+    latex without spacing, \\left, \\right, \\displaystyle and (if ignore_text) \\text{...}, and with \\dfrac, \\times,
+    ... spelt one way. Two responses with the same normalised LaTeX are equivalent under every method.
+    """
+    return _join(_tokenize(latex, ignore_text))
+
+
+def _sides(tokens):
+    """Splits tokens on the = signs outside of any brackets."""
+    sides = [[]]
+    depth = 0
+    for token in tokens:
+        if token in ("{", "(", "["):
+            depth += 1
+        elif token in ("}", ")", "]"):
+            depth -= 1
+        if token == "=" and depth == 0:
+            sides.append([])
+        else:
+            sides[-1].append(token)
+    return sides
+
+
+def _is_number(token):
+    return token[0].isdigit() or (token[0] == "." and len(token) > 1)
+
+
+class _Parser:
+    """
+    Recursive descent parser from tokens to a tree of tuples:
+    ('num', Fraction), ('var', name), ('const', 'pi' or 'e'), ('add', terms), ('mul', factors), ('neg', a),
+    ('div', a, b), ('pow', a, b), ('root', a, n), ('func', name, a), ('log', a, base), ('diff', name, a)
+    """
+
+    def __init__(self, tokens):
+        self.tokens = list(tokens)
+        self.i = 0
+
+    def peek(self):
+        return self.tokens[self.i] if self.i < len(self.tokens) else None
+
+    def take(self):
+        token = self.peek()
+        if token is None:
+            raise LatexParseError("unexpected end of expression")
+        self.i += 1
+        return token
+
+    def expect(self, token):
+        if self.take() != token:
+            raise LatexParseError(f"expected {token} at token {self.i}")
+
+    def parse(self):
+        node = self.expr()
+        if self.peek() is not None:
+            raise LatexParseError(f"unexpected {self.peek()}")
+        return node
+
+    def expr(self):
+        terms = []
+        sign = self.take() if self.peek() in ("+", "-") else "+"
+        while True:
+            term = self.term()
+            terms.append(("neg", term) if sign == "-" else term)
+            if self.peek() not in ("+", "-"):
+                break
+            sign = self.take()
+        return terms[0] if len(terms) == 1 else ("add", tuple(terms))
+
+    def starts_factor(self, token):
+        return token is not None and (_is_number(token) or token.isalpha() or token in ("(", "[", "{")
+                                      or token[1:] in FUNCTIONS or token in ("\\frac", "\\sqrt", "\\pi"))
+
+    def term(self):
+        factors = [self.unary()]
+        while True:
+            token = self.peek()
+            if token == "\\cdot":
+                self.take()
+                factors.append(self.unary())
+            elif token == "/":
+                self.take()
+                factors = [("div", _product(factors), self.unary())]
+            elif self.starts_factor(token):
+                factors.append(self.power())
+            else:
+                return _product(factors)
+
+    def unary(self):
+        if self.peek() == "-":
+            self.take()
+            return ("neg", self.unary())
+        if self.peek() == "+":
+            self.take()
+        return self.power()
+
+    def power(self):
+        base = self.atom()
+        while self.peek() == "^":
+            self.take()
+            base = ("pow", base, self.exponent())
+        return base
+
+    def exponent(self):
+        token = self.peek()
+        if token == "{":
+            return self.atom()
+        if token == "-":
+            self.take()
+            return ("neg", self.exponent())
+        if token is not None and _is_number(token) and len(token) > 1:
+            # x^23 is x^2 times 3
+            self.tokens[self.i:self.i + 1] = [token[0], token[1:]]
+        return self.atom()
+
+    def argument(self):
+        """The tokens of the next braced group, or of the next single character."""
+        token = self.peek()
+        if token == "{":
+            end = _skip_group(self.tokens, self.i)
+            group = self.tokens[self.i + 1:end - 1]
+            self.i = end
+            return group
+        token = self.take()
+        if _is_number(token) and len(token) > 1:
+            self.tokens.insert(self.i, token[1:])
+            return [token[0]]
+        return [token]
+
+    def atom(self):
+        token = self.take()
+        if _is_number(token):
+            return ("num", Fraction(token))
+        if token.isalpha():
+            name = token
+            if self.peek() == "_":
+                self.take()
+                name += "_" + "".join(self.argument())
+            elif token in _CONSTANTS:
+                return ("const", _CONSTANTS[token])
+            return ("var", name)
+        if token in ("{", "(", "["):
+            node = self.expr()
+            self.expect({"{": "}", "(": ")", "[": "]"}[token])
+            return node
+        if token == "|":
+            node = self.expr()
+            self.expect("|")
+            return ("func", "abs", node)
+        if token in _CONSTANTS:
+            return ("const", _CONSTANTS[token])
+        if token == "\\frac":
+            (numerator, denominator) = (self.argument(), self.argument())
+            if numerator == ["d"] and len(denominator) == 2 and denominator[0] == "d" and denominator[1].isalpha():
+                return ("diff", denominator[1], self.term())
+            return ("div", _Parser(numerator).parse(), _Parser(denominator).parse())
+        if token == "\\sqrt":
+            index = ("num", Fraction(2))
+            if self.peek() == "[":
+                self.take()
+                index = self.expr()
+                self.expect("]")
+            return ("root", _Parser(self.argument()).parse(), index)
+        if token[1:] in FUNCTIONS:
+            return self.function(token[1:])
+        raise LatexParseError(f"unsupported {token}")
+
+    def function(self, name):
+        exponent = base = None
+        if name == "log" and self.peek() == "_":
+            self.take()
+            base = _Parser(self.argument()).parse()
+        if self.peek() == "^":
+            self.take()
+            exponent = self.exponent()
+            if exponent == ("neg", ("num", 1)) and name in _INVERSES:
+                (name, exponent) = (_INVERSES[name], None)
+        argument = self.atom() if self.peek() in ("(", "[", "{") else self.power()
+        node = ("log", argument, base) if base is not None else ("func", name, argument)
+        return ("pow", node, exponent) if exponent is not None else node
+
+
+def _product(factors):
+    return factors[0] if len(factors) == 1 else ("mul", tuple(factors))
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def parse(normalized):
+    """The trees of the sides of normalised LaTeX (one side unless it's an equation)."""
+    return tuple(_Parser(side).parse() for side in _sides(_tokenize(normalized)))
+
+
+def _variables(node, names):
+    kind = node[0]
+    if kind == "var":
+        names.add(node[1])
+    elif kind == "diff":
+        names.add(node[1])
+        _variables(node[2], names)
+    elif kind in ("add", "mul"):
+        for child in node[1]:
+            _variables(child, names)
+    else:
+        for child in node[1:]:
+            if isinstance(child, tuple):
+                _variables(child, names)
+    return names
+
+
+def _constant(node):
+    """The value of node as a Fraction, if it's a rational constant, else None."""
+    kind = node[0]
+    if kind == "num":
+        return node[1]
+    if kind == "neg":
+        value = _constant(node[1])
+        return -value if value is not None else None
+    if kind == "div":
+        (a, b) = (_constant(node[1]), _constant(node[2]))
+        return a / b if a is not None and b else None
+    return None
+
+
+def _pow(a, p, q):
+    """a ** (p / q), with odd roots of negative numbers taken as real (-8)^(1/3) == -2."""
+    if q == 1:
+        return a ** p
+    if a >= 0:
+        return a ** (p / q)
+    if q % 2:
+        return (-1 if p % 2 else 1) * (-a) ** (p / q)
+    raise ValueError("even root of a negative number")
+
+
+def _fpow(a, b):
+    if a < 0 and b != int(b):
+        raise ValueError("non-integer power of a negative number")
+    return a ** b
+
+
+def _diff(f, x):
+    """f'(x), by a five point central difference."""
+    h = 1e-3 * max(1.0, abs(x))
+    return (f(x - 2 * h) - 8 * f(x - h) + 8 * f(x + h) - f(x + 2 * h)) / (12 * h)
+
+
+def _log(a, base):
+    return math.log(a, base)
+
+
+_NAMESPACE = dict({"_" + name: f for (name, f) in FUNCTIONS.items()},
+                  _pow=_pow, _fpow=_fpow, _diff=_diff, _log=_log, _pi=math.pi, _e=math.e, __builtins__={})
+
+
+def _python_name(variable):
+    return "v_" + re.sub(r"\W", "_", variable)
+
+
+def _source(node):
+    """Python source that evaluates node with floats."""
+    kind = node[0]
+    if kind == "num":
+        return repr(float(node[1]))
+    if kind == "var":
+        return _python_name(node[1])
+    if kind == "const":
+        return "_" + node[1]
+    if kind == "add":
+        return "(" + " + ".join(_source(child) for child in node[1]) + ")"
+    if kind == "mul":
+        return "(" + " * ".join(_source(child) for child in node[1]) + ")"
+    if kind == "neg":
+        return f"(-{_source(node[1])})"
+    if kind == "div":
+        return f"({_source(node[1])} / {_source(node[2])})"
+    if kind in ("pow", "root"):
+        exponent = _constant(node[2])
+        if kind == "root":
+            exponent = 1 / exponent if exponent else None
+            if exponent is None:
+                return f"_fpow({_source(node[1])}, 1 / {_source(node[2])})"
+        if exponent is not None:
+            return f"_pow({_source(node[1])}, {exponent.numerator}, {exponent.denominator})"
+        return f"_fpow({_source(node[1])}, {_source(node[2])})"
+    if kind == "func":
+        return f"_{node[1]}({_source(node[2])})"
+    if kind == "log":
+        return f"_log({_source(node[1])}, {_source(node[2])})"
+    if kind == "diff":
+        name = _python_name(node[1])
+        return f"_diff(lambda {name}: {_source(node[2])}, {name})"
+    raise LatexParseError(f"unknown node {kind}")
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def _compiled(node, variables):
+    """node as a Python function of the variables, in order."""
+    arguments = ", ".join(_python_name(v) for v in variables)
+    return eval(f"lambda {arguments}: {_source(node)}", _NAMESPACE)
+
+
+@functools.lru_cache(maxsize=256)
+def _sample_points(variables):
+    """SAMPLE_POINTS random points, the same every time for the same variables."""
+    rng = random.Random(" ".join(variables))
+    return [tuple(rng.uniform(*SAMPLE_RANGE) for _ in variables) for _ in range(SAMPLE_POINTS)]
+
+
+def _numerically_equal(a, b, tolerance):
+    """True or False if the sample points decide it, None if they don't."""
+    variables = tuple(sorted(_variables(a, set()) | _variables(b, set())))
+    (f, g) = (_compiled(a, variables), _compiled(b, variables))
+    agree = 0
+    for point in _sample_points(variables):
+        try:
+            (x, y) = (f(*point), g(*point))
+        except (ArithmeticError, ValueError, TypeError):
+            continue
+        if isinstance(x, complex) or isinstance(y, complex) or not (math.isfinite(x) and math.isfinite(y)):
+            continue
+        scale = max(1.0, abs(x), abs(y))
+        difference = abs(x - y)
+        if difference > CLEARLY_DIFFERENT * scale:
+            return False
+        if difference > tolerance * scale:
+            return None
+        agree += 1
+    return True if agree >= SAMPLE_POINTS // 2 else None
+
+
+def _sympy(node, sym):
+    kind = node[0]
+    if kind == "num":
+        return sym.Rational(node[1].numerator, node[1].denominator)
+    if kind == "var":
+        return sym.Symbol(node[1], positive=True)
+    if kind == "const":
+        return sym.pi if node[1] == "pi" else sym.E
+    if kind == "add":
+        return sym.Add(*(_sympy(child, sym) for child in node[1]))
+    if kind == "mul":
+        return sym.Mul(*(_sympy(child, sym) for child in node[1]))
+    if kind == "neg":
+        return -_sympy(node[1], sym)
+    if kind == "div":
+        return _sympy(node[1], sym) / _sympy(node[2], sym)
+    if kind == "pow":
+        return _sympy(node[1], sym) ** _sympy(node[2], sym)
+    if kind == "root":
+        return sym.root(_sympy(node[1], sym), _sympy(node[2], sym))
+    if kind == "func":
+        function = {"ln": sym.log, "abs": sym.Abs, "arcsin": sym.asin, "arccos": sym.acos,
+                    "arctan": sym.atan}.get(node[1]) or getattr(sym, node[1])
+        argument = _sympy(node[2], sym)
+        return sym.log(argument, 10) if node[1] == "log" else function(argument)
+    if kind == "log":
+        return sym.log(_sympy(node[1], sym), _sympy(node[2], sym))
+    if kind == "diff":
+        return sym.diff(_sympy(node[2], sym), sym.Symbol(node[1], positive=True))
+    raise LatexParseError(f"unknown node {kind}")
+
+
+def _sympy_equal(a, b, tolerance):
+    import sympy as sym
+    difference = sym.simplify(_sympy(a, sym) - _sympy(b, sym))
+    if difference == 0:
+        return True
+    if not difference.free_symbols:
+        return abs(complex(sym.N(difference, 30))) <= tolerance
+    return False
+
+
+def _side_equal(a, b, tolerance):
+    result = _numerically_equal(a, b, tolerance)
+    if result is None:
+        if instrumentation.active:
+            instrumentation.count("answer_check.sympy")
+        result = _sympy_equal(a, b, tolerance)
+    return result
+
+
+def _braced_scripts(tokens):
+    """
+    Tokens with every superscript and subscript braced, so that x^2 and x^{2} compare equal. As in LaTeX, only the
+    first character of an unbraced number is the script: x^23 is x^{2}3.
+    """
+    result = []
+    i = 0
+    while i < len(tokens):
+        result.append(tokens[i])
+        if tokens[i] in ("^", "_") and i + 1 < len(tokens) and tokens[i + 1] != "{":
+            script = tokens[i + 1]
+            if _is_number(script) and len(script) > 1:
+                result += ["{", script[0], "}", script[1:]]
+            else:
+                result += ["{", script, "}"]
+            i += 1
+        i += 1
+    return result
+
+
+def _literal_tokens(normalized, options):
+    tokens = _braced_scripts(_tokenize(normalized))
+    if options.get("ignoreTrailingZeros"):
+        tokens = [token.rstrip("0").rstrip(".") if _is_number(token) and "." in token else token for token in tokens]
+    if options.get("ignoreCoefficientOne"):
+        tokens = [token for (i, token) in enumerate(tokens)
+                  if not (token == "1" and (i == 0 or tokens[i - 1] in ("+", "-", "(", "=", "\\cdot"))
+                          and i + 1 < len(tokens) and (tokens[i + 1].isalpha() or tokens[i + 1] == "("
+                                                       or tokens[i + 1][1:] in FUNCTIONS))]
+    if options.get("ignoreOrder"):
+        return tuple(tuple(sorted(_signed_terms(side))) for side in _sides(tokens))
+    return tuple(tokens)
+
+
+def _signed_terms(tokens):
+    """The terms of a sum, each with its sign, e.g. ['+x^{2}', '-3x']."""
+    terms = []
+    depth = 0
+    current = []
+    for token in tokens:
+        if token in ("{", "(", "["):
+            depth += 1
+        elif token in ("}", ")", "]"):
+            depth -= 1
+        if depth == 0 and token in ("+", "-") and current:
+            terms.append(current)
+            current = []
+        current.append(token)
+    if current:
+        terms.append(current)
+    return ["".join(term) if term[0] in ("+", "-") else "+" + "".join(term) for term in terms]
+
+
+def _options_key(options):
+    return tuple(sorted((k, json.dumps(v)) for (k, v) in options.items() if k != "inverseResult"))
+
+
+def equivalent(response, value, method="equivSymbolic", options=None):
+    """
+    Whether Learnosity would accept response for a validation {"method": method, "value": value, "options": options},
+    leaving aside inverseResult.
+    :raises LatexParseError: if response or value can't be read
+    """
+    options = options or {}
+    ignore_text = options.get("ignoreText", False)
+    return _equivalent(method, normalize(response, ignore_text), normalize(value, ignore_text),
+                       _options_key(options))
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def _equivalent(method, response, value, options_key):
+    if response == value:
+        return True
+    options = {k: json.loads(v) for (k, v) in options_key}
+    if method in LITERAL_METHODS:
+        return _literal_tokens(response, options) == _literal_tokens(value, options)
+    if method not in SYMBOLIC_METHODS:
+        raise ValueError(f"Unknown validation method {method!r}.")
+
+    (a, b) = (parse(response), parse(value))
+    if len(a) != len(b):
+        return False
+    if method == "equivValue":
+        tolerance = 10.0 ** -options.get("decimalPlaces", 10)
+    else:
+        tolerance = 1e-9
+    if all(_side_equal(x, y, tolerance) for (x, y) in zip(a, b)):
+        return True
+    # a = b is the same equation as b = a
+    return len(a) == 2 and all(_side_equal(x, y, tolerance) for (x, y) in zip(a, reversed(b)))
+
+
+def passes(response, validations):
+    """Whether response passes every one of validations (a list of {"method", "value", "options"} dicts)."""
+    for validation in validations:
+        options = validation.get("options") or {}
+        result = equivalent(response, validation["value"], validation["method"], options)
+        if result == bool(options.get("inverseResult")):
+            return False
+    return True
+
+
+def _check_response(valid, alternates, label):
+    """The issues with one response box: valid is its list of validations, alternates the lists of alt_responses."""
+    issues = []
+    checked = [v for v in valid if v["method"] in SYMBOLIC_METHODS + LITERAL_METHODS]
+    answers = [v for v in checked if not (v.get("options") or {}).get("inverseResult")]
+    blacklisted = [v["value"] for v in checked if (v.get("options") or {}).get("inverseResult")]
+    blacklisted.extend(alt[0]["value"] for (alt, score) in alternates if not score and alt)
+    try:
+        for answer in answers:
+            if answer["method"] in SYMBOLIC_METHODS:
+                # An answer always matches itself as text, so make sure it can be read at all
+                parse(normalize(answer["value"], (answer.get("options") or {}).get("ignoreText", False)))
+            if not passes(answer["value"], checked):
+                issues.append(f"{label}correct answer {answer['value']!r} fails its own validation")
+        for (alt, score) in alternates:
+            if score and alt and not passes(alt[0]["value"], alt):
+                issues.append(f"{label}alternate answer {alt[0]['value']!r} fails its own validation")
+        for value in blacklisted:
+            if passes(value, checked):
+                issues.append(f"{label}blacklisted answer {value!r} is accepted")
+    except LatexParseError as e:
+        issues.append(f"{label}can't read the answer: {e}")
+    return issues
+
+
+@instrumentation.timed("answer_check")
+def check_blob(json_blob):
+    """
+    The problems with a Learnosity blob (from lea_blob or cloze_blob) as a list of messages, [] if there are none:
+    the correct answers that fail their own validation, and the blacklisted answers that pass it.
+    """
+    blob = json.loads(json_blob) if isinstance(json_blob, str) else json_blob
+    validation = blob["validation"]
+    valid = validation["valid_response"]["value"]
+    alt_responses = [(alt["value"], alt.get("score", 1)) for alt in validation.get("alt_responses", [])]
+    if blob.get("type") == "clozeformula":
+        issues = []
+        for (i, box) in enumerate(valid):
+            alternates = [(alt[i], score) for (alt, score) in alt_responses if i < len(alt)]
+            issues.extend(_check_response(box, alternates, f"response {i + 1}: "))
+        return issues
+    return _check_response(valid, alt_responses, "")
+
+
+def check_csv(path, column="Learnosity JSON"):
+    """Checks the blobs of a bank written by Printer. Yields (problem number, issues) for the problems with issues."""
+    with open(path, newline="") as f:
+        for (number, row) in enumerate(csv.DictReader(f), 1):
+            if row.get(column):
+                issues = check_blob(row[column])
+                if issues:
+                    yield number, issues
+
+
+def cache_info():
+    return {"results": _equivalent.cache_info(), "parsed": parse.cache_info(), "compiled": _compiled.cache_info()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that the Learnosity validation in item banks works.")
+    parser.add_argument("banks", nargs="+", help="CSV files written by Printer")
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for path in args.banks:
+        for (number, issues) in check_csv(path):
+            failed += 1
+            for issue in issues:
+                print(f"{path}: problem {number}: {issue}")
+    print(f"{failed} problems with issues.")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Writes files from a background thread, so generating problems doesn't wait on the disk (or a network filesystem).
+
+    writer = BackgroundWriter()
+    f = writer.open(path, 'w')
+    f.write(text)  # returns at once, unless max_pending writes are already waiting
+    f.close()      # waits until everything written to f is on its way to disk
+    writer.close()
+
+Every file shares one thread and one queue, so writes happen in the order they were made. The queue is bounded:
+once max_pending writes are waiting, write() blocks until the thread catches up, which keeps memory use flat when
+generation is faster than the disk. If a write fails in the thread, the writer stays failed: the error is raised by
+every later write, flush, wait and close, and nothing more is written. Files are still closed.
+"""
+import queue
+import threading
+
+_STOP = object()
+
+
+class BackgroundWriter:
+    """
+    :param max_pending: the number of writes that can wait in the queue before write() blocks
+    """
+
+    def __init__(self, max_pending=1024):
+        self._queue = queue.Queue(max_pending)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name='BackgroundWriter', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            (f, method, args) = self._queue.get()
+            try:
+                if f is _STOP:
+                    return
+                if self._error is None or method == 'close':
+                    getattr(f, method)(*args)
+            except BaseException as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+    def submit(self, f, method, *args):
+        """Calls f.method(*args) in the writer thread."""
+        if not self._thread.is_alive():
+            self._raise_error()
+            raise ValueError("The writer is closed.")
+        if self._error is not None and method == 'close':
+            self._queue.put((f, method, args))  # so the file isn't left open
+        self._raise_error()
+        self._queue.put((f, method, args))
+
+    def wait(self):
+        """Waits until every submitted call has been made."""
+        self._queue.join()
+        self._raise_error()
+
+    def open(self, path, mode='w', buffering=-1, **kwargs):
+        """Opens path (in this thread, so errors opening it are raised here) and gives a QueuedFile for it."""
+        return QueuedFile(self, open(path, mode, buffering=buffering, **kwargs))
+
+    def close(self):
+        """Waits for the pending writes and stops the thread."""
+        if self._thread.is_alive():
+            self._queue.put((_STOP, None, None))
+            self._thread.join()
+        self._raise_error()
+
+
+class QueuedFile:
+    """A file whose writes are made by a BackgroundWriter. Supports what Printer and csv.writer use."""
+
+    def __init__(self, writer, f):
+        self._writer = writer
+        self._file = f
+        self.name = f.name
+        self.closed = False
+
+    def write(self, text):
+        self._writer.submit(self._file, 'write', text)
+        return len(text)
+
+    def flush(self):
+        self._writer.submit(self._file, 'flush')
+        self._writer.wait()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._writer.submit(self._file, 'close')
+            self._writer.wait()
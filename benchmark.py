@@ -0,0 +1,214 @@
+"""
+Benchmarks every Template in a generator module.
+
+    python benchmark.py extend_the_power_rule_to_functions_with_rational_exponents -n 200 --output bench.json
+    python benchmark.py extend_the_power_rule_to_functions_with_rational_exponents --baseline bench.json
+
+For each template this reports problems per second, how often @unique rejected a draw, and how the time splits
+between variables(), the rest of template(), polytex, the validations blob builders and Printer I/O, in the fastest
+of --repeat runs. With --baseline, exits with status 1 if any template's throughput dropped by more than
+--tolerance, measured twice.
+"""
+import argparse
+import gc
+import importlib
+import json
+import platform
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager, ExitStack
+from pathlib import Path
+
+import instrumentation
+from tools import Printer, find_templates
+
+
+@contextmanager
+def patched(obj, name, timings, key):
+    """Replaces obj.name with a wrapper that adds the time spent in it to timings[key]."""
+    original = getattr(obj, name)
+    was_set = name in vars(obj)
+
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            timings[key] += time.perf_counter() - start
+
+    setattr(obj, name, timed)
+    try:
+        yield
+    finally:
+        if was_set:
+            setattr(obj, name, original)
+        else:
+            delattr(obj, name)
+
+
+def unique_stats(template):
+    """The stats of the template's @unique methods, added together."""
+    totals = defaultdict(int)
+    for klass in type(template).__mro__:
+        for attr in vars(klass).values():
+            for (key, value) in getattr(attr, 'stats', {}).items():
+                totals[key] += value
+    return totals
+
+
+def clear_caches():
+    """Empties the memo caches of the helpers, so each run generates its problems from scratch."""
+    sympy_tools = sys.modules.get('sympy_tools')
+    if sympy_tools:
+        sympy_tools.clear_latex_cache()
+        sympy_tools.clear_expression_cache()
+
+
+def benchmark_template(template_class, num_problems, output_dir, repeats=3):
+    """
+    Generates and prints num_problems problems from template_class repeats times and returns the measurements of
+    the fastest run. The Sampler and one problem are made first, outside of the timing, so one-time costs (building
+    the Sampler, imports) aren't counted. Every run makes the same problems, with the helper caches emptied first.
+    """
+    template = template_class()
+    if template_class.domains is not None:
+        template_class.sampler()
+    template.restart()
+    template()
+
+    runs = [_timed_run(template, num_problems, output_dir) for _ in range(repeats)]
+    best = min(runs, key=lambda r: r["seconds"])
+    best["repeats"] = repeats
+    return best
+
+
+def _timed_run(template, num_problems, output_dir):
+    template.restart()
+    clear_caches()
+    # As in timeit, garbage from earlier runs isn't collected in the middle of this one
+    gc.collect()
+    gc.disable()
+    try:
+        return _measure(template, num_problems, output_dir)
+    finally:
+        gc.enable()
+
+
+def _measure(template, num_problems, output_dir):
+    timings = defaultdict(float)
+    printer = Printer(f"benchmark {type(template).__name__}", output_dir=output_dir)
+
+    sink = instrumentation.AggregateSink()
+    with ExitStack() as stack:
+        stack.enter_context(patched(template, 'variables', timings, 'variables'))
+        # polytex, lea_blob and cloze_blob are timed by the instrumentation
+        stack.enter_context(instrumentation.enabled(sink))
+
+        start = time.perf_counter()
+        for _ in range(num_problems):
+            t = time.perf_counter()
+            problem = template()
+            timings['template'] += time.perf_counter() - t
+
+            t = time.perf_counter()
+            printer.print(problem)
+            timings['printer_io'] += time.perf_counter() - t
+        t = time.perf_counter()
+        printer.finish_html_file()
+        timings['printer_io'] += time.perf_counter() - t
+        total = time.perf_counter() - start
+
+    for key in ('polytex', 'lea_blob', 'cloze_blob'):
+        timings[key] = sink.timings[key][1] if key in sink.timings else 0.0
+    # template() includes the time spent in the helpers it calls, so split those out
+    timings['template'] -= timings['variables'] + timings['polytex'] + timings['lea_blob'] + timings['cloze_blob']
+
+    stats = unique_stats(template)
+    draws = stats['accepted'] + stats['duplicates'] + stats['failed_assertions']
+    return {
+        "problems": num_problems,
+        "seconds": total,
+        "problems_per_sec": num_problems / total if total else float('inf'),
+        "rejection_rate": (draws - stats['accepted']) / draws if draws else 0.0,
+        "unique": dict(stats),
+        "time": {key: timings[key] for key in ('variables', 'template', 'polytex', 'lea_blob', 'cloze_blob',
+                                               'printer_io')},
+    }
+
+
+def run(module_name, num_problems, templates=None, repeats=3):
+    if module_name.endswith('.py'):
+        sys.path.insert(0, str(Path(module_name).resolve().parent))
+        module_name = Path(module_name).stem
+    module = importlib.import_module(module_name)
+
+    results = {"module": module_name, "python": platform.python_version(), "templates": {}}
+    with tempfile.TemporaryDirectory() as output_dir:
+        for template_class in find_templates(module):
+            if templates and template_class.__name__ not in templates:
+                continue
+            results["templates"][template_class.__name__] = benchmark_template(template_class, num_problems,
+                                                                               Path(output_dir), repeats)
+    return results
+
+
+def regressions(results, baseline, tolerance):
+    """The templates whose throughput dropped by more than tolerance (a fraction) compared to baseline."""
+    slower = []
+    for (name, old) in baseline.get("templates", {}).items():
+        new = results["templates"].get(name)
+        if new and new["problems_per_sec"] < old["problems_per_sec"] * (1 - tolerance):
+            slower.append((name, old["problems_per_sec"], new["problems_per_sec"]))
+    return slower
+
+
+def report(results):
+    columns = ('variables', 'template', 'polytex', 'lea_blob', 'cloze_blob', 'printer_io')
+    print(f"{'template':<20}{'problems/s':>12}{'rejected':>10}" + "".join(f"{c:>12}" for c in columns))
+    for (name, r) in results["templates"].items():
+        shares = [r["time"][c] / r["seconds"] if r["seconds"] else 0 for c in columns]
+        print(f"{name:<20}{r['problems_per_sec']:>12.1f}{r['rejection_rate']:>10.1%}"
+              + "".join(f"{share:>12.1%}" for share in shares))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Templates in a generator module.")
+    parser.add_argument("module", help="module name or path of the generator script")
+    parser.add_argument("-n", "--num-problems", type=int, default=100, help="problems to generate per template")
+    parser.add_argument("-r", "--repeat", type=int, default=3,
+                        help="runs per template, the fastest is reported and compared (default 3)")
+    parser.add_argument("-t", "--template", action="append", help="only benchmark this template (repeatable)")
+    parser.add_argument("-o", "--output", help="save the results as JSON to this file")
+    parser.add_argument("-b", "--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="allowed drop in problems/sec compared to the baseline, as a fraction (default 0.1)")
+    args = parser.parse_args(argv)
+
+    results = run(args.module, args.num_problems, args.template, args.repeat)
+    slower = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        slower = regressions(results, baseline, args.tolerance)
+        if slower:
+            # One slow measurement can be the machine being busy, so only report templates that are slow twice
+            again = run(args.module, args.num_problems, [name for (name, _, _) in slower], args.repeat)
+            for (name, r) in again["templates"].items():
+                if r["problems_per_sec"] > results["templates"][name]["problems_per_sec"]:
+                    results["templates"][name] = r
+            slower = regressions(results, baseline, args.tolerance)
+    report(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    for (name, old, new) in slower:
+        print(f"REGRESSION {name}: {new:.1f} problems/s, baseline {old:.1f} problems/s")
+    return 1 if slower else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
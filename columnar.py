@@ -0,0 +1,224 @@
+"""
+Columnar output for Printer rows, written next to the CSV when a Printer is created with columnar=True.
+
+With pyarrow installed the rows are written as a Parquet file with typed columns: Y/N flags are booleans, fields
+that repeat across problems (Concepts, Title, Author, License, ...) are dictionary encoded, and the Learnosity JSON
+is a nested column instead of a quoted string. Without pyarrow they are written as a zip of JSON columns with the
+same layout, which read_columns can load. Rows are written in groups as they come in, so a large bank isn't held in
+memory.
+"""
+import json
+import zipfile
+from array import array
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+
+BOOL_COLUMNS = ("Start New Sequence?", "Start New Atom?", "Quiz?")
+DICTIONARY_COLUMNS = ("Module URL", "Learning Objective Description", "Concepts", "Type", "Title", "Atom Type",
+                      "Author", "Source URL", "License")
+JSON_COLUMN = "Learnosity JSON"
+NUMBER_COLUMN = "Problem Number"
+
+
+class DictionaryColumn:
+    """A column of strings stored as indices into a list of the distinct values."""
+
+    def __init__(self):
+        self.dictionary = []
+        self.positions = {}
+        self.indices = array('i')
+
+    def append(self, value):
+        if value not in self.positions:
+            self.positions[value] = len(self.dictionary)
+            self.dictionary.append(value)
+        self.indices.append(self.positions[value])
+
+
+class ColumnarWriter:
+    """
+    Collects Printer rows column by column and writes them out every rows_per_group rows, so only one group of rows
+    is held in memory. Parquet files get one row group per group of rows, zip files one member per column per group.
+    :param path: the output path without an extension. .parquet or .columns.zip is added depending on the backend.
+    :param columns: the column names, in order (Printer.row.keys())
+    :param backend: "parquet", "zip", or None to use Parquet when pyarrow is installed
+    :param rows_per_group: how many rows are buffered before they're written
+
+    The Learnosity JSON column's Parquet type comes from the first group's blobs (strings if they don't share a nested
+    type). A later group whose blobs don't fit that type raises a ValueError; use a larger rows_per_group or the zip
+    backend for banks that mix very different blobs.
+    """
+
+    def __init__(self, path, columns, backend=None, rows_per_group=10000):
+        if backend is None:
+            backend = "parquet" if pa else "zip"
+        if backend == "parquet" and not pa:
+            raise ImportError("pyarrow is needed to write Parquet files.")
+        self.backend = backend
+        self.path = path.with_name(path.name + (".parquet" if backend == "parquet" else ".columns.zip"))
+        self.columns = list(columns)
+        self.rows_per_group = rows_per_group
+        self.groups = 0
+        self._file = None
+        self._new_group()
+
+    def _new_group(self):
+        self.numbers = array('i')
+        self.data = {}
+        for name in self.columns:
+            if name in BOOL_COLUMNS:
+                self.data[name] = array('b')
+            elif name in DICTIONARY_COLUMNS:
+                self.data[name] = DictionaryColumn()
+            else:
+                self.data[name] = []
+
+    def write_row(self, problem_number, row):
+        self.numbers.append(problem_number)
+        for name in self.columns:
+            value = row[name]
+            if name in BOOL_COLUMNS:
+                self.data[name].append(value == "Y")
+            elif name in DICTIONARY_COLUMNS:
+                self.data[name].append(value or "")
+            else:
+                self.data[name].append(value if value else None)
+        if len(self.numbers) >= self.rows_per_group:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered rows as a group. An empty group is only written if nothing has been written yet."""
+        if not self.numbers and self.groups:
+            return
+        if self.backend == "parquet":
+            self._write_parquet_group()
+        else:
+            self._write_zip_group()
+        self.groups += 1
+        self._new_group()
+
+    def close(self):
+        if self._file is None and self.groups:
+            return
+        try:
+            self.flush()
+            if self.backend == "zip":
+                self._file.writestr("schema.json", json.dumps(self._zip_schema()))
+        finally:
+            self._file.close()
+            self._file = None
+
+    def _write_parquet_group(self):
+        arrays = {NUMBER_COLUMN: pa.array(self.numbers, pa.int32())}
+        for name in self.columns:
+            column = self.data[name]
+            if name in BOOL_COLUMNS:
+                arrays[name] = pa.array([bool(v) for v in column], pa.bool_())
+            elif name in DICTIONARY_COLUMNS:
+                arrays[name] = pa.DictionaryArray.from_arrays(pa.array(column.indices, pa.int32()),
+                                                              pa.array(column.dictionary, pa.string()))
+            elif name == JSON_COLUMN:
+                json_type = self._file.schema.field(name).type if self._file else None
+                arrays[name] = _nested_json_array(column, json_type, self.groups * self.rows_per_group + 1)
+            else:
+                arrays[name] = pa.array(column, pa.string())
+        table = pa.table(arrays)
+        if self._file is None:
+            self._file = pq.ParquetWriter(self.path, table.schema)
+        self._file.write_table(table)
+
+    def _zip_schema(self):
+        schema = [{"name": NUMBER_COLUMN, "type": "int32"}]
+        for name in self.columns:
+            if name in BOOL_COLUMNS:
+                schema.append({"name": name, "type": "bool"})
+            elif name in DICTIONARY_COLUMNS:
+                schema.append({"name": name, "type": "dictionary"})
+            elif name == JSON_COLUMN:
+                schema.append({"name": name, "type": "json"})
+            else:
+                schema.append({"name": name, "type": "string"})
+        return {"columns": schema, "groups": self.groups}
+
+    def _write_zip_group(self):
+        if self._file is None:
+            self._file = zipfile.ZipFile(self.path, 'w', zipfile.ZIP_DEFLATED)
+        group = self.groups
+        self._file.writestr(f"{NUMBER_COLUMN}.{group}.json", json.dumps(self.numbers.tolist()))
+        for name in self.columns:
+            column = self.data[name]
+            if name in BOOL_COLUMNS:
+                content = [bool(v) for v in column]
+            elif name in DICTIONARY_COLUMNS:
+                content = {"dictionary": column.dictionary, "indices": column.indices.tolist()}
+            elif name == JSON_COLUMN:
+                content = [json.loads(v) if v else None for v in column]
+            else:
+                content = column
+            self._file.writestr(f"{name}.{group}.json", json.dumps(content))
+
+
+def _nested_json_array(column, json_type=None, first_row=1):
+    """
+    The JSON strings as a nested Arrow column, or as strings if the blobs are too different to share a type (or if
+    the type has an empty struct, which Parquet can't store). json_type is the type of the groups already written.
+    """
+    if json_type is not None and pa.types.is_string(json_type):
+        return pa.array(column, pa.string())
+    try:
+        nested = pa.array([json.loads(v) if v else None for v in column])
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        nested = None
+    if json_type is None:
+        if nested is None or _has_empty_struct(nested.type):
+            return pa.array(column, pa.string())
+        return nested
+    if nested is None or not _fits(nested.type, json_type):
+        raise ValueError(f"The Learnosity JSON from row {first_row} on doesn't fit the nested type of the rows before "
+                         "it. Use a larger rows_per_group or the zip backend.")
+    return nested.cast(json_type)
+
+
+def _has_empty_struct(data_type):
+    if pa.types.is_struct(data_type):
+        return data_type.num_fields == 0 or any(_has_empty_struct(f.type) for f in data_type)
+    if pa.types.is_list(data_type) or pa.types.is_large_list(data_type):
+        return _has_empty_struct(data_type.value_type)
+    return False
+
+
+def _fits(data_type, target):
+    """Whether an array of data_type casts to target without losing anything."""
+    if pa.types.is_null(data_type) or data_type == target:
+        return True
+    if pa.types.is_struct(data_type) and pa.types.is_struct(target):
+        fields = {f.name: f.type for f in target}
+        return all(_fits(f.type, fields[f.name]) if f.name in fields else pa.types.is_null(f.type) for f in data_type)
+    if pa.types.is_list(data_type) and pa.types.is_list(target):
+        return _fits(data_type.value_type, target.value_type)
+    return False
+
+
+def read_columns(path):
+    """
+    Loads a file written by ColumnarWriter. Parquet files are returned as a pyarrow Table, zip files as a dict
+    mapping each column name to a list of values (dictionary encoded columns are decoded).
+    """
+    if str(path).endswith(".parquet"):
+        return pq.read_table(path)
+    columns = {}
+    with zipfile.ZipFile(path) as z:
+        schema = json.loads(z.read("schema.json"))
+        for column in schema["columns"]:
+            values = columns[column["name"]] = []
+            for group in range(schema["groups"]):
+                content = json.loads(z.read(f"{column['name']}.{group}.json"))
+                if column["type"] == "dictionary":
+                    content = [content["dictionary"][i] for i in content["indices"]]
+                values.extend(content)
+    return columns
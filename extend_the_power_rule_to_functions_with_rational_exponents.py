@@ -1,3 +1,4 @@
+import math
 import random
 import sympy as sym
 import tools
@@ -6,30 +7,40 @@ import validations
 import os
 import sys
 
+# Both templates check the answer with equivSymbolic. The parts of the blob that don't change are serialised once.
+ANSWER_BLOB = validations.LeaBlob(validation="equivSymbolic")
+
+
 class Template1(Template):
     """Template for generating problems of the form ax^{n} where n is rational and a is a non-zero integer"""
+    domains = {
+        'a': tools.non_zero_range(-10, 10),
+        'num': tools.non_zero_range(-10, 10),
+        'denom': tools.non_zero_range(2, 10),
+    }
+    constraints = [
+        lambda a: a != 1,  # assures a non-trivial coefficient
+        lambda num, denom: num % denom != 0,  # prevents an integer exponent
+        lambda num, denom: math.gcd(num, denom) == 1,  # each exponent is drawn once, in lowest terms
+    ]
+
     @unique
     def variables(self):
-        # Define any variables you need here. The @unique decorator will ensure your variables are unique
-        a = tools.non_zero_select(-10, 10)
-        num = tools.non_zero_select(-10, 10)
-        denom = tools.non_zero_select(2, 10)
-        n = sym.Rational(num, denom)
-
-        assert a != 1  # assures a non-trivial coefficient
-        assert num % denom != 0  # prevents an integer exponent
+        # Every sample satisfies the constraints above. The @unique decorator will ensure your variables are unique
+        v = self.sample()
+        a = v['a']
+        n = sym.Rational(v['num'], v['denom'])
 
         return a, n
 
     def template(self):
-        x = sym.symbols('x')
         a, n = self.variables()
 
-        f = a * x ** n
-        df = sym.diff(f)
+        f = tools.Term(a, n)  # a * x ** n, differentiated with the power rule without going through sympy
+        df = f.derivative()
 
-        df_string = tools.polytex(df)  # You can use sym.polytex or tools.latex to get the LaTeX for a sympy expression.
-        f_string = tools.polytex(f)
+        df_string = df.latex()  # The same string tools.polytex(sym.diff(a * x ** n)) gives.
+        f_string = f.latex()
 
         question_stem = f"Find $_\\displaystyle \\frac{{d}}{{dx}} \\left({f_string}\\right)$_. "
 
@@ -62,9 +73,7 @@ class Template1(Template):
         correct_answer = f"\\frac{{d}}{{dx}}\\left({f_string}\\right)={df_string} "
         question_template = f"\\frac{{d}}{{dx}}\\left({f_string}\\right)={{{{response}}}}"
 
-        json_blob = validations.lea_blob(template=question_template,
-                                         response=correct_answer,
-                                         validation="equivSymbolic")
+        json_blob = ANSWER_BLOB(template=question_template, response=correct_answer)
 
         return Problem(concepts="Find the derivative of a monomial function with negative exponents",
                        question_stem=question_stem,
@@ -76,20 +85,39 @@ class Template1(Template):
 class Template2(Template):
     """Template for generating problems of the type ax^m + bx^n + c where one (or both)
     of n, m is a negative fraction."""
+    domains = {
+        'a': tools.non_zero_range(-10, 10),
+        'b': range(-9, 10),
+        'c': range(-9, 10),
+        'm_num': tools.non_zero_range(-9, 9),
+        'm_denom': range(2, 10),
+        'n_num': tools.non_zero_range(-9, 9),
+        'n_denom': range(2, 10),
+    }
+    constraints = [
+        lambda a: a != 1,  # assures a non-trivial coefficient
+        lambda b: b != 1,
+        lambda c: c != 1,
+        lambda b, c: (b != 0) | (c != 0),  # b and c cannot both be 0
+        # this ensures terms should not have been combined
+        lambda m_num, m_denom, n_num, n_denom: m_num * n_denom != n_num * m_denom,
+        # only one exponent if any can be an integer
+        lambda m_num, m_denom, n_num, n_denom: not (m_num % m_denom == 0 and n_num % n_denom == 0),
+        lambda m_num, n_num: (m_num < 0) | (n_num < 0),  # at least one exponent is negative
+        # ensures a negative fractional exponent
+        lambda m_num, m_denom, n_num: m_num < 0 if m_num % m_denom != 0 else n_num < 0,
+        # each exponent is drawn once: fractions in lowest terms and integers over 2
+        lambda m_num, m_denom: math.gcd(m_num, m_denom) == 1 or (m_num % m_denom == 0 and m_denom == 2),
+        lambda n_num, n_denom: math.gcd(n_num, n_denom) == 1 or (n_num % n_denom == 0 and n_denom == 2),
+    ]
+
     @unique
     def variables(self):
-        # Define any variables you need here. The @unique decorator will ensure your variables are unique
-        a = tools.non_zero_select(-10, 10)
-        b = random.randint(-9, 9)
-        c = random.randint(-9, 9)
-
-        m_num = tools.non_zero_select(-9, 9)
-        m_denom = random.randint(2, 9)
-        m = sym.Rational(m_num, m_denom)
-
-        n_num = tools.non_zero_select(-9, 9)
-        n_denom = random.randint(2, 9)
-        n = sym.Rational(n_num, n_denom)
+        # Every sample satisfies the constraints above. The @unique decorator will ensure your variables are unique
+        v = self.sample()
+        a, b, c = v['a'], v['b'], v['c']
+        m = sym.Rational(v['m_num'], v['m_denom'])
+        n = sym.Rational(v['n_num'], v['n_denom'])
 
         a_sign, b_sign, c_sign = "+", "+", "+"
         if a < 0:
@@ -99,45 +127,34 @@ class Template2(Template):
         if c < 0:
             c_sign = "-"
 
-        assert a != 1  # assures a non-trivial coefficient
-        assert b != 1
-        assert c != 1
-        assert not (b == 0 and c == 0)  # b and c cannot both be 0
-        assert not n == m  # this ensures terms should not have been combined
-        assert not (m_num % m_denom == 0 and n_num % n_denom == 0)  # only one exponent if any can be an integer
-        assert not (m_num > 0 and n_num > 0)  # at least one exponent is negative
-        if m_num % m_denom != 0:  # ensures a negative fractional exponent
-            assert m_num < 0
-        else:
-            assert n_num < 0
-
         return a, b, c, m, n, a_sign, b_sign, c_sign
 
     def template(self):
-        x = sym.symbols('x')  # A sympy variable.
         a, b, c, m, n, a_sign, b_sign, c_sign = self.variables()  # Call the variables here.
 
-        # These variables declared in order to track throughout, get signs right, and preserve ordering
-        a_term = a * x ** n
-        df_a = sym.diff(a_term)
-        b_term = b * x ** m
-        df_b = sym.diff(b_term)
-        b_abs_term_string = tools.polytex(abs(b) * x ** m)
+        # These variables declared in order to track throughout, get signs right, and preserve ordering.
+        # The terms are tools.Terms, so derivatives and LaTeX come from the power rule without going through sympy.
+        a_term = tools.Term(a, n)
+        df_a = a_term.derivative()
+        b_term = tools.Term(b, m)
+        df_b = b_term.derivative()
+        a_term_string = a_term.latex()
+        b_abs_term_string = abs(b_term).latex()
         c_abs_term_string = tools.polytex(abs(c))
 
         # Build the function string, accounting for missing terms
-        f_string = tools.polytex(a_term) + tools.polytex(b_sign) + b_abs_term_string + tools.polytex(c_sign) + c_abs_term_string
+        f_string = a_term_string + tools.polytex(b_sign) + b_abs_term_string + tools.polytex(c_sign) + c_abs_term_string
         if b == 0:
-            f_string = tools.polytex(a_term) + tools.polytex(c_sign) + c_abs_term_string
+            f_string = a_term_string + tools.polytex(c_sign) + c_abs_term_string
         elif c == 0:
-            f_string = tools.polytex(a_term) + tools.polytex(b_sign) + b_abs_term_string
+            f_string = a_term_string + tools.polytex(b_sign) + b_abs_term_string
 
         # Build the answer string, accounting for the b term possibly being 0
-        ans_string = tools.polytex(df_a)
+        ans_string = df_a.latex()
         if b != 0:
             if (b * m) > 0:
                 ans_string += "+"
-            ans_string += tools.polytex(df_b)
+            ans_string += df_b.latex()
 
         # This should contain your question string.
         question_stem = f"Find $_\\displaystyle \\frac{{d}}{{dx}} \\left({f_string}\\right)$_. "
@@ -162,7 +179,7 @@ class Template2(Template):
                        f"$$\\begin{{align}}" \
                        f"f(x) &= {f_string} \\\\[5pt] " \
                        f"\\frac{{d}}{{dx}}f(x) &= \\frac{{d}}{{dx}}\\left({f_string}\\right) \\\\[5pt] " \
-                       f"&= \\frac{{d}}{{dx}}\\left({tools.polytex(a_term)}\\right)"
+                       f"&= \\frac{{d}}{{dx}}\\left({a_term_string}\\right)"
 
         if b != 0:  # if b is zero don't include this term
             if b > 0:
@@ -182,10 +199,10 @@ class Template2(Template):
                        f"<p>Applying the constant rule to take the constants outside of the derivatives and using the" \
                        f" fact that the derivative of a constant is zero, we have" \
                        f"$$\\begin{{align}}" \
-                       f"f'(x) &= {a}\\frac{{d}}{{dx}}\\left({tools.polytex(x ** n)}\\right)"
+                       f"f'(x) &= {a}\\frac{{d}}{{dx}}\\left({tools.power_latex(n)}\\right)"
 
         if b != 0:  # if b is zero don't include this term
-            explanation += f"{b_sign}{abs(b)}\\frac{{d}}{{dx}}\\left({tools.polytex(x ** m)}\\right)"
+            explanation += f"{b_sign}{abs(b)}\\frac{{d}}{{dx}}\\left({tools.power_latex(m)}\\right)"
         if c != 0:  # if c is zero don't include this term
             explanation += f"{c_sign}0"
 
@@ -220,9 +237,7 @@ class Template2(Template):
         # You can leave this blank
         question_template = f"\\frac{{d}}{{dx}}\\left({f_string}\\right)={{{{response}}}}"
 
-        json_blob = validations.lea_blob(template=question_template,
-                                         response=correct_answer,
-                                         validation="equivSymbolic")
+        json_blob = ANSWER_BLOB(template=question_template, response=correct_answer)
 
         return Problem(concepts="Find the derivative of a function with negative exponents",
                        question_stem=question_stem,
@@ -237,4 +252,4 @@ if __name__ == '__main__':
     adaptive_printer = Printer("Extend the power rule to functions with rational exponents")
 
     Templates = [Template1, Template2]
-    adaptive_printer.print_all(*[Template().take(20) for Template in Templates])
+    adaptive_printer.print_all(*[(Template(), 20) for Template in Templates])
@@ -0,0 +1,227 @@
+"""
+Opt-in timing and counter events from the hot paths of problem generation.
+
+When enabled, these emit events:
+- Template.problem (so also Template.__call__, take and print_all): "template", timed per template class
+- @unique: "unique.retries", the failed assertions and duplicate draws before each accepted value
+- polytex and sympy.diff: "polytex" and "sympy.diff"
+- LeaBlob/ClozeBlob (so also lea_blob and cloze_blob): "lea_blob" and "cloze_blob"
+- Printer.print_problems: "print_problems", and "printer.bytes_written" for each file
+- ProblemCache: "problem_cache.hits" and "problem_cache.misses"
+
+Events go to one or more sinks:
+
+    with instrumentation.enabled(AggregateSink()) as sink:
+        printer.print_all((Template1(), 200), (Template2(), 200))
+    print(sink.report())
+
+AggregateSink keeps totals in memory, JSONLinesSink writes every event to a file, and ProfileSink runs cProfile for
+as long as it is enabled. While nothing is enabled, each instrumented call costs one check of the active flag.
+"""
+import functools
+import json
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+active = False
+_sinks = []
+_originals = {}
+
+
+class Sink:
+    """The interface of a sink. Every method does nothing unless overridden."""
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def timing(self, name, seconds, fields):
+        pass
+
+    def count(self, name, value, fields):
+        pass
+
+
+def _label(name, fields):
+    return ' '.join([name] + [str(value) for value in fields.values()])
+
+
+class AggregateSink(Sink):
+    """Totals of every timing and counter, kept in memory. Events with different fields are kept apart."""
+
+    def __init__(self):
+        self.timings = defaultdict(lambda: [0, 0.0, float('inf'), 0.0])  # calls, total, min, max
+        self.counters = defaultdict(lambda: [0, 0])  # events, total
+
+    def timing(self, name, seconds, fields):
+        t = self.timings[_label(name, fields)]
+        t[0] += 1
+        t[1] += seconds
+        t[2] = min(t[2], seconds)
+        t[3] = max(t[3], seconds)
+
+    def count(self, name, value, fields):
+        c = self.counters[_label(name, fields)]
+        c[0] += 1
+        c[1] += value
+
+    def summary(self):
+        """The totals as a dict that can be serialised to JSON."""
+        return {
+            "timings": {label: {"calls": calls, "seconds": total, "min": low, "max": high}
+                        for (label, (calls, total, low, high)) in self.timings.items()},
+            "counters": {label: {"events": events, "total": total}
+                         for (label, (events, total)) in self.counters.items()},
+        }
+
+    def report(self):
+        """The totals as a table, slowest first."""
+        lines = [f"{'timing':<40}{'calls':>10}{'seconds':>12}{'mean ms':>10}{'max ms':>10}"]
+        for (label, (calls, total, _, high)) in sorted(self.timings.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{label:<40}{calls:>10}{total:>12.4f}{1000 * total / calls:>10.3f}{1000 * high:>10.3f}")
+        if self.counters:
+            lines.append(f"{'counter':<40}{'events':>10}{'total':>12}{'mean':>10}")
+            for (label, (events, total)) in sorted(self.counters.items()):
+                lines.append(f"{label:<40}{events:>10}{total:>12}{total / events:>10.3f}")
+        return '\n'.join(lines)
+
+
+class JSONLinesSink(Sink):
+    """
+    Writes every event as a line of JSON, e.g. {"event": "timing", "name": "polytex", "seconds": 0.0001}
+    :param file: a path, or a file object to write to (it isn't closed)
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self._owned = isinstance(file, str) or hasattr(file, '__fspath__')
+        self._f = None
+
+    def start(self):
+        self._f = open(self.file, 'a') if self._owned else self.file
+
+    def stop(self):
+        if self._owned:
+            self._f.close()
+        else:
+            self._f.flush()
+        self._f = None
+
+    def timing(self, name, seconds, fields):
+        self._f.write(json.dumps(dict(fields, event="timing", name=name, seconds=seconds)) + '\n')
+
+    def count(self, name, value, fields):
+        self._f.write(json.dumps(dict(fields, event="count", name=name, value=value)) + '\n')
+
+
+class ProfileSink(Sink):
+    """
+    Runs cProfile while it is enabled, for a full call graph down into sympy. stats() gives a pstats.Stats.
+    :param path: also save the stats to this file when stopped (open it with pstats or snakeviz)
+    """
+
+    def __init__(self, path=None):
+        import cProfile
+        self.profile = cProfile.Profile()
+        self.path = path
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        if self.path:
+            self.profile.dump_stats(self.path)
+
+    def stats(self, sort='cumulative'):
+        import pstats
+        return pstats.Stats(self.profile).sort_stats(sort)
+
+
+def timing(name, seconds, **fields):
+    for sink in _sinks:
+        sink.timing(name, seconds, fields)
+
+
+def count(name, value=1, **fields):
+    """Adds value to the counter name. Call sites check instrumentation.active first, so this is only called then."""
+    for sink in _sinks:
+        sink.count(name, value, fields)
+
+
+@contextmanager
+def timer(name, **fields):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing(name, time.perf_counter() - start, **fields)
+
+
+def timed(name):
+    """Decorator that emits a timing event for every call while instrumentation is enabled."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not active:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timing(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def patch_sympy():
+    """
+    Times sympy.diff. It's replaced only while enabled, so sympy's own code isn't slowed down otherwise.
+    sympy_tools calls this when it's imported, in case sympy is first imported while enabled.
+    """
+    sym = sys.modules.get('sympy')
+    if sym is None or 'sympy.diff' in _originals:
+        return
+    _originals['sympy.diff'] = sym.diff
+    sym.diff = timed("sympy.diff")(sym.diff)
+
+
+def _unpatch_sympy():
+    if 'sympy.diff' in _originals:
+        sys.modules['sympy'].diff = _originals.pop('sympy.diff')
+
+
+def enable(*sinks):
+    """Starts sending events to sinks (in addition to any already enabled)."""
+    global active
+    for sink in sinks:
+        sink.start()
+        _sinks.append(sink)
+    active = bool(_sinks)
+    if active:
+        patch_sympy()
+
+
+def disable(*sinks):
+    """Stops sending events to sinks, or to every sink if none are given."""
+    global active
+    for sink in (sinks or list(_sinks)):
+        _sinks.remove(sink)
+        sink.stop()
+    active = bool(_sinks)
+    if not active:
+        _unpatch_sympy()
+
+
+@contextmanager
+def enabled(*sinks):
+    """Enables sinks for the duration of a with block. Gives the first sink (or None)."""
+    enable(*sinks)
+    try:
+        yield sinks[0] if sinks else None
+    finally:
+        disable(*sinks)
@@ -0,0 +1,191 @@
+"""
+Polynomial long division and synthetic division on lists of Fraction coefficients, highest degree first (the order
+sympy's Poly.all_coeffs() uses). Nothing here needs sympy.
+
+divide() makes one pass that gives the quotient, the remainder and every intermediate row, and long_division_latex
+prints it as the same LaTeX array tools.poly_long_div has always given.
+"""
+from collections import namedtuple
+
+from terms import to_fraction, rational_latex
+
+Division = namedtuple('Division', 'quotient remainder steps')
+# One row pair of the long division. subtracted: the coefficients of (quotient term) * divisor, from degree
+# degree down. remainder: the coefficients of what's left after subtracting it, highest degree first ([] for zero).
+Step = namedtuple('Step', 'degree subtracted remainder')
+
+
+def coefficients(values):
+    """values as Fractions, without leading zeros. The zero polynomial is []."""
+    coeffs = [to_fraction(value) for value in values]
+    start = 0
+    while start < len(coeffs) and coeffs[start] == 0:
+        start += 1
+    return coeffs[start:]
+
+
+def divide(dividend, divisor):
+    """
+    Divides dividend by divisor, both given as coefficients highest degree first.
+    Returns Division(quotient, remainder, steps), where dividend == divisor * quotient + remainder.
+    """
+    divisor = coefficients(divisor)
+    if not divisor:
+        raise ZeroDivisionError("polynomial division by zero")
+    r = coefficients(dividend)
+    divisor_degree = len(divisor) - 1
+    quotient = [to_fraction(0)] * max(0, len(r) - divisor_degree)
+    steps = []
+    while r and len(r) - 1 >= divisor_degree:
+        degree = len(r) - 1
+        t = r[0] / divisor[0]
+        quotient[len(quotient) - 1 - (degree - divisor_degree)] = t
+        subtracted = [t * c for c in divisor]
+        # The leading term cancels, only the next divisor_degree coefficients change
+        r = [a - b for (a, b) in zip(r[1:], subtracted[1:])] + r[len(divisor):]
+        r = coefficients(r)
+        steps.append(Step(degree, subtracted, r))
+    return Division(coefficients(quotient), r, steps)
+
+
+def synthetic_division(dividend, root):
+    """
+    Divides dividend by (x - root) with synthetic division.
+    Returns (quotient, remainder, products), where products are the numbers written in the middle row.
+    """
+    root = to_fraction(root)
+    coeffs = [to_fraction(c) for c in dividend]
+    if not coeffs:
+        return [], to_fraction(0), []
+    bottom = [coeffs[0]]
+    products = []
+    for c in coeffs[1:]:
+        products.append(bottom[-1] * root)
+        bottom.append(c + products[-1])
+    return bottom[:-1], bottom[-1], products
+
+
+def synthetic_division_latex(dividend, root):
+    """LaTeX for the synthetic division of dividend by (x - root), as the usual three row array."""
+    coeffs = [to_fraction(c) for c in dividend]
+    quotient, remainder, products = synthetic_division(coeffs, root)
+    columns = len(coeffs)
+    top = [rational_latex(root)] + [rational_latex(c) for c in coeffs]
+    middle = ['', ''] + [rational_latex(p) for p in products]
+    bottom = [''] + [rational_latex(c) for c in quotient] + [f"\\boxed{{{rational_latex(remainder)}}}"]
+    return (f"\\begin{{array}}{{r|{'r' * columns}}} "
+            f"{' & '.join(top)} \\\\ {' & '.join(middle)} \\\\ \\hline "
+            f"{' & '.join(bottom)} \\end{{array}}")
+
+
+class _Monomials:
+    """LaTeX for x^k, computed once per degree."""
+
+    def __init__(self, variable):
+        self.variable = variable
+        self.cache = {0: '1', 1: variable}
+
+    def __getitem__(self, degree):
+        if degree not in self.cache:
+            self.cache[degree] = f"{self.variable}^{{{degree}}}"
+        return self.cache[degree]
+
+
+def _leading_sign(c):
+    # pmsign(c, leading=True)
+    if abs(c) == 1:
+        return "" if c > 0 else "-"
+    return rational_latex(c)
+
+
+def _constant_sign(c):
+    # constant_sign(c)
+    return " + " + rational_latex(c) if c >= 0 else rational_latex(c)
+
+
+def _slice(terms, monomials, first_n_terms=None, ghost_terms=True, underline=False):
+    """poly_slicer for a list of (degree, coefficient) pairs, highest degree first."""
+    first_n_terms = len(terms) if (first_n_terms is None or first_n_terms > len(terms)) else first_n_terms
+    (degree, c) = terms[0]
+    parts = []
+    if underline:
+        parts.append(f"\\underline{{ \\left({_leading_sign(c)}{monomials[degree]}")
+    else:
+        parts.append(f"{_leading_sign(c)}{monomials[degree] if degree != 0 else ''}")
+    parts.extend(f"{_constant_sign(c)}{monomials[degree] if degree != 0 else ''}" for (degree, c) in
+                 terms[1:first_n_terms])
+    if underline:
+        parts.append(" \\right)}")
+    if ghost_terms:
+        parts.append(f"\\phantom{{ {'{{}}' if not underline else ''} ")
+        parts.extend(f"{_constant_sign(c)}{monomials[degree] if degree != 0 else ''}" for (degree, c) in
+                     terms[first_n_terms:])
+        parts.append(" }")
+    return ''.join(parts)
+
+
+def _all_terms(coeffs):
+    """(degree, coefficient) for every degree, like Poly.all_terms(). The zero polynomial is [(0, 0)]."""
+    if not coeffs:
+        return [(0, to_fraction(0))]
+    degree = len(coeffs) - 1
+    return [(degree - i, c) for (i, c) in enumerate(coeffs)]
+
+
+def _nonzero_terms(coeffs):
+    """Like Poly.terms()."""
+    return [term for term in _all_terms(coeffs) if term[1] != 0] or [(0, to_fraction(0))]
+
+
+def expression_latex(coeffs, variable='x', monomials=None):
+    """The polynomial as sym.latex prints it, e.g. "x^{2} - \\frac{3 x}{2} + 1"."""
+    monomials = monomials or _Monomials(variable)
+    terms = [term for term in _all_terms(coeffs) if term[1] != 0]
+    if not terms:
+        return "0"
+    if len(terms) == 1 and terms[0][0] == 0:
+        return rational_latex(terms[0][1])
+
+    def term_latex(degree, c):  # c > 0
+        if degree == 0:
+            return rational_latex(c)
+        numerator = monomials[degree] if c.numerator == 1 else f"{c.numerator} {monomials[degree]}"
+        return numerator if c.denominator == 1 else f"\\frac{{{numerator}}}{{{c.denominator}}}"
+
+    if len(terms) == 2 and terms[0][1] < 0 and terms[1][0] == 0 and terms[1][1] > 0:
+        # sympy prints a positive constant and a negative term as e.g. "7 - x" instead of "- x + 7"
+        terms.reverse()
+    (degree, c) = terms[0]
+    parts = [("- " if c < 0 else "") + term_latex(degree, abs(c))]
+    parts.extend((" - " if c < 0 else " + ") + term_latex(degree, abs(c)) for (degree, c) in terms[1:])
+    return ''.join(parts)
+
+
+def long_division_latex(dividend, divisor, variable='x'):
+    """
+    LaTeX for the long division of dividend by divisor (coefficients highest degree first), with the quotient on top
+    and a pair of rows (what's subtracted, what's left) for each step.
+    :param variable: LaTeX for the variable
+    """
+    dividend = coefficients(dividend)
+    divisor = coefficients(divisor)
+    monomials = _Monomials(variable)
+    division = divide(dividend, divisor)
+
+    rows = [f"\\require{{enclose}}"
+            f"\\begin{{array}}{{r}}"
+            f"{expression_latex(division.quotient, monomials=monomials)} \\\\[-3pt] "
+            f"{expression_latex(divisor, monomials=monomials)} "
+            f"\\enclose{{longdiv}}{{{_slice(_all_terms(dividend), monomials)}}}"]
+
+    term_length = len(divisor)
+    for step in division.steps:
+        # (quotient term) * divisor, with every lower degree down to 0 as zeros
+        subtracted = _all_terms(step.subtracted + [to_fraction(0)] * (step.degree - len(divisor) + 1))
+        rows.append(f"\\\\[-3pt] -{_slice(subtracted, monomials, first_n_terms=term_length, underline=True)}")
+        if not step.remainder or len(step.remainder) < len(divisor):
+            rows.append(f"\\\\[-3pt] {_slice(_nonzero_terms(step.remainder), monomials)}")
+        else:
+            rows.append(f"\\\\[-3pt] {_slice(_all_terms(step.remainder), monomials, first_n_terms=term_length)}")
+
+    return f"{''.join(rows)} \\end{{array}}"
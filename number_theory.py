@@ -0,0 +1,135 @@
+"""
+Integer helpers: gcd, lcm, factors and prime factorisation, without recursion or sympy.
+
+smallest_prime_factors keeps a sieve that grows as needed, so factoring many numbers (e.g. in a template's
+constraints or in random_pythagorean_triple) costs a few list lookups each instead of a trial division loop.
+"""
+import functools
+import math
+from operator import index as as_int
+
+
+def _integers(args):
+    """args as ints if they're all integers (ints, bools, sympy Integers, ...), else None."""
+    try:
+        return [as_int(arg) for arg in args]
+    except TypeError:
+        return None
+
+
+def _euclid(m, n):
+    """gcd of two non-negative numbers that aren't all ints, e.g. floats."""
+    while n:
+        m, n = n, m % n
+    return m
+
+
+def gcd(*args):
+    """
+    :param args: list of numbers
+    :return: greatest common divisor (greatest common factor) of the list of numbers
+    A single argument is returned as it is.
+    """
+    if len(args) == 1:
+        return args[0]
+    integers = _integers(args)
+    if integers is not None:
+        return math.gcd(*integers)
+    return functools.reduce(lambda m, n: _euclid(abs(m), abs(n)), reversed(args))
+
+
+def lcm(*args):
+    """
+    :param args: a list of numbers
+    :return: the least common multiple of the list of numbers
+    """
+    if len(args) == 1:
+        return abs(args[0])
+    integers = _integers(args)
+    if integers is not None:
+        return math.lcm(*integers)
+
+    def lcm2(m, n):
+        divisor = gcd(m, n)
+        return abs(m * n // divisor) if divisor else 0
+    return functools.reduce(lcm2, reversed(args))
+
+
+@functools.lru_cache(maxsize=4096)
+def _factors(n):
+    root = math.isqrt(n)
+    small = [d for d in divisors(n) if d * d < n]
+    pairs = [f for d in small for f in (d, n // d)]
+    if root * root == n:
+        pairs.append(root)
+    return tuple(pairs)
+
+
+def factors(n):
+    """
+    Lists the factors of n: each factor below sqrt(n) followed by its pair, smallest first, then sqrt(n) if n is a
+    perfect square. factors(12) gives [1, 12, 2, 6, 3, 4], factors(16) gives [1, 16, 2, 8, 4]
+    """
+    n = as_int(n)
+    if n < 0:
+        raise ValueError("factors needs a non-negative number.")
+    if n == 0:
+        return [0]
+    return list(_factors(n))
+
+
+_spf = [0, 1]  # smallest prime factor of each number below len(_spf)
+
+
+def smallest_prime_factors(limit):
+    """
+    The sieve of smallest prime factors of every number up to limit, as a list: spf[n] is the smallest prime that
+    divides n (spf[0] == 0, spf[1] == 1). The sieve is kept and only extended when a larger limit is asked for.
+    """
+    global _spf
+    if limit < len(_spf):
+        return _spf
+    size = max(limit + 1, 2 * len(_spf))
+    spf = list(range(size))
+    for p in range(2, math.isqrt(size - 1) + 1):
+        if spf[p] == p:
+            for multiple in range(p * p, size, p):
+                if spf[multiple] == multiple:
+                    spf[multiple] = p
+    _spf = spf
+    return spf
+
+
+SIEVE_LIMIT = 1 << 20  # larger numbers are factored by trial division instead of growing the sieve
+
+
+def prime_factors(n):
+    """The prime factorisation of n (a positive int) as a dict {prime: exponent}, smallest prime first."""
+    n = as_int(n)
+    if n < 1:
+        raise ValueError("prime_factors needs a positive number.")
+    result = {}
+    if n <= SIEVE_LIMIT:
+        spf = smallest_prime_factors(n)
+        while n > 1:
+            p = spf[n]
+            result[p] = result.get(p, 0) + 1
+            n //= p
+        return result
+    p = 2
+    while p * p <= n:
+        while n % p == 0:
+            result[p] = result.get(p, 0) + 1
+            n //= p
+        p += 1 if p == 2 else 2
+    if n > 1:
+        result[n] = result.get(n, 0) + 1
+    return result
+
+
+def divisors(n):
+    """Every positive divisor of n (a positive int), in increasing order."""
+    result = [1]
+    for (p, exponent) in prime_factors(n).items():
+        result = [d * p ** k for d in result for k in range(exponent + 1)]
+    return sorted(result)
@@ -0,0 +1,137 @@
+"""
+An on-disk cache of generated problems, so that re-running a generator script only runs template() for problems
+whose template changed.
+
+    cache = ProblemCache()
+    printer.print_all((Template1(), 20), (Template2(), 20), cache=cache)
+
+Each problem is stored under a hash of (module, Template class, hash of the class source, Template._seed, problem
+index). Editing a template class invalidates only that template's problems. Changes elsewhere (e.g. to tools) are
+not detected, so pass a new salt, or clear() the cache, when a shared helper's output changes.
+
+Only templates that declare domains are cached. Their variables come from self.sample(), so the index decides the
+problem. Templates that draw from the random module depend on everything drawn before them, and are never cached.
+"""
+import hashlib
+import inspect
+import json
+import os
+from pathlib import Path
+
+import instrumentation
+from tools import Problem, PROBLEM_FIELDS
+
+
+class ProblemCache:
+    """
+    :param directory: where the cached problems are stored
+    :param max_bytes: when the cache grows beyond this size, the least recently used problems are deleted
+    :param salt: any string. Changing it invalidates every cached problem.
+    """
+
+    def __init__(self, directory='.problem_cache', max_bytes=256 << 20, salt=''):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.salt = salt
+        self.hits = 0
+        self.misses = 0
+        self._source_hashes = {}
+        self._size = None
+
+    def __getstate__(self):
+        # Sent to worker processes. Each one measures the directory itself.
+        state = self.__dict__.copy()
+        state.update(_size=None, _source_hashes={}, hits=0, misses=0)
+        return state
+
+    def source_hash(self, template_class):
+        if template_class not in self._source_hashes:
+            try:
+                source = inspect.getsource(template_class)
+            except (OSError, TypeError):  # e.g. defined in an interactive session, so never cache it
+                source = None
+            self._source_hashes[template_class] = hashlib.sha256(source.encode()).hexdigest() if source else None
+        return self._source_hashes[template_class]
+
+    def path(self, template, index):
+        """The file for problem index of template, or None if it can't be cached (see above)."""
+        if type(template).domains is None:
+            return None
+        source_hash = self.source_hash(type(template))
+        if source_hash is None:
+            return None
+        key = json.dumps([self.salt, template._module, type(template).__qualname__, source_hash, template._seed,
+                          index])
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return self.directory / digest[:2] / f'{digest}.json'
+
+    def get(self, template, index):
+        """The cached problem, or None. Templates that can't be cached don't count as misses."""
+        path = self.path(template, index)
+        if path is None:
+            return None
+        try:
+            with path.open() as f:
+                fields = json.load(f)
+            os.utime(path)  # mark it as recently used
+        except (OSError, ValueError):
+            self.misses += 1
+            if instrumentation.active:
+                instrumentation.count("problem_cache.misses")
+            return None
+        self.hits += 1
+        if instrumentation.active:
+            instrumentation.count("problem_cache.hits")
+        return Problem(**fields)
+
+    def put(self, template, index, problem):
+        path = self.path(template, index)
+        if path is None or not isinstance(problem, Problem):
+            return
+        try:
+            data = json.dumps({name: getattr(problem, name) for name in PROBLEM_FIELDS})
+        except (TypeError, ValueError):
+            return  # a field that isn't JSON (e.g. a sympy number in answer_choices), so it isn't cached
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        temporary.write_text(data)
+        os.replace(temporary, path)  # so other processes never see a half written file
+
+        if self._size is None:
+            self._size = self.size()
+        else:
+            self._size += len(data)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _files(self):
+        return list(self.directory.glob('*/*.json'))
+
+    def size(self):
+        """The total size of the cached problems in bytes."""
+        return sum(path.stat().st_size for path in self._files())
+
+    def evict(self, target=None):
+        """Deletes the least recently used problems until the cache is below target bytes (90% of max_bytes)."""
+        target = self.max_bytes * 0.9 if target is None else target
+        entries = []
+        for path in self._files():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        size = sum(size for (_, size, _) in entries)
+        for (_, file_size, path) in entries:
+            if size <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            size -= file_size
+        self._size = size
+
+    def clear(self):
+        self.evict(target=0)
@@ -0,0 +1,154 @@
+"""
+An index of Pythagorean triples for sampling in O(1).
+
+    triples = pythagorean_triples(500).filter(primitive=True, min_leg=5)
+    a, b, c = triples.sample(rng=self.rng)
+
+The triples are generated once per (max_hyp, max_r) with Dickson's method: for every even r, and every factor s of
+r^2 / 2 with t = r^2 / (2s), (r + s, r + t, r + s + t) is a triple. Every triple (a, b, c) comes from exactly one
+(r, s), with r = a + b - c, so the index holds each ordered triple once. Both orders of the legs are included.
+"""
+import functools
+import json
+import math
+import random
+from pathlib import Path
+
+from number_theory import factors
+
+
+class AliasTable:
+    """Walker's alias method: draws index i with probability weights[i] / sum(weights), in O(1) per draw."""
+
+    def __init__(self, weights):
+        n = len(weights)
+        total = sum(weights)
+        scaled = [w * n / total for w in weights]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        small = [i for (i, p) in enumerate(scaled) if p < 1]
+        large = [i for (i, p) in enumerate(scaled) if p >= 1]
+        while small and large:
+            (i, j) = (small.pop(), large[-1])
+            self.prob[i] = scaled[i]
+            self.alias[i] = j
+            scaled[j] -= 1 - scaled[i]
+            if scaled[j] < 1:
+                small.append(large.pop())
+        # Whatever is left has probability 1 up to rounding
+
+    def draw(self, rng=random):
+        i = rng.randrange(len(self.prob))
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+
+class TripleIndex:
+    """
+    A list of Pythagorean triples (a, b, c) with weights for sampling.
+    :param triples: list of (a, b, c)
+    :param weights: the relative chance of drawing each triple, or None to draw them uniformly
+    """
+
+    def __init__(self, triples, weights=None):
+        self.triples = [tuple(triple) for triple in triples]
+        self.weights = list(weights) if weights is not None else None
+        if not self.triples:
+            raise ValueError("There are no triples to sample from.")
+        self._alias = AliasTable(self.weights) if self.weights is not None else None
+
+    def __len__(self):
+        return len(self.triples)
+
+    def __iter__(self):
+        return iter(self.triples)
+
+    def sample(self, rng=random, weighted=True):
+        """
+        A random triple, drawn using the weights if the index has them and weighted is True, else uniformly.
+        :param rng: the random number generator to use, e.g. a template's rng
+        """
+        if weighted and self._alias:
+            return self.triples[self._alias.draw(rng)]
+        return self.triples[rng.randrange(len(self.triples))]
+
+    def filter(self, primitive=False, min_leg=None, max_leg=None, min_hyp=None, max_hyp=None, ordered=False):
+        """
+        The triples that pass every filter, with the same relative weights.
+        :param primitive: only triples whose sides have no common factor
+        :param min_leg: both legs must be at least this
+        :param max_leg: both legs must be at most this
+        :param ordered: only triples with a < b (each triple once, instead of once per order of its legs)
+        """
+        def keep(a, b, c):
+            return ((not primitive or math.gcd(a, b) == 1)
+                    and (min_leg is None or min(a, b) >= min_leg)
+                    and (max_leg is None or max(a, b) <= max_leg)
+                    and (min_hyp is None or c >= min_hyp)
+                    and (max_hyp is None or c <= max_hyp)
+                    and (not ordered or a < b))
+
+        kept = [i for (i, triple) in enumerate(self.triples) if keep(*triple)]
+        weights = [self.weights[i] for i in kept] if self.weights is not None else None
+        return TripleIndex([self.triples[i] for i in kept], weights)
+
+    def save(self, path):
+        Path(path).write_text(json.dumps({"triples": self.triples, "weights": self.weights}))
+
+    @classmethod
+    def load(cls, path):
+        data = json.loads(Path(path).read_text())
+        return cls(data["triples"], data["weights"])
+
+
+def dickson_triples(max_hyp, max_r=None):
+    """
+    Every triple with hypotenuse at most max_hyp (and r at most max_r), in order of r and then of s as factors()
+    lists them. Each comes with its chance under "pick r uniformly, then s uniformly from the factors of r^2 / 2",
+    which is how random_pythagorean_triple has always drawn them.
+    """
+    triples, weights = [], []
+    r = 2
+    while max_r is None or r <= max_r:
+        rr = r * r // 2
+        if r + 2 * math.isqrt(rr) > max_hyp:  # s + t >= 2 sqrt(rr), so no larger r fits either
+            break
+        candidates = factors(rr)
+        for s in candidates:
+            t = rr // s
+            if r + s + t <= max_hyp:
+                triples.append((r + s, r + t, r + s + t))
+                weights.append(1 / len(candidates))
+        r += 2
+    return triples, weights
+
+
+@functools.lru_cache(maxsize=32)
+def _pythagorean_triples(max_hyp, max_r, cache_dir):
+    path = Path(cache_dir) / f'pythagorean_triples_{max_hyp}_{max_r}.json' if cache_dir else None
+    if path and path.exists():
+        return TripleIndex.load(path)
+    index = TripleIndex(*dickson_triples(max_hyp, max_r))
+    if path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        index.save(path)
+    return index
+
+
+def pythagorean_triples(max_hyp, max_r=None, cache_dir=None):
+    """
+    The TripleIndex of the triples with hypotenuse at most max_hyp, weighted as random_pythagorean_triple draws them.
+    Built once per process for each max_hyp and max_r.
+    :param max_r: only the triples Dickson's method gives for r up to this
+    :param cache_dir: also keep the index in this folder, so later processes load it instead of building it
+    """
+    return _pythagorean_triples(max_hyp, max_r, str(cache_dir) if cache_dir else None)
+
+
+def random_pythagorean_triple(max_hyp=1555, rng=random):
+    """
+    Generates a random Pythagorean triple (a, b, c) using Dickson's method
+    :param max_hyp: The maximum size of the hypotenuse
+    :param rng: the random number generator to use, e.g. a template's rng
+    :return: a, b, c where a^2 + b^2 = c^2
+    """
+    return pythagorean_triples(max_hyp, max_r=24).sample(rng)
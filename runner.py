@@ -0,0 +1,148 @@
+"""
+Builds many learning objectives in one process, from a manifest with one JSON entry per line:
+
+    {"module": "extend_the_power_rule_to_functions_with_rational_exponents", "count": 20}
+    {"module": "some_other_objective", "templates": ["Template2"], "counts": {"Template2": 50}, "mode": "algo"}
+
+    python runner.py manifest.jsonl --processes 4 --output-dir output
+
+Each entry can have:
+- module: the generator module (a name importable from the manifest's folder, or a path to a .py file)
+- learning_objective: the Printer's learning objective. By default it's the module name with spaces for underscores.
+- templates: the names of the Template classes to print, in order. By default every Template in the module.
+- count: problems per template (default 20), and counts: per template overrides
+- mode: "adaptive" (default), "algo", "quiz" or "formative"
+- printer: other Printer options, e.g. {"problems_per_page": 50}
+- output_dir: where to write this entry's files, instead of --output-dir
+
+Entries are built in a pool of worker processes. sympy is imported once before the pool starts, so on platforms
+that fork the workers share it instead of each importing it again. Each entry starts from a fresh problem numbering,
+so its output is the same as running the module as a script.
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import sys
+import time
+import traceback
+from pathlib import Path
+
+from tools import Printer, find_templates
+
+MODES = {"adaptive": {}, "algo": {"is_algo": True}, "quiz": {"is_quiz": True}, "formative": {"is_formative": True}}
+
+
+def load_manifest(path):
+    """The entries of a manifest. Blank lines and lines starting with # are skipped."""
+    entries = []
+    with open(path) as f:
+        for (line_number, line) in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            entry = json.loads(line)
+            if "module" not in entry:
+                raise ValueError(f"{path}:{line_number}: entry has no module.")
+            if entry.get("mode", "adaptive") not in MODES:
+                raise ValueError(f"{path}:{line_number}: unknown mode {entry['mode']!r}.")
+            entries.append(entry)
+    return entries
+
+
+def import_generator(module_name):
+    """Imports a generator module by name or by the path of its .py file. Modules are only imported once."""
+    if module_name.endswith('.py'):
+        path = Path(module_name).resolve()
+        if str(path.parent) not in sys.path:
+            sys.path.insert(0, str(path.parent))
+        module_name = path.stem
+    return importlib.import_module(module_name)
+
+
+def warm_up():
+    """Imports sympy and the helpers that use it, so the first problem of every entry doesn't pay for it."""
+    import sympy_tools
+    sympy_tools.polytex(sympy_tools.sym.Rational(1, 2) * sympy_tools.sym.symbols('x') ** 2)
+
+
+def build(entry, output_dir='output'):
+    """Prints one manifest entry. Returns a summary of what was written."""
+    start = time.perf_counter()
+    module = import_generator(entry["module"])
+    templates = {cls.__name__: cls for cls in find_templates(module)}
+    names = entry.get("templates") or list(templates)
+    unknown = [name for name in names if name not in templates]
+    if unknown:
+        raise ValueError(f"{module.__name__} has no templates named {', '.join(unknown)}.")
+
+    learning_objective = entry.get("learning_objective") or module.__name__.replace('_', ' ').capitalize()
+    options = dict(MODES[entry.get("mode", "adaptive")], **entry.get("printer", {}))
+    printer = Printer(learning_objective, output_dir=entry.get("output_dir", output_dir), **options)
+
+    counts = entry.get("counts", {})
+    instances = []
+    for name in names:
+        template = templates[name]()
+        template.restart()
+        instances.append((template, counts.get(name, entry.get("count", 20))))
+
+    random.seed(1)  # as the generator scripts do, for shuffling answer choices
+    printer.print_all(*instances)
+    return {
+        "module": module.__name__,
+        "problems": sum(n for (_, n) in instances),
+        "seconds": time.perf_counter() - start,
+        "csv": str(printer.file_path_csv),
+        "html": str(printer.file_path_html),
+    }
+
+
+def _build_or_fail(args):
+    """build for the pool: exceptions are returned as text, so one broken entry doesn't stop the others."""
+    (entry, output_dir) = args
+    try:
+        return build(entry, output_dir)
+    except Exception:
+        return {"module": entry["module"], "error": traceback.format_exc()}
+
+
+def run(entries, output_dir='output', processes=None):
+    """Builds every entry and yields the summaries in the order the entries finish."""
+    warm_up()
+    jobs = [(entry, output_dir) for entry in entries]
+    if processes == 1 or len(jobs) < 2:
+        yield from map(_build_or_fail, jobs)
+        return
+
+    import multiprocessing
+    with multiprocessing.Pool(processes, initializer=warm_up) as pool:
+        yield from pool.imap_unordered(_build_or_fail, jobs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the learning objectives listed in a manifest.")
+    parser.add_argument("manifest", help="JSON lines file with one entry per learning objective")
+    parser.add_argument("-p", "--processes", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("-o", "--output-dir", default="output", help="where to write the files (default: output)")
+    args = parser.parse_args(argv)
+
+    manifest = Path(args.manifest).resolve()
+    sys.path.insert(0, str(manifest.parent))
+    entries = load_manifest(manifest)
+
+    failed = 0
+    for summary in run(entries, os.path.abspath(args.output_dir), args.processes):
+        if "error" in summary:
+            failed += 1
+            print(f"FAILED {summary['module']}\n{summary['error']}")
+        else:
+            print(f"{summary['module']}: {summary['problems']} problems in {summary['seconds']:.1f}s -> "
+                  f"{summary['csv']}")
+    print(f"{len(entries) - failed} of {len(entries)} learning objectives built.")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,718 @@
+import functools
+from collections import OrderedDict, namedtuple
+import sympy as sym
+from sympy.core.function import _coeff_isneg
+from sympy.printing.latex import LatexPrinter
+from terms import Term
+from number_theory import factors
+from pythagorean import random_pythagorean_triple
+import long_division
+import instrumentation
+
+if instrumentation.active:
+    instrumentation.patch_sympy()
+
+
+def terms_string(*args, **kwargs):
+    """
+    returns a string representing the
+    list of terms added together with appropriate signs and _without simplifying_ in the given order
+    this replaces the need for lots of crazy string formatting, pmsign, etc. to get signs right
+    ex: terms_string(5, 3*x, -2, -x**2, -8*x) returns '5 + 3 x - 2 - x^{2} - 8 x'
+    note: this will not include 0 terms
+    """
+    return sym.latex(sym.Add(*args, evaluate=False), order='none', **kwargs)
+
+
+def constant_sign(x, leading=False):
+    """
+    Gives the string x with the appropriate sign in front
+    Useful for making strings involving adding a bunch of terms together
+    leading tells whether the constant is first, so shouldn't have a plus sign in that case
+    constant_sign(3) gives "+3"
+    constant_sign(3, True) gives "3"
+    constant_sign(-3) gives "-3"
+    constant_sign(sympify(1) / 2) gives "+ \frac{1}{2}"
+    etc.
+    """
+    if x >= 0 and not leading:
+        return " + %s" % sym.latex(x)
+    elif x >= 0 and leading:
+        return sym.latex(x)
+    elif x < 0:
+        return sym.latex(x)
+
+
+def terms_constants(*args):
+    """
+    Sum of a bunch of constants with appropriate signs, includes zeros
+    """
+    first_term = constant_sign(args[0], True)
+    other_terms = [constant_sign(arg) for arg in args[1:]]
+    return first_term + " ".join(other_terms)
+
+
+def multiply_terms(*args, left_parens=False, use_parens=True, multiplication_sign=" "):
+    """
+    returns the string with the args wrapped (if use_parens is True)
+    separated by multiplication_sign (default is just putting stuff next to each other)
+    """
+    if use_parens and left_parens:
+        wrapped_args = ["\\left ( %s \\right )" % sym.latex(arg) for arg in args]
+    elif use_parens:
+        wrapped_args = [sym.latex(args[0])] + ["\\left ( %s \\right )" % sym.latex(arg) for arg in args[1:]]
+    else:
+        wrapped_args = [sym.latex(arg) for arg in args]
+    return multiplication_sign.join(wrapped_args)
+
+
+def substitute_unsimplified(eval_point, poly, x=sym.symbols('x'), include_parentheses=True, order='lex', color=None,
+                            **kwargs):
+    """
+    Gives the string you would achieve by substituting eval_point into poly without simplifying it
+    :param eval_point: the value being substituted into poly
+    :param poly: a polynomial
+    :param x: the symbol being replaced
+    :param include_parentheses: whether to put parentheses around the argument being substituted
+    :param order: how the terms are ordered, 'lex' is default (which puts things from highest power to lowest)
+    other options are 'none' and 'old' but not sure how those work exactly
+    :return: a string of latex representing the substitution of eval_point into poly
+    """
+    return substitute_batch([eval_point], poly, x, include_parentheses, color, printer='latex', order=order,
+                            long_frac_ratio=sym.oo, **kwargs)[0]
+
+
+def substitute_unsimplified_multiple(eval_points, poly, poly_symbols=sym.symbols('x y'),
+                                     include_parentheses=True, order='lex', colors=None, **kwargs):
+    """
+    Similar to above but with multiple values
+    :param eval_points:
+    :param poly:
+    :param poly_symbols:
+    :param include_parentheses:
+    :param order:
+    :param colors: Should be a list containing the colors in the same order as the variables
+    :return:
+    """
+    return substitute_batch([tuple(eval_points)], poly, tuple(poly_symbols), include_parentheses, colors,
+                            printer='latex', order=order, long_frac_ratio=sym.oo, **kwargs)[0]
+
+
+def pmsign(x, leading=False):
+    """
+    Gives the string x with the appropriate sign in front
+    Useful for making strings involving adding a bunch of terms together
+    leading tells whether the constant is first, so shouldn't have a plus sign in that case
+    constant_sign(3 * x) gives "+3x"
+    constant_sign(3 * x ** 2, Leading=True) gives "3x^2"
+    constant_sign(-3) gives "-3"
+    constant_sign(x / 2) gives "+ \frac{x}{2}"
+    etc.
+    """
+    x = sympify_cached(x)
+    if leading:
+        if abs(x) == 1:
+            return "" if x > 0 else "-"
+        else:
+            return sym.latex(x)
+    if _coeff_isneg(x):
+        return "- %s" % (sym.latex(abs(x)) if x != -1 else "")
+    else:
+        return "+ %s" % (sym.latex(x) if x != 1 else "")
+
+
+def mono_coeff(monomial, x=sym.symbols('x')):
+    """Returns the leading coefficient of a monomial"""
+    return expression_info(monomial, x).coeff
+
+
+def mono_sgn(monomial, x=sym.symbols('x')):
+    """Returns the sign, of a monomial"""
+    return expression_info(monomial, x).sign
+
+
+def operator_expand_string(op, *args, x=sym.symbols('x'), end_op=None, parens=True,
+                           include_zeros=True, pull_out_const=False,
+                           pull_out_leading_negative=True,
+                           pull_out_zeroth_order_constants=False, **kwargs):
+    """
+    Use to apply an operator to a sum or difference of terms. For example
+    operator_expand_string('\\int ', x ** 2, 3x^{-2}, end_op=' \\, dx')
+    will give \\int \\left(x^2 + 3x^{-2} \\right) \\, dx
+    """
+    return operator_expand_strings([(op, end_op)], *args, x=x, parens=parens, include_zeros=include_zeros,
+                                   pull_out_const=pull_out_const, pull_out_leading_negative=pull_out_leading_negative,
+                                   pull_out_zeroth_order_constants=pull_out_zeroth_order_constants, **kwargs)[0]
+
+
+def operator_expand_strings(ops, *args, x=sym.symbols('x'), end_op=None, parens=True,
+                            include_zeros=True, pull_out_const=False,
+                            pull_out_leading_negative=True,
+                            pull_out_zeroth_order_constants=False, **kwargs):
+    """
+    operator_expand_string for several operators over the same terms. The terms are split and printed once, and
+    only the operators change, e.g.
+    operator_expand_strings(['\\frac{d}{dx}', ('\\int ', ' \\, dx'), '\\lim_{x \\to 2}'], x ** 2, 3 * x ** -2)
+    gives a list of the three expansions.
+    :param ops: list of operators, each an op or a tuple (op, end_op)
+    :param end_op: the end_op of the operators that don't have their own
+    """
+    left_paren = "\\left(" if parens else ""
+    right_paren = "\\right)" if parens else ""
+
+    parts = _operator_terms(args, x, include_zeros, pull_out_const, pull_out_leading_negative,
+                            pull_out_zeroth_order_constants, kwargs)
+    expanded = []
+    for op in ops:
+        (op, op_end) = op if isinstance(op, tuple) else (op, end_op)
+        op_end = op_end if op_end else ""
+        expanded.append(" ".join(f"{sign}{op}{left_paren}{inner}{right_paren}{op_end}" for (sign, inner) in parts))
+    return expanded
+
+
+def _operator_terms(args, x, include_zeros, pull_out_const, pull_out_leading_negative,
+                    pull_out_zeroth_order_constants, settings):
+    """
+    The part of operator_expand_string that doesn't depend on the operator: for each term, what goes in front of the
+    operator (the sign or the coefficient pulled out) and the LaTeX that goes inside it.
+    """
+    if not include_zeros:
+        args = [a for a in args if a != 0]
+
+    parts = []
+    for (i, arg) in enumerate(args):
+        info = expression_info(arg, x)
+        leading = i == 0
+        if pull_out_const:
+            if info.is_constant:
+                coeff = info.expr if pull_out_zeroth_order_constants else sym.S.One
+            else:
+                coeff = info.split[0]
+            coeff = sym.S.One if coeff == 0 else coeff
+            parts.append((pmsign(coeff, leading=leading), expression_info(info.expr / coeff, x).latex(**settings)))
+        elif leading and not pull_out_leading_negative:
+            parts.append(("", info.latex(**settings)))
+        else:
+            sign = info.sign
+            inner = info.latex(**settings) if sign == 1 else expression_info(-info.expr, x).latex(**settings)
+            parts.append((pmsign(sign, leading=leading), inner))
+    return parts
+
+
+def _collected_terms(poly, x):
+    """The terms c * x ** n of poly, with like powers of x collected, highest n first. n can be negative."""
+    collected = sym.collect(sym.expand(poly), x, evaluate=False)
+    powers = sorted(collected, key=lambda power: power.as_coeff_exponent(x)[1], reverse=True)
+    return [collected[power] * power for power in powers] or [sym.S.Zero]
+
+
+def operator_expand(op, poly, x=sym.symbols('x'), pull_out_const=False, **kwargs):
+    """
+    Use to apply an operator to a sum or difference of powers of x. For example
+    operator_expand('\\frac{d}{dx}', x ** 2 + 3x) will give \\frac{d}{dx}(x^2) + \\frac{d}{dx}(3x)
+    The powers can be negative or fractions, e.g. x ** -2 or x ** (sym.Rational(1, 3)).
+    The terms are printed with polytex, like operator_expand_string, rather than sym.latex as they used to be. So
+    there's no space before x (3x, not 3 x) and a rational coefficient is written in front (\\frac{5}{2}x, not
+    \\frac{5 x}{2}). Each term also keeps its own coefficient, so a float coefficient no longer turns the others
+    into floats as it did when the terms came from sym.Poly (2.5x + x^{4} used to give 1.0 x^{4}).
+
+    Use operator_expand_string instead.
+    """
+
+    term_list = [expression_info(term, x) for term in _collected_terms(poly, x)]
+
+    coeff_list = [term.split[0] if not term.is_constant else term.sign for term in term_list]
+    coeff_list = [1 if coeff == 0 else coeff for coeff in coeff_list]
+
+    def inside(expr):
+        return expression_info(expr, x).latex(**kwargs)
+
+    if pull_out_const:
+        expanded = [
+            f"{pmsign(coeff_list[0], leading=True)}{op} \\left( {inside(term_list[0].expr / coeff_list[0])} \\right)"]
+
+        expanded += [f"{pmsign(coeff)}{op} \\left( {inside(term.expr / coeff)} \\right)"
+                     for (coeff, term) in zip(coeff_list[1:], term_list[1:])]
+
+    else:
+        expanded = [f"{op} \\left( {term_list[0].latex(**kwargs)} \\right)" if coeff_list[0] > 0
+                    else f"-{op} \\left( {inside(-term_list[0].expr)} \\right)"]
+
+        expanded += [(f"+{op} \\left( {term.latex(**kwargs)} \\right)" if term.coeff > 0
+                      else f"-{op} \\left( {inside(-term.expr)} \\right)") for term in term_list[1:]]
+
+    return "".join(expanded)
+
+
+class MyLatexPrinter(LatexPrinter):
+    """
+    Print polynomials without some of the auto-formatting sym.latex gives.
+    Used for the polytex and add_terms functions below.
+    This modifies the built-in sympy LatexPrinter class by changing how Pow and Mul objects get printed.
+    """
+
+    def __init__(self, settings=None):
+        super().__init__(settings)
+        self._settings['fold_frac_powers'] = True
+
+    def _print_Pow(self, expr):
+        if expr.exp.is_Rational and expr.exp.q != 1 and self._settings['fold_frac_powers']:
+            base, p, q = self._print(expr.base), expr.exp.p, expr.exp.q
+            if '^' in base and expr.base.is_Symbol:
+                base = r"\left(%s\right)" % base
+            if expr.base.is_Function:
+                return self._print(expr.base, exp="%s/%s" % (p, q))
+            return r"%s^{%s/%s}" % (base, p, q)
+
+        tex = r"%s^{%s}"
+        exp = self._print(expr.exp)
+        base = self._print(expr.base)
+
+        return tex % (base, exp)
+
+    def _print_Mul(self, expr):
+        include_parens = False
+        if _coeff_isneg(expr):
+            expr = -expr
+            tex = "- "
+            if expr.is_Add:
+                tex += "("
+                include_parens = True
+        else:
+            tex = ""
+
+        if not expr.is_Mul:
+            return tex + self._print(expr)
+
+        for term in expr.args:
+            if abs(term) != 1:
+                if term.is_Add:
+                    tex += f"\\left({self._print(term)}\\right)"
+                else:
+                    tex += self._print(term)
+            elif term < 0:
+                tex += "-"
+
+        if include_parens:
+            tex += ")"
+        return tex
+
+
+def add_terms(*args, **kwargs):
+    """Like polytex but keeps the terms ordered. For example
+    add_terms(f = 2 * x ** (sym.sympify(1) / 4) - (sym.sympify(1) / 2) * x ** (sym.sympify(-2) / 3) - 4 + 3 * x ** 3)
+    gives 2x^{1/4} - \frac{1}{2}x^{-2/3} - 4 + 3x^{3}"""
+    return polytex(sym.Add(*args, evaluate=False), order='none', **kwargs)
+
+
+@instrumentation.timed("polytex")
+def polytex(expr, **kwargs):
+    """
+    Use to print a polynomial with none of the extra formatting that sym.latex() gives.
+    For example
+    polytex(f = 2 * x ** (sym.sympify(1) / 4) - (sym.sympify(1) / 2) * x ** (sym.sympify(-2) / 3) - 4 + 3 * x ** 3)
+    gives 2x^{1/4} + 3x^{3} - 4 - \frac{1}{2}x^{-2/3}
+
+    Results are memoised on the expression and settings, see latex_cache_info().
+    """
+    key = _settings_key(kwargs)
+    if key is not None:
+        try:
+            return _cached_polytex(type(expr), expr, key)
+        except TypeError:  # expr can't be hashed
+            pass
+    return latex_printer(**kwargs).doprint(expr)
+
+
+_latex_printers = {}
+
+
+def _settings_key(settings):
+    """A hashable key for a dict of printer settings, or None if one of the values can't be hashed."""
+    key = tuple(sorted(settings.items()))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def latex_printer(**settings):
+    """Returns a MyLatexPrinter with the given settings. Printers are created once per settings and reused."""
+    key = _settings_key(settings)
+    if key is None:
+        return MyLatexPrinter(settings)
+    if key not in _latex_printers:
+        _latex_printers[key] = MyLatexPrinter(settings)
+    return _latex_printers[key]
+
+
+@functools.lru_cache(maxsize=4096)
+def _cached_polytex(expr_type, expr, settings_key):
+    # expr_type is part of the key because e.g. 2 == 2.0 but they print differently
+    return latex_printer(**dict(settings_key)).doprint(expr)
+
+
+def derivative_latex(expr, x=sym.symbols('x'), **kwargs):
+    """
+    The same as polytex(sym.diff(expr, x)), but monomials c * x ** n with rational c and n are differentiated and
+    printed with the power rule directly. Anything else falls back to sympy.
+    """
+    term = Term.from_sympy(expr, x) if not kwargs and x.name == 'x' else None
+    if term is None:
+        return polytex(sym.diff(expr, x), **kwargs)
+    return term.derivative().latex()
+
+
+def latex_cache_info():
+    """Hit and miss statistics of the polytex/add_terms cache, as a functools cache_info tuple."""
+    return _cached_polytex.cache_info()
+
+
+def clear_latex_cache():
+    """Empties the polytex/add_terms cache and the printer pool."""
+    _cached_polytex.cache_clear()
+    _latex_printers.clear()
+
+
+@functools.lru_cache(maxsize=4096)
+def _sympify_string(text):
+    return sym.sympify(text)
+
+
+def sympify_cached(value):
+    """sym.sympify(value), with strings parsed once and then looked up."""
+    if isinstance(value, sym.Basic):
+        return value
+    if isinstance(value, str):
+        return _sympify_string(value)
+    return sym.sympify(value)
+
+
+class ExpressionInfo:
+    """
+    An expression and what the helpers derive from it about the variable x, each worked out the first time it's asked
+    for. Get these from expression_info rather than making them, so each expression has one.
+    """
+    __slots__ = ('expr', 'x', '_coeff', '_sign', '_degree', '_derivative', '_split', '_latex')
+
+    def __init__(self, expr, x):
+        self.expr = expr
+        self.x = x
+        self._coeff = self._sign = self._degree = self._derivative = self._split = None
+        self._latex = {}
+
+    @property
+    def coeff(self):
+        """The coefficient of a monomial: expr with x = 1 (mono_coeff)."""
+        if self._coeff is None:
+            self._coeff = self.expr.subs(self.x, 1)
+        return self._coeff
+
+    @property
+    def sign(self):
+        """-1 if expr prints with a leading minus sign, else 1 (mono_sgn)."""
+        if self._sign is None:
+            self._sign = -1 if _coeff_isneg(self.expr) else 1
+        return self._sign
+
+    @property
+    def degree(self):
+        """The power of x in a monomial c * x ** n, which can be any rational number."""
+        if self._degree is None:
+            self._degree = self.expr.as_coeff_exponent(self.x)[1]
+        return self._degree
+
+    @property
+    def is_constant(self):
+        return self.x not in self.expr.free_symbols
+
+    @property
+    def split(self):
+        """(coefficient, rest) with expr == coefficient * rest and only rest depending on x, e.g. (-3, x**(-1/2))."""
+        if self._split is None:
+            self._split = self.expr.as_independent(self.x, as_Add=False)
+        return self._split
+
+    @property
+    def derivative(self):
+        """sym.diff(expr, x)"""
+        if self._derivative is None:
+            self._derivative = sym.diff(self.expr, self.x)
+        return self._derivative
+
+    def latex(self, **kwargs):
+        """polytex(expr, **kwargs)"""
+        key = _settings_key(kwargs)
+        if key is None:
+            return polytex(self.expr, **kwargs)
+        if key not in self._latex:
+            self._latex[key] = polytex(self.expr, **kwargs)
+        return self._latex[key]
+
+
+ExpressionCacheInfo = namedtuple('ExpressionCacheInfo', 'hits misses maxsize currsize')
+
+
+class ExpressionStore:
+    """
+    Interns expressions: equal expressions share one ExpressionInfo, so whatever was derived from the first copy is a
+    dictionary lookup for the others. Only the max_size most recently used expressions are kept.
+    """
+
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, expr, x=sym.symbols('x')):
+        """The ExpressionInfo for expr (anything sympify takes) and x."""
+        expr = sympify_cached(expr)
+        # The type is part of the key because e.g. 2 == 2.0 but they print differently
+        key = (type(expr), expr, x)
+        try:
+            info = self._entries.get(key)
+        except TypeError:  # expr can't be hashed
+            return ExpressionInfo(expr, x)
+        if info is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return info
+        self.misses += 1
+        info = self._entries[key] = ExpressionInfo(expr, x)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return info
+
+    def intern(self, expr, x=sym.symbols('x')):
+        """The stored copy of expr, so expressions that are equal are also the same object."""
+        return self.get(expr, x).expr
+
+    def cache_info(self):
+        return ExpressionCacheInfo(self.hits, self.misses, self.max_size, len(self._entries))
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+
+_expressions = ExpressionStore()
+
+
+def expression_info(expr, x=sym.symbols('x')):
+    """
+    The shared ExpressionInfo of expr, e.g. expression_info(3 * x ** 2).coeff is 3 and .latex() is "3x^{2}".
+    mono_coeff, mono_sgn and the helpers that use them go through this, so each term is only worked on once.
+    """
+    return _expressions.get(expr, x)
+
+
+def expression_cache_info():
+    """Hit and miss statistics of the expression store and the sympify cache for strings."""
+    return {"expressions": _expressions.cache_info(), "sympify": _sympify_string.cache_info()}
+
+
+def clear_expression_cache():
+    """Empties the expression store and the sympify cache for strings."""
+    _expressions.clear()
+    _sympify_string.cache_clear()
+
+
+def substitute(eval_point, poly, x=sym.symbols('x'), include_parentheses=True, color=None, **kwargs):
+    """
+    Gives the string you would achieve by substituting eval_point into poly without simplifying it
+    :param eval_point: the value being substituted into poly
+    :param poly: a polynomial
+    :param x: the symbol being replaced
+    :param include_parentheses: whether to put parentheses around the argument being substituted
+    :param order: how the terms are ordered, 'lex' is default (which puts things from highest power to lowest)
+    other options are 'none' and 'old' but not sure how those work exactly
+    :return: a string of latex representing the substitution of eval_point into poly
+    """
+    return substitute_batch([eval_point], poly, x, include_parentheses, color, **kwargs)[0]
+
+
+class _Substituting:
+    """
+    Printer mixin that prints the symbols in substitutions as the given strings, so a value is put in place of a
+    symbol while the expression is printed, instead of replacing text in the printed LaTeX afterwards.
+    """
+
+    def __init__(self, substitutions, settings=None):
+        super().__init__(settings)
+        self.substitutions = substitutions
+
+    def _print_Symbol(self, expr, style='plain'):
+        if expr in self.substitutions:
+            return self.substitutions[expr]
+        return super()._print_Symbol(expr, style)
+
+
+class SubstitutionPrinter(_Substituting, MyLatexPrinter):
+    """A MyLatexPrinter (polytex) that prints symbols as the strings in substitutions, a dict {Symbol: str}."""
+
+
+class SympySubstitutionPrinter(_Substituting, LatexPrinter):
+    """The same for sympy's own LatexPrinter (sym.latex)."""
+
+
+_SUBSTITUTION_PRINTERS = {'polytex': SubstitutionPrinter, 'latex': SympySubstitutionPrinter}
+
+# Characters from Unicode's private use area stand in for the symbols, so they can't clash with anything in LaTeX
+_SENTINEL = 0xE000
+
+
+@functools.lru_cache(maxsize=1024)
+def _substitution_template(poly, symbols, printer, settings_key):
+    sentinels = {symbol: chr(_SENTINEL + i) for (i, symbol) in enumerate(symbols)}
+    return _SUBSTITUTION_PRINTERS[printer](sentinels, dict(settings_key)).doprint(poly)
+
+
+def substitution_template(poly, symbols, printer='polytex', **kwargs):
+    """
+    poly printed once with a placeholder character for each of symbols, chr(0xE000 + i) for symbols[i].
+    Templates are cached, so substituting many points into the same poly prints it only once.
+    :param printer: 'polytex' to print like polytex, 'latex' to print like sym.latex
+    """
+    symbols = tuple(symbols)
+    key = _settings_key(kwargs)
+    if key is None:
+        sentinels = {symbol: chr(_SENTINEL + i) for (i, symbol) in enumerate(symbols)}
+        return _SUBSTITUTION_PRINTERS[printer](sentinels, kwargs).doprint(poly)
+    return _substitution_template(poly, symbols, printer, key)
+
+
+def substitute_batch(eval_points, poly, x=sym.symbols('x'), include_parentheses=True, color=None,
+                     printer='polytex', **kwargs):
+    """
+    substitute for many points at once: poly is printed once, and each point is filled in to the printed string.
+    Gives a list with the string for each point.
+    :param eval_points: the values to substitute. If x is a tuple of symbols, each point is a tuple of values.
+    :param x: the symbol being replaced, or a tuple of symbols
+    :param color: a color for the substituted values, or a list with a color for each symbol
+    :param printer: 'polytex' (as substitute prints) or 'latex' (as substitute_unsimplified prints)
+    """
+    symbols = tuple(x) if isinstance(x, (tuple, list)) else (x,)
+    colors = list(color) if isinstance(color, (tuple, list)) else [color] * len(symbols)
+    template = substitution_template(poly, symbols, printer, **kwargs)
+    if printer == 'polytex':
+        value_latex = polytex
+    else:
+        settings = {k: v for (k, v) in kwargs.items() if k not in ('order', 'long_frac_ratio')}
+        value_latex = functools.partial(sym.latex, **settings)
+
+    results = []
+    for point in eval_points:
+        values = point if isinstance(x, (tuple, list)) else (point,)
+        table = {}
+        for (i, (value, c)) in enumerate(zip(values, colors)):
+            string_of_eval = value_latex(value).replace(" ", "")
+            if include_parentheses:
+                string_of_eval = '\\left(%s\\right)' % string_of_eval
+            if c:
+                string_of_eval = '\\color{%s}{%s}' % (c, string_of_eval)
+            table[_SENTINEL + i] = string_of_eval
+        results.append(template.translate(table))
+    return results
+
+
+def round(a, n, places=None):
+    if places is None:
+        places = n
+    multiplier = 10 ** n
+    if a == 0:
+        num = 0
+    elif a > 0:
+        num = 1.0 * sym.floor(a * multiplier + 0.5) / multiplier
+    else:
+        num = 1.0 * sym.ceiling(a * multiplier - 0.5) / multiplier
+    return f"{num:.{places}f}"
+
+
+def poly_slicer(poly, first_n_terms=None, show_zeros=True, ghost_terms=True, underline=False,
+                x=sym.symbols('x')):
+    """Helper Function for Polynomial long division"""
+    if show_zeros:
+        terms = sym.Poly(poly, x).all_terms()
+    else:
+        terms = sym.Poly(poly, x).terms()
+
+    first_n_terms = len(terms) if (first_n_terms is None or first_n_terms > len(terms)) else first_n_terms
+
+    if underline:
+        poly_string = f"\\underline{{ \\left({pmsign(terms[0][1], leading=True)}{sym.latex(x ** terms[0][0][0])}"
+
+        for term in terms[1:first_n_terms]:
+            poly_string += f"{constant_sign(term[1])}" \
+                           f"{sym.latex(x ** term[0][0]) if term[0][0] != 0 else ''}"
+
+        poly_string += " \\right)}"
+    else:
+        poly_string = f"{pmsign(terms[0][1], leading=True)}" \
+                      f"{sym.latex(x ** terms[0][0][0]) if terms[0][0][0] != 0 else ''}"
+
+        for term in terms[1:first_n_terms]:
+            poly_string += f"{constant_sign(term[1])}" \
+                           f"{sym.latex(x ** term[0][0]) if term[0][0] != 0 else ''}"
+
+    if ghost_terms:
+        poly_string += f"\\phantom{{ { '{{}}' if not underline else ''} "
+        for term in terms[first_n_terms:]:
+            poly_string += f"{constant_sign(term[1])}" \
+                           f"{sym.latex(x ** term[0][0]) if term[0][0] != 0 else ''}"
+        poly_string += " }"
+
+    return poly_string
+
+
+def poly_long_div(n, d, x=sym.symbols('x')):
+    """
+    function n / d:
+        require d ≠ 0
+        q ← 0
+        r ← n       # At each step n = d × q + r
+        while r ≠ 0 AND degree(r) ≥ degree(d):
+        t ← lead(r)/lead(d)     # Divide the leading terms
+         q ← q + t
+         r ← r − t * d
+    return (q, r)
+    :return: LaTeX for polynomial long division n / d
+
+    Polynomials with rational coefficients are divided with long_division, on Fractions without going through
+    sympy for each step. Anything else (e.g. float coefficients) is divided with sympy's Poly arithmetic.
+    """
+    n = sym.Poly(n, x)
+    d = sym.Poly(d, x)
+    n_coeffs, d_coeffs = n.all_coeffs(), d.all_coeffs()
+    if all(c.is_Rational for c in n_coeffs + d_coeffs):
+        return long_division.long_division_latex(n_coeffs, d_coeffs, variable=sym.latex(x))
+    return _poly_long_div_sympy(n, d)
+
+
+def _poly_long_div_sympy(n, d):
+    """poly_long_div with sympy Poly arithmetic, for coefficients that aren't rational."""
+    q = sym.div(n, d)[0]
+
+    long_div_string = f"\\require{{enclose}}" \
+                      f"\\begin{{array}}{{r}}" \
+                      f"{sym.latex(q.as_expr())} \\\\[-3pt] " \
+                      f"{sym.latex(d.as_expr())} \\enclose{{longdiv}}{{{poly_slicer(n)}}}"
+
+    term_length = len(d.all_terms())
+
+    q = 0
+    r = n
+    while r != 0 and sym.degree(r) >= sym.degree(d):
+        t = sym.LT(r) / sym.LT(d)
+        q = q + t
+        r = r - t * d
+
+        if r == 0 or sym.degree(r) < sym.degree(d):
+            long_div_string += f"\\\\[-3pt] -{poly_slicer(t * d, first_n_terms=term_length, underline=True)}" \
+                               f"\\\\[-3pt] {poly_slicer(r, show_zeros=False)}"
+        else:
+            long_div_string += f"\\\\[-3pt] -{poly_slicer(t * d, first_n_terms=term_length, underline=True)}" \
+                               f"\\\\[-3pt] {poly_slicer(r, first_n_terms=term_length)}"
+
+    return f"{long_div_string} \\end{{array}}"
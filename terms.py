@@ -0,0 +1,160 @@
+from fractions import Fraction
+
+
+def to_fraction(value):
+    """Converts an int, Fraction, sympy Rational or numeric string to a Fraction."""
+    if isinstance(value, Fraction):
+        return value
+    if hasattr(value, 'p') and hasattr(value, 'q'):  # sympy Rational
+        return Fraction(int(value.p), int(value.q))
+    return Fraction(value)
+
+
+def rational_latex(value):
+    """
+    LaTeX for a rational number, the same as polytex/sym.latex give for a sympy Rational.
+    rational_latex(3) gives "3", rational_latex(Fraction(-1, 2)) gives "- \\frac{1}{2}"
+    """
+    value = to_fraction(value)
+    if value.denominator == 1:
+        return str(value.numerator)
+    sign = "- " if value < 0 else ""
+    return "%s\\frac{%d}{%d}" % (sign, abs(value.numerator), value.denominator)
+
+
+def power_latex(exponent, variable='x'):
+    """LaTeX for variable ** exponent, the same as MyLatexPrinter gives. The exponent must be non-zero."""
+    exponent = to_fraction(exponent)
+    if exponent == 1:
+        return variable
+    if exponent.denominator == 1:
+        return "%s^{%d}" % (variable, exponent.numerator)
+    return "%s^{%d/%d}" % (variable, exponent.numerator, exponent.denominator)
+
+
+class Term:
+    """
+    A term coeff * x ** exp with rational coeff and exp, kept as Fractions.
+    Differentiating, integrating and printing these doesn't need sympy, and latex() gives exactly the same string as
+    polytex(coeff * x ** exp).
+    """
+
+    __slots__ = ('coeff', 'exp')
+
+    def __init__(self, coeff, exp=0):
+        self.coeff = to_fraction(coeff)
+        self.exp = to_fraction(exp) if self.coeff else Fraction(0)
+
+    def __repr__(self):
+        return f"Term({self.coeff}, {self.exp})"
+
+    def __eq__(self, other):
+        return isinstance(other, Term) and (self.coeff, self.exp) == (other.coeff, other.exp)
+
+    def __hash__(self):
+        return hash((self.coeff, self.exp))
+
+    def __neg__(self):
+        return Term(-self.coeff, self.exp)
+
+    def __abs__(self):
+        return Term(abs(self.coeff), self.exp)
+
+    def __mul__(self, other):
+        if isinstance(other, Term):
+            return Term(self.coeff * other.coeff, self.exp + other.exp)
+        return Term(self.coeff * to_fraction(other), self.exp)
+
+    __rmul__ = __mul__
+
+    def derivative(self):
+        """The power rule: d/dx (a x^n) = a n x^(n - 1)"""
+        return Term(self.coeff * self.exp, self.exp - 1)
+
+    def antiderivative(self):
+        """The reverse power rule: the antiderivative of a x^n is a / (n + 1) x^(n + 1), without the constant."""
+        if self.exp == -1:
+            raise ValueError("The antiderivative of a x^{-1} is a logarithm, not a term.")
+        return Term(self.coeff / (self.exp + 1), self.exp + 1)
+
+    def evaluate(self, x):
+        """The value of the term at x. Exact (a Fraction) when the exponent is an integer, otherwise a float."""
+        if self.exp.denominator == 1:
+            return self.coeff * to_fraction(x) ** self.exp.numerator
+        return float(self.coeff) * float(x) ** float(self.exp)
+
+    def latex(self, variable='x'):
+        """The term in LaTeX, byte-for-byte the same as polytex(coeff * x ** exp)."""
+        if self.coeff == 0 or self.exp == 0:
+            return rational_latex(self.coeff)
+        sign = "- " if self.coeff < 0 else ""
+        coeff = abs(self.coeff)
+        return sign + (rational_latex(coeff) if coeff != 1 else "") + power_latex(self.exp, variable)
+
+    def to_sympy(self, x=None):
+        """The term as a sympy expression."""
+        import sympy as sym
+        x = sym.symbols('x') if x is None else x
+        return sym.Rational(self.coeff.numerator, self.coeff.denominator) * \
+            x ** sym.Rational(self.exp.numerator, self.exp.denominator)
+
+    @classmethod
+    def from_sympy(cls, expr, x=None):
+        """
+        Converts a sympy monomial c * x ** n with rational c and n to a Term.
+        Returns None if expr isn't one, so callers can fall back to sympy.
+        """
+        import sympy as sym
+        x = sym.symbols('x') if x is None else x
+        expr = sym.sympify(expr)
+        if expr.is_Add:
+            return None
+        coeff, exp = expr.as_coeff_exponent(x)
+        if not (coeff.is_Rational and exp.is_Rational):
+            return None
+        return cls(coeff, exp)
+
+
+class Polynomial:
+    """
+    A sum of Terms kept in the order they were given, like add_terms does. Terms with exponents in common are not
+    combined. latex() gives the same string as add_terms(*terms).
+    """
+
+    __slots__ = ('terms',)
+
+    def __init__(self, *terms):
+        self.terms = [term if isinstance(term, Term) else Term(term) for term in terms]
+
+    def __repr__(self):
+        return "Polynomial(%s)" % ", ".join(repr(term) for term in self.terms)
+
+    def __iter__(self):
+        return iter(self.terms)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def derivative(self, include_zeros=False):
+        """The derivative of each term. Constant terms become zero and are dropped unless include_zeros is True."""
+        derivatives = [term.derivative() for term in self.terms]
+        return Polynomial(*[term for term in derivatives if include_zeros or term.coeff != 0])
+
+    def antiderivative(self):
+        """The antiderivative of each term, without the constant of integration."""
+        return Polynomial(*[term.antiderivative() for term in self.terms])
+
+    def evaluate(self, x):
+        return sum(term.evaluate(x) for term in self.terms)
+
+    def latex(self, variable='x'):
+        """The terms added together in LaTeX, the same as add_terms(*terms)."""
+        if not self.terms:
+            return "0"
+        tex = self.terms[0].latex(variable)
+        for term in self.terms[1:]:
+            if term.coeff < 0:
+                tex += " - " + (-term).latex(variable)
+            else:
+                tex += " + " + term.latex(variable)
+        return tex
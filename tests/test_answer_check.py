@@ -0,0 +1,61 @@
+import pytest
+
+from answer_check import LatexParseError, check_blob, equivalent
+from validations import cloze_blob, lea_blob
+
+
+@pytest.mark.parametrize("response, value", [
+    (r"\frac{x}{2}", "0.5x"),
+    (r"2\left(x+1\right)", "2x+2"),
+    (r"x^{\frac{1}{2}}", r"\sqrt{x}"),
+    (r"\dfrac{3}{4}x^{-\frac{1}{4}}", r"\frac{3}{4\sqrt[4]{x}}"),
+    (r"\sin^2 x+\cos^2 x", "1"),
+    ("y=2x", "2x=y"),
+    (r"3\mathtt{\text{+}}x", "x+3"),
+])
+def test_symbolic_equivalent(response, value):
+    assert equivalent(response, value, "equivSymbolic")
+
+
+@pytest.mark.parametrize("response, value", [("x^2", "2x"), ("y=2x", "y=x"), (r"\sqrt{x}", "x"), ("x", "x=1")])
+def test_symbolic_not_equivalent(response, value):
+    assert not equivalent(response, value, "equivSymbolic")
+
+
+def test_value_decimal_places():
+    assert equivalent("3.14159", r"\pi", "equivValue", {"decimalPlaces": 3})
+    assert not equivalent("3.14", r"\pi", "equivValue", {"decimalPlaces": 5})
+
+
+@pytest.mark.parametrize("response, value, options, expected", [
+    ("x^2", "x^{2}", {}, True),
+    ("x_1", "x_{1}", {}, True),
+    ("x^23", "x^{23}", {}, False),
+    (r"\left(x+1\right)", "(x+1)", {}, True),
+    ("2x+1", "1+2x", {}, False),
+    ("2x+1", "1+2x", {"ignoreOrder": True}, True),
+    ("1x", "x", {"ignoreCoefficientOne": True}, True),
+    ("1x", "x", {}, False),
+    ("2.50", "2.5", {"ignoreTrailingZeros": True}, True),
+    (r"5\text{ cm}", "5", {"ignoreText": True}, True),
+])
+def test_literal(response, value, options, expected):
+    assert equivalent(response, value, "equivLiteral", options) is expected
+
+
+def test_unreadable_response():
+    with pytest.raises(LatexParseError):
+        equivalent(r"\frac{x", "x", "equivSymbolic")
+
+
+def test_check_blob():
+    assert check_blob(lea_blob("{{response}}", r"\frac{1}{2}x^{-\frac{1}{2}}", "equivSymbolic")) == []
+    assert check_blob(lea_blob("{{response}}", "2x", "equivSymbolic", blacklist=["x+x"])) == []
+    # Blacklisting the correct answer, even with different braces, rejects the correct answer too
+    assert check_blob(lea_blob("{{response}}", "x^2", "equivLiteral", blacklist=["x^{2}"])) == \
+        ["correct answer 'x^2' fails its own validation"]
+
+
+def test_check_cloze_blob():
+    blob = cloze_blob("{{response}} {{response}}", ["2", r"\frac{"], ["equivSymbolic"] * 2)
+    assert check_blob(blob) == ["response 2: can't read the answer: unbalanced braces"]
@@ -0,0 +1,64 @@
+import pytest
+
+from background_writer import BackgroundWriter
+
+
+class FailingFile:
+    """Fails on the second write."""
+
+    name = "failing"
+
+    def __init__(self):
+        self.written = []
+        self.closed = False
+
+    def write(self, text):
+        if self.written:
+            raise OSError("disk full")
+        self.written.append(text)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def test_writes_in_order(tmp_path):
+    writer = BackgroundWriter(max_pending=4)
+    f = writer.open(tmp_path / "out.txt")
+    for i in range(100):
+        f.write(f"{i}\n")
+    f.close()
+    writer.close()
+    assert (tmp_path / "out.txt").read_text() == "".join(f"{i}\n" for i in range(100))
+
+
+def test_a_failed_writer_stays_failed():
+    writer = BackgroundWriter()
+    failing = FailingFile()
+    writer.submit(failing, 'write', 'a')
+    writer.submit(failing, 'write', 'b')
+    with pytest.raises(OSError):
+        writer.wait()
+    for _ in range(3):
+        with pytest.raises(OSError):
+            writer.submit(failing, 'write', 'c')
+    with pytest.raises(OSError):
+        writer.submit(failing, 'close')
+    with pytest.raises(OSError):
+        writer.close()
+    assert failing.written == ['a']
+    assert failing.closed
+
+
+def test_printer_close_raises_the_write_error(tmp_path):
+    from tools import Printer
+    printer = Printer("Failing", output_dir=tmp_path, background_io=True)
+    writer = printer._writer
+    failing = FailingFile()
+    writer.submit(failing, 'write', 'a')
+    writer.submit(failing, 'write', 'b')
+    with pytest.raises(OSError):
+        printer.close()
+    assert not writer._thread.is_alive()
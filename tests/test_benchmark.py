@@ -0,0 +1,36 @@
+import os
+
+from benchmark import benchmark_template, regressions
+from tools import Problem, Template, unique
+
+
+class Pairs(Template):
+    domains = {'a': range(1, 41), 'b': range(1, 4)}
+
+    @unique
+    def variables(self):
+        v = self.sample()
+        return v['a'], v['b']
+
+    def template(self):
+        (a, b) = self.variables()
+        return Problem(question_stem=f"q{a}/{b}", explanation="e", concepts="c", correct_answer=str(a),
+                       json_blob="{}")
+
+
+def test_benchmark_template(tmp_path):
+    cwd = os.getcwd()
+    result = benchmark_template(Pairs, 20, tmp_path, repeats=2)
+    assert os.getcwd() == cwd
+    assert [path.name for path in tmp_path.glob("*.csv")] == ["benchmark_pairs.csv"]
+    assert result["problems"] == 20 and result["repeats"] == 2
+    # Every run makes the same problems from a fresh @unique history, after the untimed first problem
+    assert result["unique"]["accepted"] == 20
+    assert result["rejection_rate"] == 0.0
+
+
+def test_regressions():
+    baseline = {"templates": {"A": {"problems_per_sec": 100.0}, "B": {"problems_per_sec": 100.0},
+                              "Gone": {"problems_per_sec": 100.0}}}
+    results = {"templates": {"A": {"problems_per_sec": 91.0}, "B": {"problems_per_sec": 89.0}}}
+    assert regressions(results, baseline, 0.1) == [("B", 100.0, 89.0)]
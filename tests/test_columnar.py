@@ -0,0 +1,61 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from columnar import ColumnarWriter, read_columns
+
+COLUMNS = ["Title", "Quiz?", "Atom Body", "Learnosity JSON"]
+
+
+def rows(count, blob=lambda i: {"type": "formulaV2", "n": i}):
+    return [{"Title": f"t{i % 3}", "Quiz?": "Y" if i % 2 else "N", "Atom Body": f"q{i}",
+             "Learnosity JSON": json.dumps(blob(i))} for i in range(count)]
+
+
+def write(path, rows, **options):
+    writer = ColumnarWriter(path, COLUMNS, rows_per_group=4, **options)
+    for i, row in enumerate(rows):
+        writer.write_row(i + 1, row)
+    writer.close()
+    return writer
+
+
+@pytest.mark.parametrize("backend", ["parquet", "zip"])
+def test_round_trip_in_groups(tmp_path, backend):
+    if backend == "parquet":
+        pytest.importorskip("pyarrow")
+    writer = write(tmp_path / "bank", rows(10), backend=backend)
+    assert writer.groups == 3
+    columns = read_columns(writer.path)
+    if backend == "parquet":
+        assert writer.path.suffix == ".parquet"
+        columns = columns.to_pydict()
+    assert columns["Problem Number"] == list(range(1, 11))
+    assert columns["Title"] == [f"t{i % 3}" for i in range(10)]
+    assert columns["Quiz?"] == [bool(i % 2) for i in range(10)]
+    assert columns["Learnosity JSON"] == [{"type": "formulaV2", "n": i} for i in range(10)]
+
+
+@pytest.mark.parametrize("backend", ["parquet", "zip"])
+def test_no_rows(tmp_path, backend):
+    if backend == "parquet":
+        pytest.importorskip("pyarrow")
+    writer = write(Path(tmp_path / "empty"), [], backend=backend)
+    columns = read_columns(writer.path)
+    assert len(columns["Problem Number"]) == 0
+
+
+def test_parquet_json_that_cant_be_nested(tmp_path):
+    pytest.importorskip("pyarrow")
+    writer = write(tmp_path / "empty_blob", rows(6, blob=lambda i: {}), backend="parquet")
+    assert read_columns(writer.path).column("Learnosity JSON").to_pylist() == ["{}"] * 6
+
+
+def test_parquet_later_groups_must_fit_the_json_type(tmp_path):
+    pytest.importorskip("pyarrow")
+    fitting = rows(8, blob=lambda i: {"type": "formulaV2"} if i < 4 else {"type": "formulaV2", "n": None})
+    assert read_columns(write(tmp_path / "fits", fitting, backend="parquet").path).num_rows == 8
+    with pytest.raises(ValueError, match="rows_per_group"):
+        write(tmp_path / "drifts", rows(8, blob=lambda i: {"type": "formulaV2"} if i < 4 else {"extra": i}),
+              backend="parquet")
@@ -0,0 +1,195 @@
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from tools import Printer, Problem, Template, unique
+
+
+@pytest.fixture(params=multiprocessing.get_all_start_methods())
+def start_method(request, monkeypatch):
+    """Makes print_all's worker pools use each of the platform's start methods (fork is only the Linux default)."""
+    monkeypatch.setattr(multiprocessing, "Pool", multiprocessing.get_context(request.param).Pool)
+    return request.param
+
+
+class Legacy(Template):
+    """Draws its variables from the random module, as the older generator scripts do."""
+
+    @unique
+    def variables(self):
+        return random.randint(1, 50)
+
+    def template(self):
+        a = self.variables()
+        return Problem(question_stem=f"q{a}", explanation="e", concepts="c", answer_choices=[str(a), "x"])
+
+
+def print_bank(directory, processes=None, **kwargs):
+    random.seed(1)
+    printer = Printer("Legacy", output_dir=directory)
+    template = Legacy()
+    template.restart()
+    printer.print_all((template, 40), processes=processes, **kwargs)
+    return printer.file_path_csv.read_text(), printer.file_path_html.read_text()
+
+
+def question_stems(csv_text):
+    return [line.split(",")[10] for line in csv_text.splitlines()[1:]]
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_legacy_templates_are_the_same_with_processes(tmp_path, processes, start_method):
+    serial = print_bank(tmp_path / "serial")
+    parallel = print_bank(tmp_path / "parallel", processes=processes)
+    assert parallel == serial
+    assert len(set(question_stems(serial[0]))) == 40
+
+
+def test_legacy_templates_are_not_cached(tmp_path):
+    from problem_cache import ProblemCache
+    cache = ProblemCache(tmp_path / "cache")
+    serial = print_bank(tmp_path / "serial")
+    assert print_bank(tmp_path / "cached", cache=cache) == serial
+    assert print_bank(tmp_path / "again", cache=cache) == serial
+    assert cache.size() == 0
+
+
+class Sampled(Template):
+    domains = {'a': range(1, 51), 'b': range(1, 4)}
+    constraints = [lambda a, b: a % b != 0 or b == 1]
+
+    @unique
+    def variables(self):
+        v = self.sample()
+        return v['a'], v['b']
+
+    def template(self):
+        (a, b) = self.variables()
+        return Problem(question_stem=f"q{a}/{b}", explanation="e", concepts="c", correct_answer=str(a),
+                       json_blob="{}")
+
+
+def print_sampled(directory, **kwargs):
+    printer = Printer("Sampled", output_dir=directory)
+    template = Sampled()
+    template.restart()
+    printer.print_all((template, 30), **kwargs)
+    return printer.file_path_csv.read_text()
+
+
+def test_problem_cache_round_trip(tmp_path):
+    from problem_cache import ProblemCache
+    serial = print_sampled(tmp_path / "serial")
+    cache = ProblemCache(tmp_path / "cache")
+    assert print_sampled(tmp_path / "first", cache=cache) == serial
+    assert (cache.hits, cache.misses) == (0, 30)
+    assert print_sampled(tmp_path / "second", cache=cache) == serial
+    assert cache.hits == 30
+    problem = cache.get(Sampled(), 0)
+    assert isinstance(problem, Problem) and problem.question_stem in serial
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_sampled_templates_are_the_same_with_processes(tmp_path, processes, start_method):
+    serial = print_sampled(tmp_path / "serial")
+    assert print_sampled(tmp_path / "parallel", processes=processes) == serial
+    assert len(set(question_stems(serial))) == 30
+
+
+class Shuffled(Sampled):
+    def template(self):
+        (a, b) = self.variables()
+        choices = [str(self.rng.randint(1, 9) * a), str(a + b), str(a - b), str(a * b)]
+        return Problem(question_stem=f"q{a}/{b}", explanation="e", concepts="c", answer_choices=choices)
+
+
+def test_generation_leaves_the_random_module_alone():
+    from tools import generate_problems
+    random.seed(1)
+    state = random.getstate()
+    generate_problems(Shuffled, 0, 10)
+    assert random.getstate() == state
+
+
+@pytest.mark.parametrize("processes", [1, 2, 3])
+def test_answer_shuffles_do_not_depend_on_processes(tmp_path, processes, start_method):
+    def print_shuffled(directory, **kwargs):
+        random.seed(1)
+        printer = Printer("Shuffled", output_dir=directory)
+        template = Shuffled()
+        template.restart()
+        printer.print_all((template, 30), **kwargs)
+        return printer.file_path_csv.read_text(), printer.file_path_html.read_text()
+
+    assert print_shuffled(tmp_path / "parallel", processes=processes) == print_shuffled(tmp_path / "serial")
+
+
+SCRIPT = """
+import multiprocessing
+import random
+import sys
+from pathlib import Path
+
+from problem_cache import ProblemCache
+from tools import Printer, Problem, Template, unique
+
+
+class Pairs(Template):
+    domains = {'a': range(1, 201), 'b': range(1, 4)}
+    constraints = [lambda a, b: a % b != 0 or b == 1]
+
+    @unique
+    def variables(self):
+        v = self.sample()
+        return v['a'], v['b']
+
+    def template(self):
+        (a, b) = self.variables()
+        return Problem(question_stem=f"q{a}/{b}", explanation="e", concepts="c", correct_answer=str(self.rng.random()),
+                       json_blob="{}")
+
+
+class Shuffled(Pairs):
+    def template(self):
+        (a, b) = self.variables()
+        choices = [str(self.rng.randint(1, 9) * a), str(a + b), str(a - b), str(a * b)]
+        return Problem(question_stem=f"q{a}/{b}", explanation="e", concepts="c", answer_choices=choices)
+
+
+def print_bank(directory, **kwargs):
+    random.seed(1)
+    printer = Printer("Pairs", output_dir=directory)
+    templates = [Pairs(), Shuffled()]
+    for template in templates:
+        template.restart()
+    printer.print_all(*[(template, 40) for template in templates], **kwargs)
+    return printer.file_path_csv.read_text(), printer.file_path_html.read_text()
+
+
+if __name__ == '__main__':
+    multiprocessing.set_start_method(sys.argv[1])
+    output = Path(sys.argv[2])
+    cache = ProblemCache(output / "cache")
+    serial = print_bank(output / "serial", cache=cache)
+    size = cache.size()
+    parallel = print_bank(output / "parallel", processes=2, cache=cache)
+    print(serial == parallel, cache.size() == size)
+"""
+
+
+@pytest.mark.parametrize("method", multiprocessing.get_all_start_methods())
+def test_script_templates_are_the_same_with_processes(tmp_path, method):
+    # Templates in a script are in __main__, and in __mp_main__ in the workers of a spawned pool. The answer
+    # shuffles, from the random module in this process, don't depend on the workers either.
+    script = tmp_path / "bank.py"
+    script.write_text(SCRIPT)
+    env = dict(os.environ, PYTHONPATH=str(Path(__file__).resolve().parent.parent))
+    result = subprocess.run([sys.executable, str(script), method, str(tmp_path)], cwd=tmp_path, env=env,
+                            capture_output=True, text=True, check=True)
+    # The same problems, and the parallel run is served by the serial run's cache entries
+    assert result.stdout.split() == ["True", "True"]
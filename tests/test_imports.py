@@ -0,0 +1,35 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+# Importing sympy alone takes about 0.4s, importing tools without it under 0.1s
+IMPORT_BUDGET = 0.3
+
+MEASURE = """
+import json, sys, time
+start = time.perf_counter()
+import tools
+print(json.dumps({"seconds": time.perf_counter() - start, "sympy": "sympy" in sys.modules}))
+"""
+
+
+def import_tools():
+    result = subprocess.run([sys.executable, "-c", MEASURE], cwd=REPO, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def test_import_tools_does_not_import_sympy():
+    assert not import_tools()["sympy"]
+
+
+def test_import_tools_is_within_budget():
+    # The best of a few runs, so a busy machine doesn't fail the test
+    assert min(import_tools()["seconds"] for _ in range(3)) < IMPORT_BUDGET
+
+
+def test_sympy_helpers_still_resolve_through_tools():
+    script = "import tools, sys; tools.polytex; print('sympy' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", script], cwd=REPO, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "True"
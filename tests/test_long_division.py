@@ -0,0 +1,57 @@
+import random
+from fractions import Fraction
+
+import pytest
+import sympy as sym
+
+from long_division import divide, synthetic_division
+from sympy_tools import _poly_long_div_sympy, poly_long_div
+
+x = sym.symbols('x')
+
+
+def random_coefficients(rng, degree):
+    """Coefficients highest degree first, with a non-zero leading one."""
+    return [rng.randint(1, 9) * rng.choice([1, -1])] + [
+        rng.choice([0, 0, 1, -1, rng.randint(-9, 9), Fraction(rng.randint(-9, 9), rng.randint(1, 5))])
+        for _ in range(degree)]
+
+
+def polynomial(coeffs):
+    return sym.Poly([sym.Rational(c.numerator, c.denominator) for c in map(Fraction, coeffs)], x)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_poly_long_div_matches_sympy(seed):
+    rng = random.Random(seed)
+    n = polynomial(random_coefficients(rng, rng.randint(0, 8)))
+    d = polynomial(random_coefficients(rng, rng.randint(1, 4)))
+    assert poly_long_div(n.as_expr(), d.as_expr()) == _poly_long_div_sympy(n, d)
+
+
+def test_divide():
+    (quotient, remainder, steps) = divide([2, -3, 0, 5], [1, -2])
+    assert quotient == [2, 1, 2]
+    assert remainder == [9]
+    assert [step.degree for step in steps] == [3, 2, 1]
+    assert divide([1, 2], [1, 0, 1]) == ([], [1, 2], [])
+    with pytest.raises(ZeroDivisionError):
+        divide([1, 2], [0])
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_divide_identity(seed):
+    rng = random.Random(seed)
+    dividend = random_coefficients(rng, rng.randint(0, 8))
+    divisor = random_coefficients(rng, rng.randint(0, 4))
+    (quotient, remainder, _) = divide(dividend, divisor)
+    product = polynomial(divisor) * polynomial(quotient or [0]) + polynomial(remainder or [0])
+    assert product.as_expr() == polynomial(dividend).as_expr()
+    assert len(remainder) < len(divisor)
+
+
+def test_synthetic_division():
+    assert synthetic_division([1, -6, 11, -6], 2) == ([1, -4, 3], 0, [2, -8, 6])
+    (quotient, remainder, _) = synthetic_division([2, 0, Fraction(1, 2)], Fraction(1, 2))
+    assert (quotient, remainder) == ([2, 1], 1)
+    assert divide([2, 0, Fraction(1, 2)], [1, Fraction(-1, 2)])[:2] == (quotient, [remainder])
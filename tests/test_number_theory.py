@@ -0,0 +1,57 @@
+import math
+import sys
+
+import pytest
+
+import number_theory
+from number_theory import divisors, factors, gcd, lcm, prime_factors, smallest_prime_factors
+
+
+def brute_force_factors(n):
+    small = [d for d in range(1, math.isqrt(n) + 1) if n % d == 0]
+    result = [f for d in small if d * d != n for f in (d, n // d)]
+    return result + [math.isqrt(n)] if math.isqrt(n) ** 2 == n else result
+
+
+def test_factors():
+    assert factors(12) == [1, 12, 2, 6, 3, 4]
+    # Perfect squares end with their root
+    assert factors(16) == [1, 16, 2, 8, 4]
+    assert factors(1) == [1]
+    assert factors(0) == [0]
+    assert all(factors(n) == brute_force_factors(n) for n in range(1, 500))
+    assert all(type(f) is int for f in factors(36))
+    with pytest.raises(ValueError):
+        factors(-4)
+
+
+def test_gcd_and_lcm():
+    assert gcd(12, 18, 27) == 3
+    assert gcd(-4, 6) == 2
+    assert gcd(7) == 7 and lcm(-7) == 7
+    assert lcm(4, 6, 10) == 60
+    assert lcm(0, 5) == 0
+    assert gcd(1.5, 0.5) == 0.5
+    assert lcm(1.5, 3.0) == 3.0
+    # Long argument lists don't recurse
+    many = [6 * k for k in range(1, sys.getrecursionlimit() + 100)]
+    assert gcd(*many) == 6
+    assert gcd(*[float(m) for m in many]) == 6.0
+
+
+def test_prime_factors_and_divisors():
+    assert prime_factors(360) == {2: 3, 3: 2, 5: 1}
+    assert prime_factors(1) == {}
+    big = number_theory.SIEVE_LIMIT * 3 + 1
+    assert math.prod(p ** k for (p, k) in prime_factors(big).items()) == big
+    assert divisors(28) == [1, 2, 4, 7, 14, 28]
+    assert all(divisors(n) == [d for d in range(1, n + 1) if n % d == 0] for n in range(1, 300))
+    with pytest.raises(ValueError):
+        prime_factors(0)
+
+
+def test_sieve_grows():
+    spf = smallest_prime_factors(100)
+    assert spf[97] == 97 and spf[91] == 7 and spf[1] == 1
+    assert len(smallest_prime_factors(5000)) > 5000
+    assert smallest_prime_factors(10) is smallest_prime_factors(20)
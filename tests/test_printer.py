@@ -0,0 +1,46 @@
+import csv
+
+import pytest
+
+from tools import Printer, Problem
+
+
+def problems(start, stop):
+    return [Problem(question_stem=f"q{i}", explanation="e", concepts="c", correct_answer=str(i),
+                    json_blob='{"type": "formulaV2"}')
+            for i in range(start, stop)]
+
+
+@pytest.mark.parametrize("options", [{}, {"background_io": True}, {"problems_per_page": 3}])
+def test_print_all_twice_appends(tmp_path, options):
+    printer = Printer("Twice", output_dir=tmp_path, **options)
+    printer.print_all(problems(0, 5))
+    printer.print_all(problems(5, 10))
+    with printer.file_path_csv.open() as f:
+        rows = list(csv.DictReader(f))
+    assert [row["Atom Body"] for row in rows] == [f"q{i}" for i in range(10)]
+    if options.get("problems_per_page"):
+        pages = sorted(printer.html_pages_path.glob("*.html"))
+        assert "q9" in pages[-1].read_text()
+        assert "10 problems" in printer.file_path_html.read_text()
+    else:
+        assert "q9" in printer.file_path_html.read_text()
+
+
+def test_columnar_printer_is_single_use(tmp_path):
+    printer = Printer("Once", output_dir=tmp_path, columnar=True)
+    printer.print_all(problems(0, 2))
+    with pytest.raises(ValueError, match="new Printer"):
+        printer.print_all(problems(2, 4))
+
+
+def test_bytes_written_counts_utf8_bytes(tmp_path):
+    import instrumentation
+    problem = Problem(question_stem="\\(x \\in \\mathbb{R}\\) — ≤ π", explanation="e", concepts="c",
+                      correct_answer="1", json_blob='{"type": "formulaV2"}')
+    printer = Printer("Bytes", output_dir=tmp_path)
+    with instrumentation.enabled(instrumentation.AggregateSink()) as sink:
+        printer.print_all([problem])
+    csv_size = printer.file_path_csv.stat().st_size
+    header_size = len(printer.file_path_csv.read_bytes().split(b"\n", 1)[0]) + 1
+    assert sink.counters["printer.bytes_written csv"][1] == csv_size - header_size
@@ -0,0 +1,66 @@
+import random
+
+from problem_cache import ProblemCache
+from tools import Problem, Template, generate_problems, unique
+
+
+class Legacy(Template):
+    @unique
+    def variables(self):
+        return random.randint(1, 50)
+
+    def template(self):
+        a = self.variables()
+        return Problem(question_stem=f"q{a}", explanation="e", concepts="c", correct_answer=str(a), json_blob="{}")
+
+
+class Sampled(Template):
+    domains = {'a': range(1, 51)}
+
+    @unique
+    def variables(self):
+        return self.sample()['a']
+
+    def template(self):
+        a = self.variables()
+        return Problem(question_stem=f"q{a}", explanation="e", concepts="c", correct_answer=str(a), json_blob="{}")
+
+
+class Half:
+    """Stands in for a sympy number: it prints, but it isn't JSON."""
+
+    def __init__(self, a):
+        self.a = a
+
+    def __str__(self):
+        return f"{self.a}/2"
+
+
+class Unserialisable(Sampled):
+    def template(self):
+        a = self.variables()
+        return Problem(question_stem=f"q{a}", explanation="e", concepts="c", answer_choices=[Half(a), "x"])
+
+
+def test_round_trip(tmp_path):
+    cache = ProblemCache(tmp_path)
+    problems = generate_problems(Sampled, 0, 5, cache)
+    assert (cache.hits, cache.misses) == (0, 5)
+    assert generate_problems(Sampled, 0, 5, cache) == problems
+    assert cache.hits == 5
+    assert ProblemCache(tmp_path).get(Sampled(), 3) == problems[3]
+
+
+def test_uncacheable_templates_are_not_misses(tmp_path):
+    cache = ProblemCache(tmp_path)
+    assert cache.get(Legacy(), 0) is None
+    cache.put(Legacy(), 0, Legacy().problem(0))
+    assert (cache.hits, cache.misses, cache.size()) == (0, 0, 0)
+
+
+def test_problems_that_are_not_json_are_not_cached(tmp_path):
+    cache = ProblemCache(tmp_path)
+    problems = generate_problems(Unserialisable, 0, 3, cache)
+    assert all(isinstance(problem.answer_choices[0], Half) for problem in problems)
+    assert cache.size() == 0
+    assert cache.misses == 3
@@ -0,0 +1,64 @@
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from pythagorean import AliasTable, TripleIndex, dickson_triples, pythagorean_triples, random_pythagorean_triple
+
+
+def brute_force_triples(max_hyp):
+    return {(a, b, c) for c in range(1, max_hyp + 1) for a in range(1, c) for b in range(1, c)
+            if a * a + b * b == c * c}
+
+
+def test_dickson_triples_are_every_triple_once():
+    (triples, weights) = dickson_triples(100)
+    assert len(triples) == len(set(triples)) == len(weights)
+    assert set(triples) == brute_force_triples(100)
+
+
+def test_dickson_weights():
+    # Each r is equally likely, then each factor s of r^2 / 2, so the weights of a complete r add up to 1
+    (triples, weights) = dickson_triples(10 ** 6, max_r=24)
+    per_r = Counter()
+    for ((a, b, c), weight) in zip(triples, weights):
+        per_r[a + b - c] += weight
+    assert sorted(per_r) == list(range(2, 25, 2))
+    assert all(total == pytest.approx(1) for total in per_r.values())
+
+
+def test_alias_table():
+    table = AliasTable([1, 0, 3])
+    rng = random.Random(1)
+    counts = Counter(table.draw(rng) for _ in range(20000))
+    assert counts[1] == 0
+    assert counts[2] / counts[0] == pytest.approx(3, rel=0.1)
+
+
+def test_filter():
+    index = pythagorean_triples(100)
+    primitive = index.filter(ordered=True, primitive=True)
+    assert set(primitive) == {(a, b, c) for (a, b, c) in brute_force_triples(100) if a < b and math.gcd(a, b) == 1}
+    assert (3, 4, 5) in primitive and (6, 8, 10) not in primitive and (4, 3, 5) not in primitive
+    legs = index.filter(min_leg=10, max_leg=20, max_hyp=25)
+    assert set(legs) == {(12, 16, 20), (16, 12, 20), (15, 20, 25), (20, 15, 25)}
+    assert legs.weights == [index.weights[index.triples.index(triple)] for triple in legs]
+    with pytest.raises(ValueError):
+        index.filter(min_leg=1000)
+
+
+def test_save_and_load(tmp_path):
+    index = pythagorean_triples(200, cache_dir=tmp_path)
+    (path,) = tmp_path.glob("pythagorean_triples_200_None.json")
+    loaded = TripleIndex.load(path)
+    assert (loaded.triples, loaded.weights) == (index.triples, index.weights)
+
+
+def test_random_pythagorean_triple():
+    support = set(dickson_triples(1555, 24)[0])
+    draws = [random_pythagorean_triple(rng=random.Random(seed)) for seed in range(200)]
+    assert set(draws) <= support
+    assert all(a * a + b * b == c * c and c <= 1555 for (a, b, c) in draws)
+    assert draws == [random_pythagorean_triple(rng=random.Random(seed)) for seed in range(200)]
+    assert all(c <= 50 for (_, _, c) in (random_pythagorean_triple(50) for _ in range(100)))
@@ -0,0 +1,111 @@
+import csv
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import runner
+
+REPO = Path(__file__).resolve().parent.parent
+
+OBJECTIVE = """
+from tools import Problem, Template, unique
+
+
+class Template1(Template):
+    domains = {'a': range(1, 60)}
+
+    @unique
+    def variables(self):
+        return self.sample()['a']
+
+    def template(self):
+        a = self.variables()
+        return Problem(question_stem=f"one {a}", explanation="e", concepts="c", correct_answer=str(a), json_blob="{}")
+
+
+class Template2(Template1):
+    def template(self):
+        a = self.variables()
+        return Problem(question_stem=f"two {a}", explanation="e", concepts="c", answer_choices=[str(a), "x", "y"])
+"""
+
+
+@pytest.fixture(scope="module")
+def objective(tmp_path_factory):
+    path = tmp_path_factory.mktemp("objectives") / "runner_objective.py"
+    path.write_text(OBJECTIVE)
+    return str(path)
+
+
+def stems(summary):
+    with open(summary["csv"], newline="") as f:
+        return [row["Atom Body"] for row in csv.DictReader(f)]
+
+
+def test_load_manifest(tmp_path):
+    manifest = tmp_path / "manifest.jsonl"
+    manifest.write_text('# objectives\n\n{"module": "a"}\n{"module": "b", "mode": "quiz"}\n')
+    assert runner.load_manifest(manifest) == [{"module": "a"}, {"module": "b", "mode": "quiz"}]
+
+    manifest.write_text('{"module": "a"}\n{"count": 3}\n')
+    with pytest.raises(ValueError, match=r"manifest.jsonl:2: entry has no module"):
+        runner.load_manifest(manifest)
+    manifest.write_text('{"module": "a", "mode": "exam"}\n')
+    with pytest.raises(ValueError, match="unknown mode 'exam'"):
+        runner.load_manifest(manifest)
+
+
+def test_build(tmp_path, objective):
+    summary = runner.build({"module": objective, "templates": ["Template2", "Template1"], "count": 3,
+                            "counts": {"Template1": 2}, "learning_objective": "Runner test"}, tmp_path)
+    assert summary["problems"] == 5
+    assert Path(summary["csv"]).parent == tmp_path
+    assert [stem.split()[0] for stem in stems(summary)] == ["two"] * 3 + ["one"] * 2
+    # Each entry numbers its problems from the start, so building it again gives the same file
+    assert stems(runner.build({"module": objective, "templates": ["Template2", "Template1"], "count": 3,
+                               "counts": {"Template1": 2}, "output_dir": str(tmp_path / "again")})) == stems(summary)
+
+
+def test_build_mode_and_printer_options(tmp_path, objective):
+    summary = runner.build({"module": objective, "count": 4, "mode": "quiz", "printer": {"problems_per_page": 2}},
+                           tmp_path)
+    assert summary["csv"].endswith("runner_objective_quiz.csv")
+    assert len(stems(summary)) == 8
+    assert len(list((tmp_path / "runner_objective_quiz").glob("page_*.html"))) == 4
+
+
+def test_unknown_template(tmp_path, objective):
+    with pytest.raises(ValueError, match="no templates named Template3"):
+        runner.build({"module": objective, "templates": ["Template3"]}, tmp_path)
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_a_broken_entry_does_not_stop_the_others(tmp_path, objective, processes):
+    entries = [{"module": objective, "count": 2}, {"module": "no_such_objective"}]
+    summaries = sorted(runner.run(entries, tmp_path, processes), key=lambda s: s["module"])
+    assert "ModuleNotFoundError" in summaries[0]["error"]
+    assert summaries[1]["problems"] == 4
+
+
+def test_main(tmp_path, objective, capsys):
+    manifest = tmp_path / "manifest.jsonl"
+    manifest.write_text(f'{{"module": "{objective}", "count": 2}}\n{{"module": "{objective}", "templates": ["X"]}}\n')
+    assert runner.main([str(manifest), "--processes", "1", "--output-dir", str(tmp_path / "out")]) == 1
+    assert "1 of 2 learning objectives built." in capsys.readouterr().out
+
+
+def test_same_as_running_the_script(tmp_path):
+    name = "extend_the_power_rule_to_functions_with_rational_exponents"
+    script = tmp_path / "script" / f"{name}.py"
+    script.parent.mkdir()
+    shutil.copy(REPO / f"{name}.py", script)
+    env = dict(os.environ, PYTHONPATH=str(REPO))
+    subprocess.run([sys.executable, str(script)], env=env, check=True, capture_output=True)
+
+    summary = runner.build({"module": name}, tmp_path / "runner")
+    written = script.parent / "output" / Path(summary["csv"]).name
+    assert Path(summary["csv"]).read_text() == written.read_text()
@@ -0,0 +1,96 @@
+import itertools
+import random
+
+import pytest
+
+from tools import Problem, Sampler, SpaceExhausted, Template, permute_index, unique
+
+DOMAINS = {'a': range(-5, 6), 'b': range(1, 6), 'c': ['x', 'y']}
+CONSTRAINTS = [lambda a: a != 0, lambda a, b: a % b != 0 or b == 1]
+
+
+def valid(a, b, c):
+    return a != 0 and (a % b != 0 or b == 1)
+
+
+class Pairs(Template):
+    domains = {'a': range(1, 41), 'b': range(1, 4)}
+    constraints = [lambda a, b: a % b != 0 or b == 1]
+
+    @unique
+    def variables(self):
+        v = self.sample()
+        return v['a'], v['b']
+
+    def template(self):
+        (a, b) = self.variables()
+        return Problem(question_stem=f"q{a}/{b}", explanation="e", concepts="c", correct_answer=str(self.rng.random()),
+                       json_blob="{}")
+
+
+def test_sampler_enumerates_exactly_the_valid_combinations():
+    sampler = Sampler(DOMAINS, CONSTRAINTS)
+    expected = {(a, b, c) for (a, b, c) in itertools.product(*DOMAINS.values()) if valid(a, b, c)}
+    found = [tuple(sampler.at(position).values()) for position in range(len(sampler))]
+    assert len(found) == len(sampler) == len(expected)
+    assert set(found) == expected
+    assert list(sampler.columns(range(len(sampler)))['a']) == [a for (a, _, _) in found]
+
+
+def test_sampler_draws_valid_combinations():
+    sampler = Sampler(DOMAINS, CONSTRAINTS)
+    rng = random.Random(1)
+    draws = [sampler.draw(rng) for _ in range(200)]
+    assert all(valid(**draw) for draw in draws)
+    assert [sampler.draw(random.Random(1)) for _ in range(3)] == [draws[0]] * 3
+
+
+def test_sampler_errors():
+    with pytest.raises(ValueError, match="undeclared"):
+        Sampler({'a': range(3)}, [lambda a, z: a != z])
+    with pytest.raises(ValueError, match="No values"):
+        Sampler({'a': range(3)}, [lambda a: a > 5])
+    with pytest.raises(IndexError):
+        Sampler(DOMAINS, CONSTRAINTS).at(10 ** 6)
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 100, 1000])
+def test_permute_index_is_a_permutation(size):
+    positions = [permute_index(index, size, seed=3) for index in range(size)]
+    assert sorted(positions) == list(range(size))
+    assert positions == [permute_index(index, size, seed=3) for index in range(size)]
+
+
+def test_problems_come_from_the_index_alone():
+    template = Pairs()
+    template.restart()
+    problems = template.take(20)
+    fresh = Pairs()
+    fresh.reset()
+    assert fresh.problem(13) == problems[13]
+    assert len({problem.question_stem for problem in problems}) == 20
+
+
+def test_take_batch_gives_the_same_problems_as_take():
+    template = Pairs()
+    template.restart()
+    problems = template.take(25)
+    template.restart()
+    assert template.take_batch(25) == problems
+
+
+def test_space_exhausted():
+    template = Pairs()
+    template.restart()
+    with pytest.raises(SpaceExhausted):
+        template.take(Pairs.space_size() + 1)
+
+
+@pytest.mark.parametrize("constraint", [lambda a, b: a ** b < 10 ** 15, lambda a, b: a * 10 ** 17 * b > 0,
+                                        lambda a, b: (a & b) == 0])
+def test_numpy_masks_match_python(constraint):
+    # a ** b and a * 10 ** 17 * b overflow 64 bit integers, & can't be checked with floats
+    domains = {'a': range(1, 80), 'b': range(1, 80)}
+    expected = [(a, b) for a in domains['a'] for b in domains['b'] if constraint(a, b)]
+    sampler = Sampler(domains, [constraint])
+    assert [tuple(sampler.at(position).values()) for position in range(len(sampler))] == expected
@@ -0,0 +1,66 @@
+import sympy as sym
+
+from sympy_tools import (operator_expand, operator_expand_string, polytex, substitute, substitute_batch,
+                         substitute_unsimplified, substitute_unsimplified_multiple, substitution_template)
+
+x = sym.symbols('x')
+D = "\\frac{d}{dx}"
+
+
+def test_operator_expand_prints_terms_with_polytex():
+    poly = 3 * x ** 2 - x ** sym.Rational(1, 3) + 5 - 2 / x
+    assert operator_expand(D, poly) == (
+        f"{D} \\left( 3x^{{2}} \\right)-{D} \\left( x^{{1/3}} \\right)+{D} \\left( 5 \\right)"
+        f"-{D} \\left( 2x^{{-1}} \\right)")
+    assert polytex(x ** sym.Rational(1, 3)) in operator_expand(D, poly, pull_out_const=True)
+
+
+def test_operator_expand_rational_coefficients():
+    # sym.latex gave \\frac{5 x^{3}}{2} and \\frac{x^{2}}{3}
+    poly = sym.Rational(5, 2) * x ** 3 - sym.Rational(1, 3) * x ** 2
+    assert operator_expand(D, poly) == (
+        f"{D} \\left( \\frac{{5}}{{2}}x^{{3}} \\right)-{D} \\left( \\frac{{1}}{{3}}x^{{2}} \\right)")
+    assert operator_expand(D, poly, pull_out_const=True) == \
+        f"\\frac{{5}}{{2}}{D} \\left( x^{{3}} \\right)- \\frac{{1}}{{3}}{D} \\left( x^{{2}} \\right)"
+
+
+def test_operator_expand_keeps_each_coefficient():
+    assert operator_expand(D, 2.5 * x + x ** 4) == f"{D} \\left( x^{{4}} \\right)+{D} \\left( 2.5x \\right)"
+
+
+def test_operator_expand_string():
+    assert operator_expand_string("\\int ", x ** 2, -3 * x ** -2, end_op=" \\, dx") == \
+        "\\int \\left(x^{2}\\right) \\, dx - \\int \\left(3x^{-2}\\right) \\, dx"
+
+
+def test_substitute():
+    assert substitute(2, 3 * x ** 2 + x) == "3\\left(2\\right)^{2} + \\left(2\\right)"
+    assert substitute(sym.Rational(1, 2), 3 * x ** 2 - x, color="red") == (
+        "3\\color{red}{\\left(\\frac{1}{2}\\right)}^{2} - \\color{red}{\\left(\\frac{1}{2}\\right)}")
+    assert substitute_unsimplified(-2, 3 * x ** 2 + x / 2) == "3 \\left(-2\\right)^{2} + \\frac{\\left(-2\\right)}{2}"
+
+
+def test_substitute_puts_values_in_place_of_the_symbol_only():
+    # Replacing the text t in the printed LaTeX would also change \sqrt and \frac
+    t = sym.symbols('t')
+    assert substitute_unsimplified(4, sym.sqrt(t) + t / 3, t) == (
+        "\\sqrt{\\left(4\\right)} + \\frac{\\left(4\\right)}{3}")
+    assert substitute(4, t, t, color="teal", include_parentheses=False) == "\\color{teal}{4}"
+
+
+def test_substitute_batch():
+    poly = x ** 2 - 3 * x + sym.Rational(1, 2)
+    points = [1, -2, sym.Rational(3, 4), 0.5]
+    assert substitute_batch(points, poly) == [substitute(point, poly) for point in points]
+    assert substitution_template(poly, [x]) == "^{2} - 3 + \\frac{1}{2}"
+    assert not any("" in s for s in substitute_batch(points, poly))
+
+
+def test_substitute_unsimplified_multiple():
+    # Used to raise TypeError
+    y = sym.symbols('y')
+    colors = ["blue", "red"]
+    assert substitute_unsimplified_multiple([2, -1], x ** 2 * y + 3 * y, colors=colors) == (
+        "\\color{blue}{\\left(2\\right)}^{2} \\color{red}{\\left(-1\\right)} + 3 \\color{red}{\\left(-1\\right)}")
+    assert colors == ["blue", "red"]
+    assert substitute_batch([(1, 2), (3, 4)], x + y, (x, y), include_parentheses=False) == ["1 + 2", "3 + 4"]
@@ -0,0 +1,29 @@
+import json
+
+import validations
+from validations import cloze_blob, lea_blob
+
+
+def test_compiled_blobs_are_reused():
+    options = {"ignoreText": True, "decimalPlaces": 3}
+    first = validations._compiled_blob(validations.LeaBlob, "equivValue", None, options, None, None, None)
+    assert validations._compiled_blob(validations.LeaBlob, "equivValue", None, dict(options), None, None, None) \
+        is first
+    # 1 and True are equal, but the blobs they give aren't
+    assert validations._compiled_blob(validations.LeaBlob, "equivValue", None, dict(options, decimalPlaces=True),
+                                      None, None, None) is not first
+
+
+def test_compiled_blob_cache_is_bounded():
+    for places in range(validations._cached_blob.cache_info().maxsize + 10):
+        lea_blob("{{response}}", "x", "equivValue", options={"decimalPlaces": places})
+    info = validations.compiled_blob_cache_info()
+    assert info.currsize == info.maxsize
+
+
+def test_blobs_are_json():
+    blob = json.loads(lea_blob("{{response}}", "2x", "equivSymbolic", alternates=["x+x"], blacklist=["x"]))
+    assert blob["validation"]["valid_response"]["value"][0]["value"] == "2x"
+    blob = json.loads(cloze_blob("{{response}} {{response}}", ["1", "2"], ("equivSymbolic", "equivLiteral")))
+    assert [box[0]["method"] for box in blob["validation"]["valid_response"]["value"]] == ["equivSymbolic",
+                                                                                          "equivLiteral"]
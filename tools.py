@@ -1,10 +1,14 @@
 import csv
+import functools
+import hashlib
+import inspect
+import math
 import random
 import html
+import io
 import json
 from contextlib import contextmanager
-from collections import defaultdict
-import sympy as sym
+from collections import defaultdict, deque
 import re
 import os
 import zlib
@@ -12,12 +16,45 @@ import sys
 from itertools import islice
 from itertools import count
 from collections import OrderedDict
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, fields
 from typing import List, Any
 from pathlib import Path
-from sympy import Symbol
-from sympy.core.function import _coeff_isneg
-from sympy.printing.latex import LatexPrinter, print_latex
+from terms import Term, Polynomial, rational_latex, power_latex
+from number_theory import gcd, lcm, factors
+from pythagorean import random_pythagorean_triple, pythagorean_triples
+import instrumentation
+
+
+def __getattr__(name):
+    """
+    The helpers that need sympy (polytex, pmsign, substitute, poly_long_div, ...) live in sympy_tools and are
+    loaded the first time one of them is used as tools.<name>, so scripts that only need the pure Python helpers
+    don't pay for importing sympy.
+    """
+    if name.startswith('__'):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import sympy_tools
+    try:
+        value = getattr(sympy_tools, name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    globals()[name] = value
+    return value
+
+
+_numpy = None
+
+
+def numpy_or_none():
+    """numpy if it's installed, else None. It's imported on first use, so importing tools stays fast."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy = numpy
+    return _numpy or None
 
 
 @dataclass
@@ -52,41 +89,386 @@ class Problem:
                 "Must have answer_choices or correct_answers and incorrect_answers if json_blob is not defined"
 
 
-def unique(func):
+class SpaceExhausted(Exception):
+    """Raised by @unique when a template has run out of new variable combinations."""
+
+
+class BloomFilter:
+    """
+    A fixed-size probabilistic set. Membership tests can give false positives (a new value reported as seen)
+    but never false negatives, so memory stays constant no matter how many values are added.
+    """
+
+    def __init__(self, capacity=1000000, error_rate=0.001):
+        self.capacity = capacity
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, int(self.num_bits / capacity * math.log(2) + 0.5))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _indices(self, key):
+        digest = hashlib.blake2b(repr(key).encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def __contains__(self, key):
+        return all(self.bits[i >> 3] & (1 << (i & 7)) for i in self._indices(key))
+
+    def add(self, key):
+        for i in self._indices(key):
+            self.bits[i >> 3] |= 1 << (i & 7)
+        self.count += 1
+
+    def __len__(self):
+        return self.count
+
+
+class BoundedSet:
+    """A set that only remembers the most recently added max_size values."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.items = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self.items
+
+    def add(self, key):
+        self.items[key] = None
+        if len(self.items) > self.max_size:
+            self.items.popitem(last=False)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def canonical_key(value):
+    """
+    Returns a hashable key for value. Lists, sets and dicts are converted to tuples and frozensets,
+    and anything else that can't be hashed (such as a sympy Matrix) falls back to its repr.
+    """
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        pass
+    if isinstance(value, (list, tuple)):
+        return tuple(canonical_key(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(canonical_key(v) for v in value)
+    if isinstance(value, dict):
+        return frozenset((canonical_key(k), canonical_key(v)) for (k, v) in value.items())
+    return f'{type(value).__name__}:{value!r}'
+
+
+PROBLEM_FIELDS = [f.name for f in fields(Problem)]
+
+
+def unique(func=None, *, max_tries=1000, max_duplicates=100, space=None, max_seen=None, bloom=False):
     """
     This is a function decorator. Use it when defining your variables to ensure that they are unique and
     satisfy any of the assertions you make.
+
+    It can be used bare (@unique) or with options, e.g. @unique(space=500, bloom=True)
+    :param max_tries: the number of failed assertions allowed before giving up
+    :param max_duplicates: the number of duplicate draws allowed in a single call before the space is considered used up
+    :param space: the number of possible distinct return values, if known. Used to report coverage and to stop
+    as soon as every value has been returned.
+    :param max_seen: only remember this many previous values (older ones may be repeated)
+    :param bloom: remember previous values in a Bloom filter instead of a set. Pass an int to set its capacity.
+    A small fraction of new values will be rejected as false positives.
     """
-    seen = []
+    if func is None:
+        return lambda f: unique(f, max_tries=max_tries, max_duplicates=max_duplicates, space=space,
+                                max_seen=max_seen, bloom=bloom)
+
+    def new_seen():
+        if bloom:
+            return BloomFilter(capacity=bloom if bloom is not True else 1000000)
+        if max_seen:
+            return BoundedSet(max_seen)
+        return set()
+
+    seen = new_seen()
+    stats = {"accepted": 0, "duplicates": 0, "failed_assertions": 0}
+
+    def reset():
+        """Forgets every value returned so far."""
+        nonlocal seen
+        seen = inner.seen = new_seen()
+        stats.update(accepted=0, duplicates=0, failed_assertions=0)
+
+    def coverage():
+        """Fraction of the variable space used so far. Estimated from the duplicate rate if space is unknown."""
+        if space:
+            return min(1.0, stats["accepted"] / space)
+        draws = stats["accepted"] + stats["duplicates"]
+        return stats["duplicates"] / draws if draws else 0.0
 
     def inner(*args, **kwargs):
+        if space and stats["accepted"] >= space:
+            raise SpaceExhausted(f"{func.__qualname__}: all {space} combinations of variables have been used.")
+
         tries = 0
+        duplicates = 0
         while True:
-            tries += 1
-            if tries > 1000:
-                raise Exception("Tried to get unique arguments too many times and failed.")
-
             try:
                 res = func(*args, **kwargs)
-                if res not in seen:
-                    seen.append(res)
-                    return res
             except AssertionError:
+                stats["failed_assertions"] += 1
+                tries += 1
+                if tries >= max_tries:
+                    raise Exception("Tried to get unique arguments too many times and failed.")
                 continue
 
+            key = canonical_key(res)
+            if key not in seen:
+                seen.add(key)
+                stats["accepted"] += 1
+                if instrumentation.active:
+                    instrumentation.count("unique.retries", tries + duplicates, function=func.__qualname__)
+                return res
+
+            stats["duplicates"] += 1
+            duplicates += 1
+            if duplicates >= max_duplicates:
+                raise SpaceExhausted(f"{func.__qualname__}: variable space exhausted after {stats['accepted']} "
+                                     f"unique values ({duplicates} duplicate draws without a new one).")
+
+    inner.seen = seen
+    inner.stats = stats
+    inner.coverage = coverage
+    inner.reset = reset
+    functools.update_wrapper(inner, func)
     return inner
 
 
+def non_zero_range(n, m=None):
+    """The values non_zero_select(n, m) can return, as a list. Useful for declaring Template domains."""
+    if n == 0 and not m:
+        return [0]
+    if m:
+        if n * m > 0:
+            return list(range(n, m + 1))
+        return list(range(n, 0)) + list(range(1, m + 1))
+    else:
+        return list(range(-n, 0)) + list(range(1, n + 1))
+
+
+class Sampler:
+    """
+    Draws variables uniformly from the combinations that satisfy every constraint, so no draw is ever rejected.
+
+    Variables that are linked by a constraint (directly or through other variables) are enumerated together,
+    pruning as soon as a constraint's arguments are all bound. Unlinked groups are enumerated separately and
+    combined at draw time, so the full cartesian product is never built.
+
+    With numpy installed, numeric domains are enumerated as arrays and each constraint is applied as a mask over
+    all the candidates at once. That works for constraints written with comparisons, arithmetic, & and |, e.g.
+    lambda b, c: (b != 0) | (c != 0). Constraints that can't take arrays (and, or, not, if, math.gcd, ...) are
+    checked one row at a time instead, so they give the same result, only slower. Integer constraints that overflow
+    64 bits are noticed and worked out again with Python ints (see _constraint_mask).
+    :param domains: dict mapping each variable name to the values it can take
+    :param constraints: predicates whose argument names are variable names, e.g. lambda a, b: a != b
+    """
+
+    def __init__(self, domains, constraints=()):
+        self.domains = OrderedDict((name, list(values)) for (name, values) in domains.items())
+        self.constraints = [(predicate, list(inspect.signature(predicate).parameters)) for predicate in constraints]
+        for (predicate, names) in self.constraints:
+            unknown = [name for name in names if name not in self.domains]
+            if unknown:
+                raise ValueError(f"Constraint uses undeclared variables: {', '.join(unknown)}")
+
+        self.components = [(names, self._enumerate(names)) for names in self._group()]
+        for (names, rows) in self.components:
+            if not rows:
+                raise ValueError(f"No values of {', '.join(names)} satisfy the constraints.")
+
+    def _group(self):
+        """Splits the variables into groups that are linked by constraints."""
+        groups = [[name] for name in self.domains]
+        for (_, names) in self.constraints:
+            linked = [g for g in groups if any(name in g for name in names)]
+            merged = [name for g in linked for name in g]
+            groups = [g for g in groups if g not in linked] + [merged]
+        order = list(self.domains)
+        return sorted((sorted(g, key=order.index) for g in groups), key=lambda g: order.index(g[0]))
+
+    def _enumerate(self, names):
+        """All valid assignments of the variables in names, as tuples in the same order."""
+        checks = [[] for _ in names]
+        for (predicate, args) in self.constraints:
+            if args and all(arg in names for arg in args):
+                checks[max(names.index(arg) for arg in args)].append((predicate, args))
+
+        np = numpy_or_none()
+        if np and all(_numeric_array(np, self.domains[name]) is not None for name in names):
+            return self._enumerate_arrays(np, names, checks)
+
+        rows = [{}]
+        for (name, predicates) in zip(names, checks):
+            extended = []
+            for row in rows:
+                for value in self.domains[name]:
+                    candidate = dict(row, **{name: value})
+                    if all(predicate(*[candidate[arg] for arg in args]) for (predicate, args) in predicates):
+                        extended.append(candidate)
+            rows = extended
+        return [tuple(row[name] for name in names) for row in rows]
+
+    def _enumerate_arrays(self, np, names, checks):
+        """_enumerate with numpy. Gives the same rows in the same order."""
+        columns = {}
+        num_rows = 1
+        for (name, predicates) in zip(names, checks):
+            values = _numeric_array(np, self.domains[name])
+            # Every row so far extended by every value, in the same order as the nested loops in _enumerate
+            columns = {other: np.repeat(column, len(values)) for (other, column) in columns.items()}
+            columns[name] = np.tile(values, num_rows)
+            num_rows *= len(values)
+            if num_rows == 0:
+                break
+            mask = np.ones(num_rows, dtype=bool)
+            for (predicate, args) in predicates:
+                mask &= _constraint_mask(np, predicate, [columns[arg] for arg in args])
+            columns = {other: column[mask] for (other, column) in columns.items()}
+            num_rows = len(columns[name])
+        if num_rows == 0:
+            return []
+        return list(zip(*[columns[name].tolist() for name in names]))
+
+    def __len__(self):
+        """The number of valid combinations of variables."""
+        size = 1
+        for (_, rows) in self.components:
+            size *= len(rows)
+        return size
+
+    def at(self, position):
+        """The valid assignment at position (0 <= position < len(self)) in a fixed enumeration order."""
+        if not 0 <= position < len(self):
+            raise IndexError(f"Position {position} is outside a space of {len(self)} combinations.")
+        values = {}
+        for (names, rows) in reversed(self.components):
+            position, i = divmod(position, len(rows))
+            values.update(zip(names, rows[i]))
+        return {name: values[name] for name in self.domains}
+
+    def draw(self, rng=random):
+        """A uniformly random valid assignment, as a dict in the order the domains were declared."""
+        values = {}
+        for (names, rows) in self.components:
+            values.update(zip(names, rng.choice(rows)))
+        return {name: values[name] for name in self.domains}
+
+    def columns(self, positions):
+        """
+        The assignments at many positions at once, as a dict mapping each variable to the column of its values.
+        The columns are numpy arrays when numpy is installed and the space fits in 64 bits, otherwise lists.
+        columns(positions)[name][i] == at(positions[i])[name]
+        """
+        np = numpy_or_none()
+        if np is None or len(self) >= 1 << 63:
+            rows = [self.at(position) for position in positions]
+            return {name: [row[name] for row in rows] for name in self.domains}
+
+        positions = np.array(positions, dtype=np.int64)
+        if len(positions) and (positions.min() < 0 or positions.max() >= len(self)):
+            raise IndexError(f"Positions must be within a space of {len(self)} combinations.")
+        if '_arrays' not in self.__dict__:
+            self._arrays = [np.array(rows, dtype=object) for (_, rows) in self.components]
+        columns = {}
+        for ((names, rows), array) in zip(reversed(self.components), reversed(self._arrays)):
+            positions, i = np.divmod(positions, len(rows))
+            selected = array[i]
+            for (j, name) in enumerate(names):
+                columns[name] = selected[:, j]
+        return {name: columns[name] for name in self.domains}
+
+
+def _numeric_array(np, values):
+    """values as a 1-D numpy array if they're all ints or all floats, else None."""
+    if not values or {type(v) for v in values} not in ({int}, {float}):
+        return None
+    array = np.array(values)
+    return array if array.ndim == 1 and array.dtype.kind in 'biuf' else None
+
+
+def _constraint_mask(np, predicate, arrays):
+    """
+    predicate applied to columns of candidates, as a boolean mask. Falls back to checking one row at a time.
+    Integer arithmetic in numpy wraps around on overflow without an error (e.g. in a ** b < n), so a mask worked out
+    on integers is checked against the same predicate on floats, which don't. If they disagree, the predicate is
+    applied again to the candidates as Python ints, which are exact.
+    """
+    mask = _vector_mask(np, predicate, arrays)
+    if mask is not None and any(array.dtype.kind in 'iu' for array in arrays):
+        check = _vector_mask(np, predicate, [array.astype(np.float64) for array in arrays])
+        if check is None or not np.array_equal(mask, check):
+            mask = _vector_mask(np, predicate, [array.astype(object) for array in arrays])
+    if mask is not None:
+        return mask
+    rows = zip(*[array.tolist() for array in arrays])
+    return np.fromiter((bool(predicate(*row)) for row in rows), dtype=bool, count=len(arrays[0]))
+
+
+def _vector_mask(np, predicate, arrays):
+    """predicate applied to whole columns, or None if it can't take arrays."""
+    try:
+        with np.errstate(all='raise'):
+            mask = predicate(*arrays)
+        if isinstance(mask, np.ndarray) and mask.dtype == object:
+            mask = mask.astype(bool)  # Python ints give arrays of Python bools
+        if isinstance(mask, np.ndarray) and mask.dtype == bool and mask.shape == arrays[0].shape:
+            return mask
+    except (TypeError, ValueError, ArithmeticError):
+        pass
+    return None
+
+
+def permute_index(index, size, seed):
+    """
+    Maps index to a position in range(size) such that every index below size gets a different position, in an
+    order that looks random and is fixed by seed. Uses a four round Feistel network and cycle walking, so it takes
+    O(1) time and memory no matter how large size is.
+    """
+    half = max(1, ((size - 1).bit_length() + 1) // 2)
+    mask = (1 << half) - 1
+    keys = [f'{seed}:{i}'.encode()[:64] for i in range(4)]
+    position = index
+    while True:
+        left, right = position >> half, position & mask
+        for key in keys:
+            digest = hashlib.blake2b(right.to_bytes(16, 'little'), digest_size=16, key=key).digest()
+            left, right = right, left ^ (int.from_bytes(digest, 'little') & mask)
+        position = (left << half) | right
+        if position < size:
+            return position
+
+
 class Template:
     """Template class for creating assessment templates."""
 
+    domains = None
+    constraints = ()
+
     def __init__(self):
         name = self.__module__
-        if name == '__main__':
+        # A script's templates are in __main__, or __mp_main__ in the workers of a spawned pool. Both are named
+        # after the file, so the seed is the same either way.
+        if name in ('__main__', '__mp_main__'):
             filename = sys.modules[self.__module__].__file__
             name = os.path.splitext(os.path.basename(filename))[0]
+        self._module = name
         self._seed = zlib.crc32(f'{name}:{self.__class__.__name__}'.encode())
         self.__class__._counters = getattr(self.__class__, '_counters', defaultdict(count))
+        self._indices = self.__class__._counters[self._seed]
+        self.rng = random.Random(self._seed)
+        self.index = None
+        self._first_sample = False
+        self._batch_sample = None
 
     def __getattribute__(self, name):
         attr = object.__getattribute__(self, name)
@@ -95,12 +477,64 @@ class Template:
     def variables(self):
         raise NotImplementedError()
 
+    @classmethod
+    def sampler(cls):
+        """
+        The Sampler built from the class's domains and constraints. It is built once per class.
+        Declare them on the class and call self.sample() from variables(), for example
+            domains = {'a': non_zero_range(-10, 10), 'b': range(2, 10)}
+            constraints = [lambda a: a != 1, lambda a, b: a % b != 0]
+        """
+        if '_sampler' not in cls.__dict__:
+            if cls.domains is None:
+                raise NotImplementedError(f"{cls.__name__} does not declare any domains.")
+            cls._sampler = Sampler(cls.domains, cls.constraints)
+        return cls._sampler
+
+    @classmethod
+    def space_size(cls):
+        """The number of valid combinations of variables."""
+        return len(cls.sampler())
+
+    def sample(self):
+        """
+        Draws a valid assignment of the declared variables as a dict.
+        The first sample of problem k is the k-th position of a permutation of the whole space, so problems never
+        repeat each other and any one of them can be regenerated on its own. Any further samples in the same problem
+        (e.g. retries by @unique) are drawn from self.rng.
+        """
+        sampler = self.sampler()
+        if self._first_sample:
+            self._first_sample = False
+            if self._batch_sample is not None:
+                sample, self._batch_sample = self._batch_sample, None
+                return sample
+            if self.index >= len(sampler):
+                raise SpaceExhausted(f"{type(self).__name__}: all {len(sampler)} combinations of variables "
+                                     f"have been used.")
+            return sampler.at(permute_index(self.index, len(sampler), self._seed))
+        return sampler.draw(self.rng)
+
     def template(self):
         raise NotImplementedError()
 
-    def __call__(self):
+    def problem(self, index):
+        """
+        Generates problem number index of this template. self.rng is reseeded from Template._seed and index, so
+        the result doesn't depend on any problems generated before it. (Call reset() first to regenerate a problem
+        this process has already generated, or @unique will reject it as a duplicate.)
+        """
+        self.index = index
+        self.rng.seed(f'{self._seed}:{index}')
+        self._first_sample = True
+        if instrumentation.active:
+            with instrumentation.timer("template", template=type(self).__name__):
+                return self.template()
         return self.template()
 
+    def __call__(self):
+        return self.problem(next(self._indices))
+
     def __iter__(self):
         while True:
             yield self()
@@ -108,13 +542,133 @@ class Template:
     def take(self, num_problems):
         return list(islice(self, num_problems))
 
+    def stream(self, num_problems):
+        """Like take, but yields the problems one at a time instead of building a list."""
+        return islice(self, num_problems)
+
+    def reserve(self, num_problems):
+        """Takes the next num_problems problem indices, as a range, so that self() won't use them."""
+        if num_problems < 1:
+            return range(0)
+        start = next(self._indices)
+        deque(islice(self._indices, num_problems - 1), maxlen=0)
+        return range(start, start + num_problems)
+
+    def sample_batch(self, indices):
+        """
+        The first sample() of each of the problems in indices, drawn together, as a dict mapping each variable to
+        a column of values (numpy arrays if numpy is installed, see Sampler.columns).
+        """
+        sampler = self.sampler()
+        size = len(sampler)
+        if len(indices) and max(indices) >= size:
+            raise SpaceExhausted(f"{type(self).__name__}: all {size} combinations of variables have been used.")
+        return sampler.columns([permute_index(index, size, self._seed) for index in indices])
+
+    def take_batch(self, num_problems):
+        """
+        Like take, for templates that declare domains. The variables of all the problems are sampled in one go,
+        and each template() call gets its row from sample() ready-made. Gives the same problems as take.
+        """
+        indices = self.reserve(num_problems)
+        columns = self.sample_batch(indices)
+        values = [column.tolist() if hasattr(column, 'tolist') else column for column in columns.values()]
+        problems = []
+        try:
+            for (index, row) in zip(indices, zip(*values)):
+                self._batch_sample = dict(zip(columns, row))
+                problems.append(self.problem(index))
+        finally:
+            self._batch_sample = None
+        return problems
+
+    def reset(self):
+        """Forgets the variables already returned by this template's @unique methods."""
+        for klass in type(self).__mro__:
+            for attr in vars(klass).values():
+                if callable(getattr(attr, 'reset', None)) and hasattr(attr, 'seen'):
+                    attr.reset()
+
+    def restart(self):
+        """
+        Like reset, and numbers problems from 0 again, so the next problems are the same as in a fresh process.
+        Every instance of the template shares the numbering, so this restarts it for all of them.
+        """
+        self.reset()
+        self._indices = type(self)._counters[self._seed] = count()
+
+
+def find_templates(module):
+    """The Template subclasses defined in module, in the order they're defined."""
+    classes = [cls for (_, cls) in inspect.getmembers(module, inspect.isclass)
+               if issubclass(cls, Template) and cls is not Template and cls.__module__ == module.__name__]
+    return sorted(classes, key=lambda cls: inspect.getsourcelines(cls)[1])
+
+
+def generate_problems(template_class, start, stop, cache=None):
+    """
+    Generates problems start, ..., stop - 1 of template_class, starting from an empty @unique history.
+    Used by Printer.print_all to generate problems in worker processes.
+    The random module is never seeded here: each problem draws from the template's own self.rng, seeded from
+    Template._seed and the index. So generating problems in this process doesn't change the Printer's answer
+    shuffles, and the files are the same whatever the number of processes.
+    :param cache: a ProblemCache. Problems found in it aren't generated again, and new ones are added to it.
+    """
+    template = template_class()
+    template.reset()
+    return _generate(template, start, stop, cache)
+
+
+def _generate(template, start, stop, cache=None):
+    """Problems start, ..., stop - 1 of template, keeping its @unique history."""
+    if cache is None:
+        return [template.problem(index) for index in range(start, stop)]
+    problems = []
+    for index in range(start, stop):
+        problem = cache.get(template, index)
+        if problem is None:
+            problem = template.problem(index)
+            cache.put(template, index, problem)
+        problems.append(problem)
+    return problems
+
+
+def _csv_line(fieldnames, row):
+    """row as the line Printer's csv.DictWriter writes for it."""
+    line = io.StringIO()
+    csv.DictWriter(line, fieldnames, lineterminator="\n").writerow(row)
+    return line.getvalue()
+
 
 class Printer:
     """
     Printer class for printing assessment templates.
+
+    The CSV and HTML files are held open with large buffers for the whole run. Use it as a context manager, or call
+    print_all (or finish_html_file) at the end, so the files are finished and closed:
+        with Printer("Learning objective") as printer:
+            printer.print(problem)
+    Printing more problems after that (e.g. a second print_all) reopens the files and appends to them. Paged HTML
+    continues on a new page. A Printer with columnar output can't be reopened.
+    :param buffer_size: size in bytes of each file's write buffer
+    :param flush_every: flush both files after this many problems. By default they are only flushed when the buffers
+    fill up and on close.
+    :param columnar: also write the rows to a typed, columnar file (Parquet if pyarrow is installed), see columnar.py
+    :param output_dir: the folder the files are written to, ./output by default
+    :param background_io: write the files from a background thread, so generating problems doesn't wait on the disk
+    (see background_writer.py). Pass an int to set how many writes can be queued before print_problems blocks. The
+    files are the same either way.
+    :param problems_per_page: split the HTML preview into pages of this many problems. The pages go in a folder next
+    to the CSV, and the usual HTML file becomes an index linking to them. Each page only typesets the math of the
+    problems scrolled into view, and keeps its Learnosity JSON in a side .js file instead of inlining it escaped
+    in every form. By default all problems go in the one HTML file.
+    :param check_answers: check each problem's Learnosity JSON with answer_check.check_blob before it's written, and
+    raise a ValueError if its correct answer fails its own validation or a blacklisted answer passes it
     """
 
-    def __init__(self, learning_objective, is_algo=False, is_quiz=False, is_formative=False):
+    def __init__(self, learning_objective, is_algo=False, is_quiz=False, is_formative=False,
+                 buffer_size=1 << 20, flush_every=None, columnar=False, problems_per_page=None, output_dir=None,
+                 background_io=False, check_answers=False):
 
         self.learning_objective = learning_objective
         self._LO_name = self.learning_objective.lower().replace(" ", "_").replace(",", "")
@@ -129,11 +683,12 @@ class Printer:
         else:
             self._quiz = ""
 
-        output_path = Path('.') / 'output'
-        output_path.mkdir(exist_ok=True)
+        output_path = Path(output_dir) if output_dir is not None else Path('.') / 'output'
+        output_path.mkdir(parents=True, exist_ok=True)
 
         self.file_path_csv = output_path / '{}{}.csv'.format(self._LO_name, self._quiz)
         self.file_path_html = output_path / '{}{}.html'.format(self._LO_name, self._quiz)
+        self.html_pages_path = output_path / '{}{}'.format(self._LO_name, self._quiz)
 
         self.row = OrderedDict([
             ("Module URL", ""),
@@ -162,18 +717,104 @@ class Printer:
             ("License", "CC_BY_NC_ND"),
         ])
 
-        with self.file_path_csv.open('w') as f:
-            w = csv.DictWriter(f, self.row.keys(), lineterminator="\n")
-            w.writeheader()
-        self.start_html_file()
+        self._buffer_size = buffer_size
+        self._flush_every = flush_every
+        self._num_printed = 0
+        self._problems_per_page = problems_per_page
+        self._pages = []  # (file name, first problem, last problem) of each HTML page
+        self._html_position = 0  # problems written to the HTML so far. Problem numbers can repeat (is_algo).
+        self._learnosity_file = None
+
+        self._background_io = background_io
+        self._writer = None
+        self._csv_file = self._csv_writer = self._html_file = None
+        self._open_files()
+
+        self._check_blob = None
+        if check_answers:
+            from answer_check import check_blob
+            self._check_blob = check_blob
+
+        self._columnar = None
+        self._columnar_path = output_path / '{}{}'.format(self._LO_name, self._quiz) if columnar else None
+        if columnar:
+            from columnar import ColumnarWriter
+            self._columnar = ColumnarWriter(self._columnar_path, self.row.keys())
+
+    def _open(self, path, mode='w'):
+        if self._writer:
+            return self._writer.open(path, mode, buffering=self._buffer_size)
+        return path.open(mode, buffering=self._buffer_size)
+
+    def _open_files(self, reopen=False):
+        """
+        Opens the CSV and HTML files. With reopen, for printing again after the files were finished, the CSV and the
+        HTML file are appended to, and with problems_per_page a new page is started.
+        """
+        if self._background_io:
+            from background_writer import BackgroundWriter
+            self._writer = BackgroundWriter(self._background_io if self._background_io is not True else 1024)
+
+        self._csv_file = self._open(self.file_path_csv, 'a' if reopen else 'w')
+        self._csv_writer = csv.DictWriter(self._csv_file, self.row.keys(), lineterminator="\n")
+        if not reopen:
+            self._csv_writer.writeheader()
+            self.start_html_file()
+        elif self._problems_per_page:
+            self._start_html_page()
+        else:
+            self._html_file = self._open(self.file_path_html, 'a')
+
+    def __enter__(self):
+        return self
 
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._html_file:
+            self.finish_html_file()
+        self.close()
+
+    def flush(self):
+        """Writes any buffered output to the files."""
+        for f in (self._csv_file, self._html_file, self._learnosity_file):
+            if f:
+                f.flush()
+
+    def close(self):
+        """
+        Closes the output files without finishing the HTML file. Every file is closed even if one of them fails
+        (e.g. the background writer failed), and then the first error is raised.
+        """
+        error = None
+        for f in (self._csv_file, self._html_file, self._learnosity_file, self._columnar, self._writer):
+            try:
+                if f:
+                    f.close()
+            except Exception as e:
+                error = error or e
+        self._csv_file = self._csv_writer = self._html_file = self._learnosity_file = self._columnar = None
+        self._writer = None
+        if error:
+            raise error
+
+    @instrumentation.timed("print_problems")
     def print_problems(self, question_stem, explanation, concepts,
                        correct_answer=None, json_blob=None,
                        answer_choices=None, correct_answers=None, incorrect_answers=None,
                        number_of_correct=1, shuffle=True, sort_answers=False, correct_answer_index=None):
 
+        if self._csv_file is None:
+            if self._columnar_path:
+                raise ValueError("This Printer's files are finished, and columnar output can't be appended to. "
+                                 "Use a new Printer.")
+            self._open_files(reopen=True)
+
         problem_number = next(self._count)
 
+        if self._check_blob and json_blob:
+            issues = self._check_blob(json_blob)
+            if issues:
+                raise ValueError(f"Problem {problem_number} of {self.learning_objective}: {'; '.join(issues)}")
+
         row = self.row.copy()
 
         row["Concepts"] = concepts
@@ -225,33 +866,98 @@ class Printer:
         if correct_answer:
             row["Correct Answer"] = correct_answer
 
-        with self.file_path_csv.open('a') as f:
-            w = csv.DictWriter(f, row.keys(), lineterminator="\n")
-            w.writerow(row)
+        if instrumentation.active:
+            line = _csv_line(self.row.keys(), row)
+            self._csv_file.write(line)
+            instrumentation.count("printer.bytes_written", len(line.encode("utf-8")), file="csv")
+        else:
+            self._csv_writer.writerow(row)
+        if self._columnar:
+            self._columnar.write_row(problem_number, row)
 
         self.print_problem_to_html(problem_number, question_stem, explanation, correct_answer,
                                    concepts, json_blob, answer_choices)
 
+        self._num_printed += 1
+        if self._flush_every and self._num_printed % self._flush_every == 0:
+            self.flush()
+
     def print(self, problem):
         if isinstance(problem, Problem):
-            self.print_problems(**asdict(problem))
+            # A shallow copy of the fields; asdict would deep copy every string
+            self.print_problems(**{name: getattr(problem, name) for name in PROBLEM_FIELDS})
         else:
             self.print_problems(**problem)
 
-    def print_all(self, *problem_iterables):
-        for problems in problem_iterables:
-            if self._quiz == "_algo":
-                self._count = count(1)
-            if isinstance(problems, tuple) and len(problems) == 2:
-                problems, num_problems = problems
-                for problem in islice(problems, num_problems):
-                    self.print(problem)
-            else:
-                try:
-                    for problem in problems:
+    def print_all(self, *problem_iterables, processes=None, cache=None):
+        """
+        Prints every problem in problem_iterables. Each one can be a Problem, an iterable of Problems, or a tuple
+        (iterable, num_problems), e.g. (Template1(), 20). Problems are generated and written one at a time, so pass
+        templates rather than lists from Template.take to keep memory use flat.
+
+        If processes is given, (Template, num_problems) tuples are split into chunks of problem indices and generated
+        in a pool of that many worker processes. Since each problem is seeded from Template._seed and its index,
+        the problems are the same as a serial run and are printed in the same order. Only templates that declare
+        domains are split up: each worker starts from an empty @unique history, which only templates whose variables
+        come from self.sample() don't depend on. Other templates (e.g. ones that draw from the random module) are
+        generated here, one problem at a time, as without processes.
+        That holds as long as variables() gives different values for different samples, so @unique never rejects the
+        first sample of a problem. If two samples can give the same values (e.g. variables() returns a * b), a serial
+        run rejects the second one and draws again, but a worker that didn't see the first one keeps it.
+
+        If cache (a ProblemCache) is given, (Template, num_problems) tuples are looked up in it first, so only the
+        problems of templates that changed since the last run are generated again. As with processes, this is only
+        done for templates that declare domains; the others are always generated.
+        """
+        jobs = {}
+        if processes or cache is not None:
+            for (i, problems) in enumerate(problem_iterables):
+                if isinstance(problems, tuple) and len(problems) == 2 and isinstance(problems[0], Template):
+                    template, num_problems = problems
+                    if num_problems < 1 or type(template).domains is None:
+                        continue
+                    start = template.reserve(num_problems).start
+                    chunk_size = max(1, min(100, -(-num_problems // (4 * (processes or 1)))))
+                    jobs[i] = [(template, j, min(j + chunk_size, start + num_problems))
+                               for j in range(start, start + num_problems, chunk_size)]
+
+        pool = None
+        if jobs and processes and processes > 1:
+            import multiprocessing  # only needed here, so it isn't imported at start up
+            pool = multiprocessing.Pool(processes)
+        queued = iter([(type(template), start, stop, cache) for chunks in jobs.values()
+                       for (template, start, stop) in chunks])
+        pending = deque()
+        try:
+            for (i, problems) in enumerate(problem_iterables):
+                if self._quiz == "_algo":
+                    self._count = count(1)
+                if i in jobs:
+                    for chunk in jobs[i]:
+                        if pool:
+                            # Keep the workers busy without holding more than 2 * processes chunks in memory
+                            pending.extend(pool.apply_async(generate_problems, c)
+                                           for c in islice(queued, 2 * processes - len(pending)))
+                            problems = pending.popleft().get()
+                        else:
+                            # In this process the template keeps its @unique history from chunk to chunk
+                            problems = _generate(*chunk, cache)
+                        for problem in problems:
+                            self.print(problem)
+                elif isinstance(problems, tuple) and len(problems) == 2:
+                    problems, num_problems = problems
+                    for problem in islice(problems, num_problems):
                         self.print(problem)
-                except TypeError:
-                    self.print(problems)
+                else:
+                    try:
+                        for problem in problems:
+                            self.print(problem)
+                    except TypeError:
+                        self.print(problems)
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
         self.finish_html_file()
 
     def start_html_file(self):
@@ -259,8 +965,17 @@ class Printer:
         Opens new HTML file and begins writing to it. Writes style information, mathjax scripts for
         rendering math, and begins the left-side div that will contain all question summaries.
         """
-        with self.file_path_html.open('w') as f:
-            f.write("""
+        if self._problems_per_page:
+            self.html_pages_path.mkdir(exist_ok=True)
+            self._start_html_page()
+            return
+        self._html_file = self._open(self.file_path_html)
+        self._html_file.write(self._html_head())
+
+    @staticmethod
+    def _html_head(scripts=""):
+        """Everything up to the left-side div. scripts is added before the mathjax scripts."""
+        return """
             <html>
             <head> 
             <style>
@@ -297,37 +1012,94 @@ class Printer:
                 .learnosity-form {text-align:center;}
                 .learnosity-button {margin-left:auto; margin-right:auto;}
             </style>
-            """ + mathjax_scripts + """
+            """ + scripts + mathjax_scripts + """
             <script src="https://www.desmos.com/api/v1.3/calculator.js?apiKey=dcb31709b452b1cf9dc26972add0fda6"></script>
             </head>
             <body>
             <div class="left-panel", style='display: inline-block; float: left;'>
-            """)
+            """
+
+    def _start_html_page(self):
+        """Opens the next HTML page and its Learnosity .js file."""
+        page = len(self._pages) + 1
+        name = f'page_{page:03d}'
+        self._pages.append((f'{name}.html', self._html_position + 1, self._html_position))
+        self._html_file = self._open(self.html_pages_path / f'{name}.html')
+        self._learnosity_file = self._open(self.html_pages_path / f'{name}.js')
+        self._learnosity_file.write('var learnosity = {};\n')
+
+        self._html_file.write(self._html_head(lazy_typeset_config + f'<script src="{name}.js"></script>\n'))
+        self._html_file.write(self._html_page_links(page))
+
+    def _html_page_links(self, page):
+        index = f'<a href="../{self.file_path_html.name}">All pages</a>'
+        previous = f'<a href="{self._pages[page - 2][0]}">Previous page</a> | ' if page > 1 else ''
+        return f'<p> {previous}{index} </p> \n'
+
+    def _finish_html_page(self, has_next=False):
+        name, first, _ = self._pages[-1]
+        self._pages[-1] = (name, first, self._html_position)
+        if has_next:
+            self._html_file.write(f'<p> <a href="page_{len(self._pages) + 1:03d}.html">Next page</a> </p> \n')
+        self._html_file.write('</div> \n')
+        self._html_file.write(html_right_panel)
+        self._html_file.write(lazy_typeset_script)
+        self._html_file.write('</body></html>')
+        for f in (self._html_file, self._learnosity_file):
+            f.close()
+        self._html_file = self._learnosity_file = None
+
+    def _write_html_index(self):
+        """Writes the index of the HTML pages to file_path_html."""
+        links = ''.join(f'<li><a href="{self.html_pages_path.name}/{name}">Problems {first} to {last}</a></li> \n'
+                        for (name, first, last) in self._pages)
+        self.file_path_html.write_text(f"""
+            <html>
+            <head> <title>{html.escape(self.learning_objective)}</title> </head>
+            <body>
+            <h2> {html.escape(self.learning_objective)} </h2>
+            <p> {self._html_position} problems </p>
+            <ol>
+            {links}</ol>
+            </body></html>""")
 
     def print_problem_to_html(self, problem_number: int, question_stem: str, explanation: str,
                               correct_answer: str, concepts: str, learnosity_json: any = None,
                               answer_choices: str = None):
         """Prints this question to output HTML file."""
-
-        with self.file_path_html.open('a') as f:
-            f.write(f'<h2> Problem {problem_number} </h2> \n')
-            f.write(f'<p> <b>Concept(s):</b> {concepts} </p> \n')
-            f.write(f'<h3> Question Stem </h3> \n')
-            f.write(f'<p> {question_stem} </p> \n')
-            if answer_choices:
-                f.write('<h3> Answer Choices </h3> \n <ol type="A">')
-                for choice in answer_choices:
-                    f.write(f'<li>{choice}</li> \n')
-                f.write('</ol>')
-            f.write(f'<h3> Explanation </h3> \n')
-            f.write(f'<p> {explanation} </p> \n')
-            f.write(f'<h3> Correct Answer </h3> \n')
-            f.write(f'<p> {correct_answer} </p> \n')
-
-            # If learnosity question, provide a button that can be clicked to preview the
-            # Learnosity in iframe on right side of page.
-            if learnosity_json:
-                f.write("""
+        if self._problems_per_page and self._html_position - self._pages[-1][1] + 1 >= self._problems_per_page:
+            self._finish_html_page(has_next=True)
+            self._start_html_page()
+        self._html_position += 1
+
+        parts = [f'<h2> Problem {problem_number} </h2> \n',
+                 f'<p> <b>Concept(s):</b> {concepts} </p> \n',
+                 f'<h3> Question Stem </h3> \n',
+                 f'<p> {question_stem} </p> \n']
+        if answer_choices:
+            parts.append('<h3> Answer Choices </h3> \n <ol type="A">')
+            parts.extend(f'<li>{choice}</li> \n' for choice in answer_choices)
+            parts.append('</ol>')
+        parts += [f'<h3> Explanation </h3> \n',
+                  f'<p> {explanation} </p> \n',
+                  f'<h3> Correct Answer </h3> \n',
+                  f'<p> {correct_answer} </p> \n']
+
+        # If learnosity question, provide a button that can be clicked to preview the
+        # Learnosity in iframe on right side of page.
+        if learnosity_json and self._problems_per_page:
+            # The JSON goes in the page's .js file as is, and is copied into the form when it's submitted
+            if not isinstance(learnosity_json, str):
+                learnosity_json = json.dumps(learnosity_json)
+            self._learnosity_file.write(f'learnosity[{self._html_position}] = {learnosity_json};\n')
+            parts.append(f"""
+                <form class="learnosity-form" name="preview-learnosity" action="https://www.knewton.com/content-dev/preview-learnosity" target="learnosity-iframe" method="post" onsubmit="return fillLearnosity(this, {self._html_position})">
+                    <input class="learnosity-content" name="learnosityContent" type="text" value="" />
+                    <input type="submit" class="learnosity-button" value="Preview learnosity" />
+                </form>
+    """)
+        elif learnosity_json:
+            parts.append("""
                 <form class="learnosity-form" name="preview-learnosity" action="https://www.knewton.com/content-dev/preview-learnosity" target="learnosity-iframe" method="post">
                     <input class="learnosity-content" 
                            name="learnosityContent"
@@ -336,163 +1108,91 @@ class Printer:
                     <input type="submit" class="learnosity-button" value="Preview learnosity" />
                 </form>
     """)
-            f.write('\n\n')
+        parts.append('\n\n')
+        if self._problems_per_page:
+            parts.insert(0, '<div class="problem">\n')
+            parts.append('</div>\n')
+        text = ''.join(parts)
+        self._html_file.write(text)
+        if instrumentation.active:
+            instrumentation.count("printer.bytes_written", len(text.encode("utf-8")), file="html")
 
     def finish_html_file(self):
         """
         Closes the left-side div for viewing question summaries and writes the right-side div
         that contains an iframe for previewing Learnosity. Closes any remaining tags (html and body)
+        With problems_per_page, finishes the last page and writes the index of the pages instead.
         """
-        with self.file_path_html.open('a') as f:
-            f.write('</div> \n')
-            f.write("""
+        if self._problems_per_page:
+            self._finish_html_page()
+            self._write_html_index()
+            self.close()
+            return
+        self._html_file.write('</div> \n')
+        self._html_file.write(html_right_panel)
+        self._html_file.write('</body></html>')
+        self.close()
+
+
+
+html_right_panel = """
                 <div class='right-panel' style='display: inline-block; float: left;'>
                     <iframe class="learnosity-iframe" name="learnosity-iframe" srcdoc=""></iframe>
                 </div> \n
-            """)
-            f.write('</body></html>')
+            """
+
+# Paged HTML: MathJax doesn't typeset the page on load, lazy_typeset_script typesets each problem when it's
+# scrolled into view instead.
+lazy_typeset_config = """
+<script type="text/x-mathjax-config">
+    MathJax.Hub.Config({skipStartupTypeset: true});
+</script>
+<script>
+    function fillLearnosity(form, position) {
+        form.learnosityContent.value = '{ "learnosityContent": ' + JSON.stringify(learnosity[position]) + ' }';
+        return true;
+    }
+</script>
+"""
 
+lazy_typeset_script = """
+<script>
+    (function () {
+        var problems = Array.prototype.slice.call(document.querySelectorAll('.problem'));
+        function typeset(problem) {
+            MathJax.Hub.Queue(["Typeset", MathJax.Hub, problem]);
+        }
+        if (!('IntersectionObserver' in window)) {
+            problems.forEach(typeset);
+            return;
+        }
+        var observer = new IntersectionObserver(function (entries) {
+            entries.forEach(function (entry) {
+                if (entry.isIntersecting) {
+                    observer.unobserve(entry.target);
+                    typeset(entry.target);
+                }
+            });
+        }, {rootMargin: '500px 0px'});
+        problems.forEach(function (problem) { observer.observe(problem); });
+    })();
+</script>
+"""
 
 
-def non_zero_select(n, m=None):
-    """random non zero number between -n and n or n and m (if m is specified)"""
+def non_zero_select(n, m=None, rng=random):
+    """random non zero number between -n and n or n and m (if m is specified). Pass a template's rng to use it."""
     if n == 0 and not m:
         return 0
     if m:
         if n * m > 0:
-            return random.randint(n, m)
-        return random.choice(list(range(n, 0)) + list(range(1, m + 1)))
+            return rng.randint(n, m)
+        low, size = n, m - n
     else:
-        return random.choice(list(range(-n, 0)) + list(range(1, n + 1)))
-
-
-def terms_string(*args, **kwargs):
-    """
-    returns a string representing the
-    list of terms added together with appropriate signs and _without simplifying_ in the given order
-    this replaces the need for lots of crazy string formatting, pmsign, etc. to get signs right
-    ex: terms_string(5, 3*x, -2, -x**2, -8*x) returns '5 + 3 x - 2 - x^{2} - 8 x'
-    note: this will not include 0 terms
-    """
-    return sym.latex(sym.Add(*args, evaluate=False), order='none', **kwargs)
-
-
-def constant_sign(x, leading=False):
-    """
-    Gives the string x with the appropriate sign in front
-    Useful for making strings involving adding a bunch of terms together
-    leading tells whether the constant is first, so shouldn't have a plus sign in that case
-    constant_sign(3) gives "+3"
-    constant_sign(3, True) gives "3"
-    constant_sign(-3) gives "-3"
-    constant_sign(sympify(1) / 2) gives "+ \frac{1}{2}"
-    etc.
-    """
-    if x >= 0 and not leading:
-        return " + %s" % sym.latex(x)
-    elif x >= 0 and leading:
-        return sym.latex(x)
-    elif x < 0:
-        return sym.latex(x)
-
-
-def terms_constants(*args):
-    """
-    Sum of a bunch of constants with appropriate signs, includes zeros
-    """
-    first_term = constant_sign(args[0], True)
-    other_terms = [constant_sign(arg) for arg in args[1:]]
-    return first_term + " ".join(other_terms)
-
-
-def multiply_terms(*args, left_parens=False, use_parens=True, multiplication_sign=" "):
-    """
-    returns the string with the args wrapped (if use_parens is True)
-    separated by multiplication_sign (default is just putting stuff next to each other)
-    """
-    if use_parens and left_parens:
-        wrapped_args = ["\\left ( %s \\right )" % sym.latex(arg) for arg in args]
-    elif use_parens:
-        wrapped_args = [sym.latex(args[0])] + ["\\left ( %s \\right )" % sym.latex(arg) for arg in args[1:]]
-    else:
-        wrapped_args = [sym.latex(arg) for arg in args]
-    return multiplication_sign.join(wrapped_args)
-
-
-def substitute_unsimplified(eval_point, poly, x=sym.symbols('x'), include_parentheses=True, order='lex', color=None,
-                            **kwargs):
-    """
-    Gives the string you would achieve by substituting eval_point into poly without simplifying it
-    :param eval_point: the value being substituted into poly
-    :param poly: a polynomial
-    :param x: the symbol being replaced
-    :param include_parentheses: whether to put parentheses around the argument being substituted
-    :param order: how the terms are ordered, 'lex' is default (which puts things from highest power to lowest)
-    other options are 'none' and 'old' but not sure how those work exactly
-    :return: a string of latex representing the substitution of eval_point into poly
-    """
-
-    # The asterisks are to avoid any issues when the color name shares a letter with the variable
-    x_string = "**" + sym.latex(x) + "**"
-    string_of_eval = sym.latex(eval_point, **kwargs)
-    string_of_eval = string_of_eval.replace(" ", "")
-    if color:
-        if include_parentheses:
-            string_of_eval = '\\color{%s}{\\left(%s\\right)}' % (color, string_of_eval)
-        else:
-            string_of_eval = '\\color{%s}{%s}' % (color, string_of_eval)
-    else:
-        if include_parentheses:
-            string_of_eval = '\\left(%s\\right)' % string_of_eval
-        else:
-            string_of_eval = '%s' % string_of_eval
-
-    function_string = sym.latex(poly, order=order, long_frac_ratio=sym.oo, **kwargs).replace(sym.latex(x), x_string)
-    return function_string.replace(x_string, string_of_eval)
-
-
-def substitute_unsimplified_multiple(eval_points, poly, poly_symbols=sym.symbols('x y'),
-                                     include_parentheses=True, order='lex', colors=None, **kwargs):
-    """
-    Similar to above but with multiple values
-    :param eval_points:
-    :param poly:
-    :param poly_symbols:
-    :param include_parentheses:
-    :param order:
-    :param colors: Should be a list containing the colors in the same order as the variables
-    :return:
-    """
-
-    variable_strings = ["**" + sym.latex(poly_symbol) + "**" for poly_symbol in poly_symbols]
-    strings_of_eval = [sym.latex(eval_point, **kwargs) for eval_point in eval_points]
-    strings_of_eval = [string_of_eval.replace(" ", "") for string_of_eval in strings_of_eval]
-    function_string = ""
-
-    if colors:
-        color = {}
-        colors = colors
-        for s in strings_of_eval:
-            color[s] = colors.pop()
-
-        if include_parentheses:
-            strings_of_eval = ['\\color{%s}{\\left(%s\\right)}' % (color[string_of_eval], string_of_eval)
-                               for string_of_eval in strings_of_eval]
-        else:
-            strings_of_eval = ['\\color{%s}{%s}' % (color[string_of_eval], string_of_eval) for string_of_eval
-                               in strings_of_eval]
-    else:
-        if include_parentheses:
-            strings_of_eval = ['\\left(%s\\right)' % string_of_eval for string_of_eval in strings_of_eval]
-        else:
-            strings_of_eval = ['%s' % string_of_eval for string_of_eval in strings_of_eval]
-
-    for symbol, starred_symbol in zip(poly_symbols, variable_strings):
-        function_string = sym.latex(poly, order=order, long_frac_ratio=sym.oo, **kwargs).replace(symbol, starred_symbol)
-
-    for variable_string, string_of_eval in zip(variable_strings, strings_of_eval):
-        function_string = function_string.replace(variable_string, string_of_eval)
-    return function_string
+        low, size = -n, 2 * n
+    # Picks the same value as rng.choice(non_zero_range(n, m)) without building the list
+    value = low + rng.randrange(size)
+    return value if value < 0 else value + 1
 
 
 def serialize(*clauses, **kwargs):
@@ -522,74 +1222,9 @@ def serialize(*clauses, **kwargs):
 def gcd_helper(m, n):
     """
     computes the greatest common divisor of m and n
+    (gcd, lcm and factors are in number_theory and imported here)
     """
-    if m < 0 or n < 0:
-        return gcd(abs(m), abs(n))
-    if n == 0:
-        return m
-    if m < n:
-        return gcd_helper(n, m)
-    return gcd_helper(m % n, n)
-
-
-def gcd(*args):
-    """
-    :param args: list of numbers
-    :return: greatest common divisor (greatest common factor) of the list of numbers
-    """
-    if len(args) == 1:
-        return args[0]
-    return gcd_helper(args[0], gcd(*args[1:]))
-
-
-def lcm(*args):
-    """
-    :param args: a list of numbers
-    :return: the least common multiple of the list of numbers
-    """
-    if len(args) == 1:
-        return abs(args[0])
-    lcm_of_others = lcm(*args[1:])
-    return abs(args[0] * lcm_of_others // gcd(args[0], lcm_of_others))
-
-
-def factors(n):
-    """Lists the factors of n"""
-    if n == 1:
-        return [1]
-    i = 1
-    l = []
-    while i < sym.sqrt(n):
-        if n % i == 0:
-            l.append(i)
-            l.append(n // i)
-        i = i + 1
-    if sym.sqrt(n * 1.0) == int(sym.sqrt(n)):
-        l.append(sym.sqrt(n))
-    return l
-
-
-def random_pythagorean_triple(max_hyp=1555):
-    """
-    Generates a random Pythagorean triple (a, b, c) using Dickson's method
-    :param max_hyp: The maximum size of the hypotenuse
-    :return: a, b, c where a^2 + b^2 = c^2
-    """
-    a = b = 0
-    c = max_hyp + 1
-
-    while (c > max_hyp):
-        r = random.randint(1, 12) * 2
-        rr = r * r // 2
-
-        s = random.choice(factors(rr))
-        t = rr // s
-
-        a = r + s
-        b = r + t
-        c = r + s + t
-
-    return a, b, c
+    return gcd(m, n)
 
 
 def sorted_nicely(l):
@@ -695,311 +1330,6 @@ def num_to_words(n):
     return num
 
 
-def pmsign(x, leading=False):
-    """
-    Gives the string x with the appropriate sign in front
-    Useful for making strings involving adding a bunch of terms together
-    leading tells whether the constant is first, so shouldn't have a plus sign in that case
-    constant_sign(3 * x) gives "+3x"
-    constant_sign(3 * x ** 2, Leading=True) gives "3x^2"
-    constant_sign(-3) gives "-3"
-    constant_sign(x / 2) gives "+ \frac{x}{2}"
-    etc.
-    """
-    x = sym.sympify(x)
-    if leading:
-        if abs(x) == 1:
-            return "" if x > 0 else "-"
-        else:
-            return sym.latex(x)
-    if _coeff_isneg(x):
-        return "- %s" % (sym.latex(abs(x)) if x != -1 else "")
-    else:
-        return "+ %s" % (sym.latex(x) if x != 1 else "")
-
-
-def mono_coeff(monomial, x=sym.symbols('x')):
-    """Returns the leading coefficient of a monomial"""
-    return sym.sympify(monomial).subs(x, 1)
-
-
-def mono_sgn(monomial, x=sym.symbols('x')):
-    """Returns the sign, of a monomial"""
-    if _coeff_isneg(sym.sympify(monomial)):
-        return -1
-    return 1
-
-
-def operator_expand_string(op, *args, x=sym.symbols('x'), end_op=None, parens=True,
-                           include_zeros=True, pull_out_const=False,
-                           pull_out_leading_negative=True,
-                           pull_out_zeroth_order_constants=False, **kwargs):
-    """
-    Use to apply an operator to a sum or difference of terms. For example
-    operator_expand_string('\\int ', x ** 2, 3x^{-2}, end_op=' \\, dx')
-    will give \\int \\left(x^2 + 3x^{-2} \\right) \\, dx
-    """
-    end_op = end_op if end_op else ""
-
-    left_paren = "\\left(" if parens else ""
-    right_paren = "\\right)" if parens else ""
-
-    if not include_zeros:
-        args = list(filter(lambda a: a != 0, args))
-
-    if pull_out_const:
-        if pull_out_zeroth_order_constants:
-            coeffs = [mono_coeff(a, x) if sym.diff(a) != 0 else a for a in args]
-        else:
-            coeffs = [mono_coeff(a, x) if sym.diff(a) != 0 else 1 for a in args]
-
-        coeffs = [1 if coeff == 0 else coeff for coeff in coeffs]
-
-        terms = [
-            f"{pmsign(coeffs[0], leading=True)}{op}{left_paren}{polytex(sym.sympify(args[0]) / coeffs[0], **kwargs)}"
-            f"{right_paren}{end_op}"]
-
-        terms += [f"{pmsign(coeff)}{op}{left_paren}{polytex(sym.sympify(arg) / coeff, **kwargs)}"
-                  f"{right_paren}{end_op}" for (arg, coeff) in zip(args[1:], coeffs[1:])]
-
-    else:
-        if pull_out_leading_negative:
-            terms = [f"{pmsign(mono_sgn(args[0], x), leading=True)}{op}"
-                     f"{left_paren}{polytex(args[0] * mono_sgn(args[0], x), **kwargs)}{right_paren}{end_op}"]
-        else:
-            terms = [f"{op}{left_paren}{polytex(args[0], **kwargs)}{right_paren}{end_op}"]
-
-        terms += [f"{pmsign(mono_sgn(arg, x))}{op}{left_paren}{polytex(arg * mono_sgn(arg, x), **kwargs)}"
-                  f"{right_paren}{end_op}" for arg in args[1:]]
-
-    return " ".join(terms)
-
-
-def operator_expand(op, poly, x=sym.symbols('x'), pull_out_const=False, **kwargs):
-    """
-    ***Note that this does not work with negative exponents! This has something to do with sympy generators...***
-    Use to apply an operator to a sum or difference of polynomials. For example
-    operator_expand('\\frac{d}{dx}', x ** 2 + 3x) will give \\frac{d}{dx}(x^2) + \\frac{d}{dx}(3x)
-
-    Use operator_expand_string instead.
-    """
-
-    term_list = [t[1] * x ** t[0][0] for t in sym.Poly(poly, x).terms()]
-
-    coeff_list = [mono_coeff(a, x) if sym.diff(a) != 0 else mono_sgn(a) for a in term_list]
-    coeff_list = [1 if coeff == 0 else coeff for coeff in coeff_list]
-
-    if pull_out_const:
-        expanded = [
-            f"{pmsign(coeff_list[0], leading=True)}{op} "
-            f"\\left( {sym.latex(term_list[0] / coeff_list[0], **kwargs)} \\right)"]
-
-        expanded += [f"{pmsign(coeff)}{op} \\left( {sym.latex(term / coeff, **kwargs)} \\right)"
-                     for (coeff, term) in zip(coeff_list[1:], term_list[1:])]
-
-    else:
-        expanded = [f"{op} \\left( {sym.latex(term_list[0], **kwargs)} \\right)" if coeff_list[0] > 0
-                    else f"-{op} \\left( {sym.latex(-term_list[0], **kwargs)} \\right)"]
-
-        expanded += [(f"+{op} \\left( {sym.latex(term, **kwargs)} \\right)" if term.subs(x, 1) > 0
-                      else f"-{op} \\left( {sym.latex(-term, **kwargs)} \\right)") for term in term_list[1:]]
-
-    return "".join(expanded)
-
-
-class MyLatexPrinter(LatexPrinter):
-    """
-    Print polynomials without some of the auto-formatting sym.latex gives.
-    Used for the polytex and add_terms functions below.
-    This modifies the built-in sympy LatexPrinter class by changing how Pow and Mul objects get printed.
-    """
-
-    def __init__(self, settings=None):
-        super().__init__(settings)
-        self._settings['fold_frac_powers'] = True
-
-    def _print_Pow(self, expr):
-        if expr.exp.is_Rational and expr.exp.q != 1 and self._settings['fold_frac_powers']:
-            base, p, q = self._print(expr.base), expr.exp.p, expr.exp.q
-            if '^' in base and expr.base.is_Symbol:
-                base = r"\left(%s\right)" % base
-            if expr.base.is_Function:
-                return self._print(expr.base, exp="%s/%s" % (p, q))
-            return r"%s^{%s/%s}" % (base, p, q)
-
-        tex = r"%s^{%s}"
-        exp = self._print(expr.exp)
-        base = self._print(expr.base)
-
-        return tex % (base, exp)
-
-    def _print_Mul(self, expr):
-        include_parens = False
-        if _coeff_isneg(expr):
-            expr = -expr
-            tex = "- "
-            if expr.is_Add:
-                tex += "("
-                include_parens = True
-        else:
-            tex = ""
-
-        if not expr.is_Mul:
-            return tex + self._print(expr)
-
-        for term in expr.args:
-            if abs(term) != 1:
-                if term.is_Add:
-                    tex += f"\\left({self._print(term)}\\right)"
-                else:
-                    tex += self._print(term)
-            elif term < 0:
-                tex += "-"
-
-        if include_parens:
-            tex += ")"
-        return tex
-
-
-def add_terms(*args, **kwargs):
-    """Like polytex but keeps the terms ordered. For example
-    add_terms(f = 2 * x ** (sym.sympify(1) / 4) - (sym.sympify(1) / 2) * x ** (sym.sympify(-2) / 3) - 4 + 3 * x ** 3)
-    gives 2x^{1/4} - \frac{1}{2}x^{-2/3} - 4 + 3x^{3}"""
-    return polytex(sym.Add(*args, evaluate=False), order='none', **kwargs)
-
-
-def polytex(expr, **kwargs):
-    """
-    Use to print a polynomial with none of the extra formatting that sym.latex() gives.
-    For example
-    polytex(f = 2 * x ** (sym.sympify(1) / 4) - (sym.sympify(1) / 2) * x ** (sym.sympify(-2) / 3) - 4 + 3 * x ** 3)
-    gives 2x^{1/4} + 3x^{3} - 4 - \frac{1}{2}x^{-2/3}
-    """
-    return MyLatexPrinter(kwargs).doprint(expr)
-
-
-def substitute(eval_point, poly, x=sym.symbols('x'), include_parentheses=True, color=None, **kwargs):
-    """
-    Gives the string you would achieve by substituting eval_point into poly without simplifying it
-    :param eval_point: the value being substituted into poly
-    :param poly: a polynomial
-    :param x: the symbol being replaced
-    :param include_parentheses: whether to put parentheses around the argument being substituted
-    :param order: how the terms are ordered, 'lex' is default (which puts things from highest power to lowest)
-    other options are 'none' and 'old' but not sure how those work exactly
-    :return: a string of latex representing the substitution of eval_point into poly
-    """
-
-    # The asterisks are to avoid any issues when the color name shares a letter with the variable
-    x_string = "**" + sym.latex(x) + "**"
-    string_of_eval = polytex(eval_point)
-    string_of_eval = string_of_eval.replace(" ", "")
-    if color:
-        if include_parentheses:
-            string_of_eval = '\\color{%s}{\\left(%s\\right)}' % (color, string_of_eval)
-        else:
-            string_of_eval = '\\color{%s}{%s}' % (color, string_of_eval)
-    else:
-        if include_parentheses:
-            string_of_eval = '\\left(%s\\right)' % string_of_eval
-        else:
-            string_of_eval = '%s' % string_of_eval
-
-    function_string = polytex(poly, **kwargs).replace(sym.latex(x), x_string)
-    return function_string.replace(x_string, string_of_eval)
-
-
-def round(a, n, places=None):
-    if places is None:
-        places = n
-    multiplier = 10 ** n
-    if a == 0:
-        num = 0
-    elif a > 0:
-        num = 1.0 * sym.floor(a * multiplier + 0.5) / multiplier
-    else:
-        num = 1.0 * sym.ceiling(a * multiplier - 0.5) / multiplier
-    return f"{num:.{places}f}"
-
-
-def poly_slicer(poly, first_n_terms=None, show_zeros=True, ghost_terms=True, underline=False,
-                x=sym.symbols('x')):
-    """Helper Function for Polynomial long division"""
-    if show_zeros:
-        terms = sym.Poly(poly, x).all_terms()
-    else:
-        terms = sym.Poly(poly, x).terms()
-
-    first_n_terms = len(terms) if (first_n_terms is None or first_n_terms > len(terms)) else first_n_terms
-
-    if underline:
-        poly_string = f"\\underline{{ \\left({pmsign(terms[0][1], leading=True)}{sym.latex(x ** terms[0][0][0])}"
-
-        for term in terms[1:first_n_terms]:
-            poly_string += f"{constant_sign(term[1])}" \
-                           f"{sym.latex(x ** term[0][0]) if term[0][0] != 0 else ''}"
-
-        poly_string += " \\right)}"
-    else:
-        poly_string = f"{pmsign(terms[0][1], leading=True)}" \
-                      f"{sym.latex(x ** terms[0][0][0]) if terms[0][0][0] != 0 else ''}"
-
-        for term in terms[1:first_n_terms]:
-            poly_string += f"{constant_sign(term[1])}" \
-                           f"{sym.latex(x ** term[0][0]) if term[0][0] != 0 else ''}"
-
-    if ghost_terms:
-        poly_string += f"\\phantom{{ { '{{}}' if not underline else ''} "
-        for term in terms[first_n_terms:]:
-            poly_string += f"{constant_sign(term[1])}" \
-                           f"{sym.latex(x ** term[0][0]) if term[0][0] != 0 else ''}"
-        poly_string += " }"
-
-    return poly_string
-
-
-def poly_long_div(n, d, x=sym.symbols('x')):
-    """
-    function n / d:
-        require d ≠ 0
-        q ← 0
-        r ← n       # At each step n = d × q + r
-        while r ≠ 0 AND degree(r) ≥ degree(d):
-        t ← lead(r)/lead(d)     # Divide the leading terms
-         q ← q + t
-         r ← r − t * d
-    return (q, r)
-    :return: LaTeX for polynomial long division n / d
-    """
-    n = sym.Poly(n, x)
-    d = sym.Poly(d, x)
-
-    q = sym.div(n, d)[0]
-
-    long_div_string = f"\\require{{enclose}}" \
-                      f"\\begin{{array}}{{r}}" \
-                      f"{sym.latex(q.as_expr())} \\\\[-3pt] " \
-                      f"{sym.latex(d.as_expr())} \\enclose{{longdiv}}{{{poly_slicer(n)}}}"
-
-    term_length = len(d.all_terms())
-
-    q = 0
-    r = n
-    while r != 0 and sym.degree(r) >= sym.degree(d):
-        t = sym.LT(r) / sym.LT(d)
-        q = q + t
-        r = r - t * d
-
-        if r == 0 or sym.degree(r) < sym.degree(d):
-            long_div_string += f"\\\\[-3pt] -{poly_slicer(t * d, first_n_terms=term_length, underline=True)}" \
-                               f"\\\\[-3pt] {poly_slicer(r, show_zeros=False)}"
-        else:
-            long_div_string += f"\\\\[-3pt] -{poly_slicer(t * d, first_n_terms=term_length, underline=True)}" \
-                               f"\\\\[-3pt] {poly_slicer(r, first_n_terms=term_length)}"
-
-    return f"{long_div_string} \\end{{array}}"
-
-
 """
 These scripts must be injected in the <head> of the output HTML files in order to render LaTeX.
 """
@@ -1,4 +1,159 @@
+import functools
 import json
+from json.encoder import encode_basestring_ascii
+
+import instrumentation
+
+
+DEFAULT_OPTIONS = {"ignoreText": True, "decimalPlaces": 10}
+DEFAULT_KEYBOARDS = ["basic", "qwerty"]
+BLACKLIST_OPTIONS = {"ignoreOrder": True, "ignoreCoefficientOne": True, "inverseResult": True}
+
+
+def _encode(value):
+    """The same as json.dumps(value), with a fast path for strings."""
+    if type(value) is str:
+        return encode_basestring_ascii(value)
+    return json.dumps(value)
+
+
+class _Response:
+    """A pre-serialised {"method": ..., "value": ..., "options": ...} dict that only needs its value filled in."""
+
+    def __init__(self, method, options):
+        self.start = '{"method": ' + _encode(method) + ', "value": '
+        self.end = ', "options": ' + json.dumps(options) + '}'
+
+    def __call__(self, value):
+        return self.start + _encode(value) + self.end
+
+
+def _blob_head(blob_type):
+    return '{"type": ' + _encode(blob_type) + ', "is_math": true, "ui_style": {"type": "block-on-focus-keyboard"}, ' \
+                                              '"template": '
+
+
+def _blob_middle(keyboards):
+    return ', "response_containers": [], "symbols": ' + json.dumps(keyboards) + \
+           ', "validation": {"scoring_type": "exactMatch", "valid_response": {"score": 1, "value": ['
+
+
+class LeaBlob:
+    """
+    A compiled lea_blob. The parts that are the same for every problem of a template (keyboards, options,
+    validation methods) are serialised once, and each call only encodes the template and responses.
+    The result is byte-for-byte the same as lea_blob gives for the same arguments.
+
+        blob = LeaBlob("equivSymbolic")
+        json_blob = blob(question_template, correct_answer)
+    """
+
+    def __init__(self, validation, keyboards=None, options=None, alt_validations=None, alt_options=None,
+                 blacklist_validations=None):
+        options = options or DEFAULT_OPTIONS
+        self.validation = validation
+        self.alt_validations = alt_validations
+        self.blacklist_validations = blacklist_validations
+
+        self._head = _blob_head("formulaV2")
+        self._middle = _blob_middle(keyboards or DEFAULT_KEYBOARDS)
+        self._options = options
+        self._alt_options = alt_options or options
+        self._responses = {}
+
+    def _response(self, method, options):
+        key = (method, id(options))
+        if key not in self._responses:
+            self._responses[key] = _Response(method, options)
+        return self._responses[key]
+
+    @instrumentation.timed("lea_blob")
+    def __call__(self, template, response, alternates=None, blacklist=None):
+        parts = [self._head, _encode(template), self._middle,
+                 self._response(self.validation, self._options)(response)]
+        if blacklist and not self.blacklist_validations:
+            blacklisted = self._response("equivLiteral", BLACKLIST_OPTIONS)
+            parts.extend(', ' + blacklisted(r) for r in blacklist)
+        parts.append(']}, "alt_responses": [')
+
+        alt_responses = []
+        if alternates:
+            alt_validations = self.alt_validations or [self.validation] * len(alternates)
+            for (r, method) in zip(alternates, alt_validations):
+                alt_responses.append('{"score": 1, "value": [' + self._response(method, self._alt_options)(r) + ']}')
+        if blacklist and self.blacklist_validations:
+            for (r, method) in zip(blacklist, self.blacklist_validations):
+                alt_responses.append('{"score": 0, "value": [' + self._response(method, self._options)(r) + ']}')
+        parts.append(', '.join(alt_responses))
+        parts.append(']}}')
+        return ''.join(parts)
+
+
+class ClozeBlob:
+    """
+    A compiled cloze_blob, see LeaBlob. The result is byte-for-byte the same as cloze_blob gives.
+
+        blob = ClozeBlob(["equivSymbolic", "equivValue"])
+        json_blob = blob(question_template, [first_answer, second_answer])
+    """
+
+    def __init__(self, validations, keyboards=None, options=None, alt_validations=None, alt_options=None):
+        options = options or DEFAULT_OPTIONS
+        self._head = _blob_head("clozeformula")
+        self._middle = _blob_middle(keyboards or DEFAULT_KEYBOARDS)
+        self._valid = [_Response(method, options) for method in validations]
+        self._alternate = [_Response(method, alt_options or options) for method in (alt_validations or validations)]
+
+    @staticmethod
+    def _values(responses, compiled):
+        return ', '.join('[' + response(r) + ']' for (r, response) in zip(responses, compiled))
+
+    @instrumentation.timed("cloze_blob")
+    def __call__(self, template, responses, alternates=None):
+        parts = [self._head, _encode(template), self._middle, self._values(responses, self._valid),
+                 ']}, "alt_responses": [']
+        if alternates:
+            parts.append(', '.join('{"score": 1, "value": [' + self._values(r, self._alternate) + ']}'
+                                   for r in alternates))
+        parts.append(']}}')
+        return ''.join(parts)
+
+
+def _freeze(value):
+    """A hashable key for a JSON-like value. Types are kept so that e.g. 1 and True (or 1.0) get different keys."""
+    if isinstance(value, dict):
+        return dict, tuple((k, _freeze(v)) for (k, v) in value.items())
+    if isinstance(value, (list, tuple)):
+        return (list if isinstance(value, list) else tuple), tuple(_freeze(v) for v in value)
+    return type(value), value
+
+
+def _thaw(key):
+    """The value _freeze(value) was made from."""
+    (kind, value) = key
+    if kind is dict:
+        return {k: _thaw(v) for (k, v) in value}
+    if kind in (list, tuple):
+        return kind(_thaw(v) for v in value)
+    return value
+
+
+def _compiled_blob(blob_class, *args):
+    """
+    Compiled blobs are cached on their arguments, so lea_blob and cloze_blob build each one only once. The cache keeps
+    the most recently used ones, see compiled_blob_cache_info().
+    """
+    return _cached_blob(blob_class, *(_freeze(arg) for arg in args))
+
+
+@functools.lru_cache(maxsize=1024)
+def _cached_blob(blob_class, *keys):
+    return blob_class(*(_thaw(key) for key in keys))
+
+
+def compiled_blob_cache_info():
+    """Hit and miss statistics of the compiled blob cache, as a functools cache_info tuple."""
+    return _cached_blob.cache_info()
 
 
 def cloze_blob(template, responses, validations, keyboards=None, options=None,
@@ -15,44 +170,8 @@ def cloze_blob(template, responses, validations, keyboards=None, options=None,
     :param alt_options:
     :return:
     """
-
-    if not options:
-        options = {"ignoreText": True, "decimalPlaces": 10}
-    if not keyboards:
-        keyboards = ["basic", "qwerty"]
-
-    value = []
-    for (response, validation) in zip(responses, validations):
-        value.append([{"method": validation, "value": response, "options": options}])
-    valid_response = {"score": 1, "value": value}
-
-    if alternates:
-        if not alt_validations:
-            alt_validations = validations
-        if not alt_options:
-            alt_options = options
-
-        alt_response = []
-        for r in alternates:
-            value = []
-            for (response, validation) in zip(r, alt_validations):
-                value.append([{"method": validation, "value": response, "options": alt_options}])
-            alt_response.append({"score": 1, "value": value})
-
-    else:
-        alt_response = []
-
-    validation = {"scoring_type": "exactMatch", "valid_response": valid_response, "alt_responses": alt_response}
-
-    blob = {"type": "clozeformula",
-            "is_math": True,
-            "ui_style": {"type": "block-on-focus-keyboard"},
-            "template": template,
-            "response_containers": [],
-            "symbols": keyboards,
-            "validation": validation}
-
-    return json.dumps(blob)
+    blob = _compiled_blob(ClozeBlob, validations, keyboards, options, alt_validations, alt_options)
+    return blob(template, responses, alternates)
 
 
 def lea_blob(template, response, validation, keyboards=None, options=None,
@@ -70,50 +189,6 @@ def lea_blob(template, response, validation, keyboards=None, options=None,
     :param alt_options:
     :return:
     """
-
-    if not options:
-        options = {"ignoreText": True, "decimalPlaces": 10}
-    if not keyboards:
-        keyboards = ["basic", "qwerty"]
-
-    value = [{"method": validation, "value": response, "options": options}]
-    if blacklist and not blacklist_validations:
-
-        blacklist_options = {"ignoreOrder": True, "ignoreCoefficientOne": True, "inverseResult": True}
-
-        for response in blacklist:
-            value.append({"method": "equivLiteral", "value": response, "options": blacklist_options})
-
-    valid_response = {"score": 1, "value": value}
-
-    alt_response = []
-    if alternates:
-        if not alt_validations:
-            alt_validations = [validation] * len(alternates)
-        if not alt_options:
-            alt_options = options
-
-        for (response, validation) in zip(alternates, alt_validations):
-            value = [{"method": validation, "value": response, "options": alt_options}]
-            alt_response.append({"score": 1, "value": value})
-
-    if blacklist and blacklist_validations:
-        if not blacklist_validations:
-            blacklist_validations = ["equivLiteral"] * len(blacklist)
-        blacklist_options = options
-
-        for (response, validation) in zip(blacklist, blacklist_validations):
-            value = [{"method": validation, "value": response, "options": blacklist_options}]
-            alt_response.append({"score": 0, "value": value})
-
-    validation = {"scoring_type": "exactMatch", "valid_response": valid_response, "alt_responses": alt_response}
-
-    blob = {"type": "formulaV2",
-            "is_math": True,
-            "ui_style": {"type": "block-on-focus-keyboard"},
-            "template": template,
-            "response_containers": [],
-            "symbols": keyboards,
-            "validation": validation}
-
-    return json.dumps(blob)
\ No newline at end of file
+    blob = _compiled_blob(LeaBlob, validation, keyboards, options, alt_validations, alt_options,
+                          blacklist_validations)
+    return blob(template, response, alternates, blacklist)